@@ -1,24 +1,45 @@
 from flask import (
-    Flask, request, jsonify,
+    Flask, request, jsonify, Response, stream_with_context,
     render_template, redirect, url_for, session
 )
 from flask_jwt_extended import (
     JWTManager, create_access_token,
-    jwt_required, get_jwt_identity
+    jwt_required, get_jwt
 )
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta
-from math import sqrt
-import mysql.connector
 
-# ======= LSTM IMPORTS ======= 
-import numpy as np
-import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_absolute_error, mean_squared_error
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense
+from database.db import transaction
+from database.pool import get_db, get_pool, init_app as init_db_pool
+from models.log import logs as log_repo
+from models.penjualan import penjualan as penjualan_repo
+from models.prediksi import prediksi as prediksi_repo
+from models.produk import produk as produk_repo
+from models.rekomendasi import rekomendasi as rekomendasi_repo
+from models.statistik import statistik as statistik_repo
+from models.umkm import umkm as umkm_repo
+from models.user import users as user_repo
+from services import log_service as activity_log
+from services import metrics, profiler
+from services.query_cache import query_cache
+from services.pagination import Filters, InvalidCursor, wants_json
+from services.export_service import FORMATS as EXPORT_FORMATS, export_stream
+from controllers.prediksi_controller import prediksi_bp as prediksi_form_bp
+from routes.log_routes import log_bp
+from routes.penjualan_routes import penjualan_bp, read_import_rows
+from routes.prediksi_routes import prediksi_bp
+from routes.produk_routes import produk_bp
+from routes.rekomendasi_routes import rekomendasi_bp
+from services import rollup_service as rollup
+from services.prediksi_job import job_queue
+from services.produk_service import delete_produk
+from services.prediksi_service import (
+    load_sales_daily, load_sales_series, load_produk_matrix
+)
 
+# Stack ML (TensorFlow, scikit-learn, NumPy) tidak di-import di sini:
+# training berjalan di proses worker prediksi (services/prediksi_job.py)
+# sehingga worker web tetap ringan.
 
 app = Flask(__name__)
 
@@ -30,33 +51,65 @@ app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=2)
 jwt = JWTManager(app)
 
 # ================= DATABASE =================
-def get_db():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="",
-        database="umkm_smart"
-    )
+# get_db() meminjam koneksi dari pool dan mengikatnya ke request (g);
+# koneksi dikembalikan ke pool saat teardown, db.close() di route aman.
+init_db_pool(app)
+
+# ================= PROFILING =================
+# Waktu, jumlah query, waktu DB dan render template per request; header
+# Server-Timing dan log request lambat (services/profiler.py).
+profiler.init_app(app)
+
+# ================= METRICS =================
+# /metrics format Prometheus; didaftarkan setelah profiler agar waktu DB
+# per request ikut tercatat (services/metrics.py)
+metrics.init_app(app)
+
+# ================= BLUEPRINT API =================
+# Respons JSON lewat services/json_api.py (orjson, ?fields=, ?stream=1)
+app.register_blueprint(produk_bp, url_prefix="/api/produk")
+app.register_blueprint(penjualan_bp, url_prefix="/api/penjualan")
+app.register_blueprint(prediksi_bp, url_prefix="/api/prediksi")
+app.register_blueprint(log_bp, url_prefix="/api/log")
+app.register_blueprint(rekomendasi_bp, url_prefix="/api/rekomendasi")
+
+# Form /prediksi: horizon "hari" langsung ke engine forecaster
+app.register_blueprint(prediksi_form_bp)
 
 # ================= LOG ACTIVITY =================
+# Baris log hanya dimasukkan ke antrean; thread penulis di log_service
+# menyimpannya per batch sehingga request tidak menunggu commit log.
 def log_activity(user_id, aktivitas):
-    db = get_db()
-    cur = db.cursor()
-    cur.execute("""
-        INSERT INTO log_aktivitas_user
-        (user_id, aktivitas, endpoint, metode_http, ip_address, created_at)
-        VALUES (%s,%s,%s,%s,%s,%s)
-    """, (
+    activity_log.log_activity(
         user_id,
         aktivitas,
-        request.path,
-        request.method,
-        request.remote_addr,
-        datetime.now()
-    ))
-    db.commit()
-    cur.close()
-    db.close()
+        endpoint=request.path,
+        metode_http=request.method,
+        ip_address=request.remote_addr,
+        created_at=datetime.now()
+    )
+
+# ================= PAGINATION =================
+# Halaman daftar memakai keyset pagination (services/pagination.py);
+# ?after= / ?before= berisi cursor, ?format=json untuk API.
+@app.errorhandler(InvalidCursor)
+def invalid_cursor(e):
+    if wants_json(request):
+        return jsonify({"error": str(e)}), 400
+    return redirect(request.path)
+
+
+def _args_key():
+    """Query string sebagai bagian key cache halaman berhalaman."""
+    return tuple(sorted(request.args.items(multi=True)))
+
+
+def umkm_options():
+    """Pilihan filter UMKM untuk halaman admin."""
+    def load():
+        return umkm_repo.options(get_db())
+
+    return query_cache.get_or_load("umkm_options", ("umkm",), 300, load)
 
 # ================= ROOT =================
 @app.route("/")
@@ -83,14 +136,9 @@ def register():
         return jsonify({"msg": "Data tidak lengkap"}), 400
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     # Cek email
-    cur.execute("SELECT id FROM users WHERE email=%s", (data["email"],))
-    if cur.fetchone():
-        cur.close()
-        db.close()
-
+    if user_repo.email_exists(db, data["email"]):
         # Jika dari form → kembali ke halaman register
         if not request.is_json:
             return render_template(
@@ -104,25 +152,21 @@ def register():
     password_hash = generate_password_hash(data["password"])
 
     # Simpan user
-    cur.execute("""
-        INSERT INTO users (name,email,password,role,created_at)
-        VALUES (%s,%s,%s,%s,%s)
-    """, (
-        data["name"],
-        data["email"],
-        password_hash,
-        "umkm",
-        datetime.now()
-    ))
-    db.commit()
-    user_id = cur.lastrowid
+    with transaction(db) as cur:
+        user_id = user_repo.create(
+            db,
+            data["name"],
+            data["email"],
+            password_hash,
+            "umkm",
+            datetime.now()
+        )
+        rollup.user_changed(cur, 1)
+    query_cache.invalidate("users")
 
     # Log aktivitas
     log_activity(user_id, "register")
 
-    cur.close()
-    db.close()
-
     # ================= RESPONSE =================
     # Jika dari WEB → redirect
     if not request.is_json:
@@ -147,16 +191,9 @@ def login():
     if not data or not data.get("email") or not data.get("password"):
         return jsonify({"msg": "Email dan password wajib diisi"}), 400
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    cur.execute("SELECT * FROM users WHERE email=%s", (data["email"],))
-    user = cur.fetchone()
-
-    if not user or not check_password_hash(user["password"], data["password"]):
-        cur.close()
-        db.close()
+    user = user_repo.authenticate(get_db(), data["email"], data["password"])
 
+    if not user:
         # Jika dari WEB → tampilkan error
         if not request.is_json:
             return render_template(
@@ -167,26 +204,25 @@ def login():
         return jsonify({"msg": "Email atau password salah"}), 401
 
     # ================= SESSION UNTUK WEB =================
-    session["user_id"] = user["id"]
-    session["role"] = user["role"]
+    session["user_id"] = user.id
+    session["role"] = user.role
 
-    log_activity(user["id"], "login")
-
-    cur.close()
-    db.close()
+    log_activity(user.id, "login")
 
     # ================= JWT UNTUK API =================
-    token = create_access_token(identity={
-        "id": user["id"],
-        "role": user["role"]
-    })
+    # Subject JWT wajib string (Flask-JWT-Extended 4.7+); role dibawa
+    # sebagai claim tambahan
+    token = create_access_token(
+        identity=str(user.id),
+        additional_claims={"role": user.role}
+    )
 
     # ================= RESPONSE =================
     if request.is_json:
-        return jsonify({"token": token, "role": user["role"]})
+        return jsonify({"token": token, "role": user.role})
 
     # Redirect sesuai role
-    if user["role"] == "admin":
+    if user.role == "admin":
         return redirect(url_for("admin_dashboard"))
 
     return redirect(url_for("umkm_dashboard"))
@@ -204,91 +240,77 @@ def admin_dashboard():
         return redirect("/login")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    # Statistik utama
-    cur.execute("SELECT COUNT(*) total FROM users")
-    total_user = cur.fetchone()["total"]
-
-    cur.execute("SELECT COUNT(*) total FROM umkm")
-    total_umkm = cur.fetchone()["total"]
 
-    cur.execute("SELECT COUNT(*) total FROM produk")
-    total_produk = cur.fetchone()["total"]
-
-    cur.execute("SELECT SUM(total_harga) omzet FROM penjualan")
-    total_omzet = cur.fetchone()["omzet"] or 0
+    # Statistik utama (tabel rollup, satu baris)
+    statistik = statistik_repo.ringkasan(db)
 
     # Log aktivitas terbaru
-    cur.execute("""
-        SELECT l.created_at, u.name, l.aktivitas, l.endpoint
-        FROM log_aktivitas_user l
-        LEFT JOIN users u ON l.user_id = u.id
-        ORDER BY l.created_at DESC
-        LIMIT 10
-    """)
-    logs = cur.fetchall()
-
-    cur.close()
-    db.close()
+    logs = log_repo.terbaru(db, 10)
 
     return render_template(
         "admin/dashboard.html",
-        total_user=total_user,
-        total_umkm=total_umkm,
-        total_produk=total_produk,
-        total_omzet=total_omzet,
+        total_user=statistik.total_user,
+        total_umkm=statistik.total_umkm,
+        total_produk=statistik.total_produk,
+        total_omzet=statistik.total_omzet,
         logs=logs
     )
 
 
+@app.route("/admin/db-pool")
+def admin_db_pool():
+    if session.get("role") != "admin":
+        return redirect("/login")
+
+    return jsonify(get_pool().stats())
+
+
+@app.route("/admin/log-queue")
+def admin_log_queue():
+    if session.get("role") != "admin":
+        return redirect("/login")
+
+    return jsonify(activity_log.writer.stats())
+
+
+@app.route("/admin/cache")
+def admin_cache():
+    if session.get("role") != "admin":
+        return redirect("/login")
+
+    return jsonify(query_cache.stats())
+
+
+@app.route("/admin/profiling")
+def admin_profiling():
+    if session.get("role") != "admin":
+        return redirect("/login")
+
+    return jsonify(profiler.stats.stats())
+
+
 @app.route("/admin/users")
 def admin_users():
     if session.get("role") != "admin":
         return redirect("/login")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    cur.execute("""
-        SELECT id, name, email, role, created_at
-        FROM users
-        ORDER BY created_at DESC
-    """)
-    users = cur.fetchall()
+    filters = Filters(request.args).date_range("created_at")
+    page = user_repo.page(get_db(), filters)
 
-    cur.close()
-    db.close()
+    if wants_json(request):
+        return jsonify(page.to_dict())
 
-    return render_template("admin/users.html", users=users)
+    return render_template("admin/users.html", users=page.items, page=page)
 
 @app.route("/admin/umkm")
 def admin_umkm():
     if session.get("role") != "admin":
         return redirect("/login")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    cur.execute("""
-        SELECT 
-            u.id,
-            u.nama_umkm,
-            us.name AS pemilik,
-            u.kategori,
-            COUNT(DISTINCT pr.id) AS total_produk,
-            COALESCE(SUM(pj.total_harga), 0) AS total_penjualan
-        FROM umkm u
-        JOIN users us ON u.user_id = us.id
-        LEFT JOIN produk pr ON pr.umkm_id = u.id
-        LEFT JOIN penjualan pj ON pj.produk_id = pr.id
-        GROUP BY u.id, us.name, u.kategori
-        ORDER BY total_penjualan DESC
-    """)
-
-    umkm = cur.fetchall()
-    cur.close()
-    db.close()
+    umkm = query_cache.get_or_load(
+        "admin_umkm", ("umkm", "users", "produk", "penjualan"), 120,
+        lambda: umkm_repo.monitoring(get_db())
+    )
 
     return render_template("admin/monitoring_umkm.html", umkm=umkm)
 
@@ -298,73 +320,67 @@ def admin_produk():
     if session.get("role") != "admin":
         return redirect("/login")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
+    filters = (
+        Filters(request.args)
+        .date_range("pr.created_at")
+        .equals("umkm_id", "pr.umkm_id")
+    )
 
-    cur.execute("""
-        SELECT pr.nama_produk, pr.harga, pr.stok, u.nama_umkm
-        FROM produk pr
-        JOIN umkm u ON pr.umkm_id = u.id
-        ORDER BY pr.created_at DESC
-    """)
-    produk = cur.fetchall()
+    page = query_cache.get_or_load(
+        "admin_produk", ("produk", "umkm"), 60,
+        lambda: produk_repo.admin_page(get_db(), filters), params=_args_key()
+    )
 
-    cur.close()
-    db.close()
+    if wants_json(request):
+        return jsonify(page.to_dict())
 
-    return render_template("admin/monitoring_produk.html", produk=produk)
+    return render_template(
+        "admin/monitoring_produk.html",
+        produk=page.items,
+        page=page,
+        umkm_options=umkm_options()
+    )
 
 @app.route("/admin/penjualan")
 def admin_penjualan():
     if session.get("role") != "admin":
         return redirect("/login")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
+    filters = (
+        Filters(request.args)
+        .date_range("p.tanggal")
+        .equals("umkm_id", "pr.umkm_id")
+        .equals("produk_id", "p.produk_id")
+    )
 
-    cur.execute("""
-        SELECT p.tanggal, pr.nama_produk, u.nama_umkm,
-               p.jumlah, p.total_harga
-        FROM penjualan p
-        JOIN produk pr ON p.produk_id = pr.id
-        JOIN umkm u ON pr.umkm_id = u.id
-        ORDER BY p.tanggal DESC
-    """)
-    penjualan = cur.fetchall()
+    page = query_cache.get_or_load(
+        "admin_penjualan", ("penjualan", "produk", "umkm"), 60,
+        lambda: penjualan_repo.admin_page(get_db(), filters),
+        params=_args_key()
+    )
 
-    cur.close()
-    db.close()
+    if wants_json(request):
+        return jsonify(page.to_dict())
 
-    return render_template("admin/penjualan_global.html", penjualan=penjualan)
+    return render_template(
+        "admin/penjualan_global.html",
+        penjualan=page.items,
+        page=page,
+        total_omzet=statistik_repo.ringkasan(get_db()).total_omzet,
+        umkm_options=umkm_options()
+    )
 
 @app.route("/admin/prediksi")
 def admin_prediksi():
     if session.get("role") != "admin":
         return redirect("/")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    # Ambil hasil prediksi terbaru per produk
-    cur.execute("""
-        SELECT 
-            pr.nama_produk,
-            um.nama_umkm,
-            pp.tanggal_prediksi,
-            pp.hasil_prediksi,
-            pp.mae,
-            pp.rmse,
-            pp.created_at
-        FROM prediksi_penjualan pp
-        JOIN produk pr ON pp.produk_id = pr.id
-        JOIN umkm um ON pr.umkm_id = um.id
-        ORDER BY pp.created_at DESC
-        LIMIT 50
-    """)
-
-    prediksi = cur.fetchall()
-    cur.close()
-    db.close()
+    # Hasil prediksi terbaru per produk lewat pointer prediksi_terakhir
+    # (models/prediksi.py)
+    prediksi = query_cache.get_or_load(
+        "admin_prediksi", ("prediksi_penjualan", "produk", "umkm"), 60,
+        lambda: prediksi_repo.terbaru(get_db(), 50)
+    )
 
     return render_template(
         "admin/monitoring_prediksi.html",
@@ -376,22 +392,18 @@ def admin_log():
     if session.get("role") != "admin":
         return redirect("/login")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
+    filters = (
+        Filters(request.args)
+        .date_range("l.created_at")
+        .equals("user_id", "l.user_id")
+    )
 
-    cur.execute("""
-        SELECT l.created_at, u.name, u.role,
-               l.aktivitas, l.endpoint, l.metode_http, l.ip_address
-        FROM log_aktivitas_user l
-        LEFT JOIN users u ON l.user_id = u.id
-        ORDER BY l.created_at DESC
-    """)
-    logs = cur.fetchall()
+    page = log_repo.admin_page(get_db(), filters)
 
-    cur.close()
-    db.close()
+    if wants_json(request):
+        return jsonify(page.to_dict())
 
-    return render_template("admin/log_aktivitas.html", logs=logs)
+    return render_template("admin/log_aktivitas.html", logs=page.items, page=page)
 
 
 # ================= UMKM DASHBOARD =================
@@ -401,26 +413,14 @@ def umkm_dashboard():
         return redirect("/")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     # Ambil semua UMKM milik user
-    cur.execute(
-        "SELECT * FROM umkm WHERE user_id=%s",
-        (session["user_id"],)
-    )
-    umkm_list = cur.fetchall()
+    umkm_list = umkm_repo.by_user(db, session["user_id"])
 
     # UMKM aktif (jika ada)
     active_umkm = None
     if session.get("active_umkm_id"):
-        cur.execute(
-            "SELECT * FROM umkm WHERE id=%s",
-            (session["active_umkm_id"],)
-        )
-        active_umkm = cur.fetchone()
-
-    cur.close()
-    db.close()
+        active_umkm = umkm_repo.get(db, session["active_umkm_id"])
 
     return render_template(
         "umkm/dashboard.html",
@@ -435,25 +435,21 @@ def umkm_data():
         return redirect("/")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     if request.method == "POST":
-        cur.execute("""
-            INSERT INTO umkm (user_id,nama_umkm,alamat,kategori,created_at)
-            VALUES (%s,%s,%s,%s,%s)
-        """, (
-            session["user_id"],
-            request.form["nama_umkm"],
-            request.form["alamat"],
-            request.form["kategori"],
-            datetime.now()
-        ))
-        db.commit()
+        with transaction(db) as cur:
+            umkm_id = umkm_repo.create(
+                db,
+                session["user_id"],
+                request.form["nama_umkm"],
+                request.form["alamat"],
+                request.form["kategori"],
+                datetime.now()
+            )
+            rollup.umkm_changed(cur, umkm_id, 1)
+        query_cache.invalidate("umkm")
 
-    cur.execute("SELECT * FROM umkm WHERE user_id=%s", (session["user_id"],))
-    data = cur.fetchall()
-    cur.close()
-    db.close()
+    data = umkm_repo.by_user(db, session["user_id"])
 
     return render_template("umkm/umkm.html", umkm=data)
 
@@ -462,24 +458,9 @@ def select_umkm(umkm_id):
     if session.get("role") != "umkm":
         return redirect("/")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
     # Validasi kepemilikan UMKM
-    cur.execute("""
-        SELECT id FROM umkm
-        WHERE id=%s AND user_id=%s
-    """, (umkm_id, session["user_id"]))
-
-    if not cur.fetchone():
-        cur.close()
-        db.close()
-        return redirect("/umkm/dashboard")
-
-    session["active_umkm_id"] = umkm_id
-
-    cur.close()
-    db.close()
+    if umkm_repo.get_owned(get_db(), umkm_id, session["user_id"]):
+        session["active_umkm_id"] = umkm_id
 
     return redirect("/umkm/dashboard")
 
@@ -490,29 +471,23 @@ def tambah_umkm():
 
     if request.method == "POST":
         db = get_db()
-        cur = db.cursor(dictionary=True)
-
-        cur.execute("""
-            INSERT INTO umkm (user_id, nama_umkm, alamat, kategori, created_at)
-            VALUES (%s,%s,%s,%s,%s)
-        """, (
-            session["user_id"],
-            request.form["nama_umkm"],
-            request.form["alamat"],
-            request.form["kategori"],
-            datetime.now()
-        ))
-        db.commit()
 
-        umkm_id = cur.lastrowid
+        with transaction(db) as cur:
+            umkm_id = umkm_repo.create(
+                db,
+                session["user_id"],
+                request.form["nama_umkm"],
+                request.form["alamat"],
+                request.form["kategori"],
+                datetime.now()
+            )
+            rollup.umkm_changed(cur, umkm_id, 1)
+        query_cache.invalidate("umkm")
 
         # SET UMKM AKTIF JIKA BELUM ADA
         if not session.get("active_umkm_id"):
             session["active_umkm_id"] = umkm_id
 
-        cur.close()
-        db.close()
-
         return redirect("/umkm/dashboard")
 
     return render_template("umkm/tambah_umkm.html")
@@ -523,44 +498,26 @@ def umkm_edit(id):
         return redirect("/login")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     # Pastikan UMKM milik user
-    cur.execute("""
-        SELECT * FROM umkm
-        WHERE id=%s AND user_id=%s
-    """, (id, session["user_id"]))
-    umkm = cur.fetchone()
-
+    umkm = umkm_repo.get_owned(db, id, session["user_id"])
     if not umkm:
-        cur.close()
-        db.close()
         return redirect("/umkm/dashboard")
 
     if request.method == "POST":
-        cur.execute("""
-            UPDATE umkm
-            SET nama_umkm=%s,
-                alamat=%s,
-                kategori=%s
-            WHERE id=%s
-        """, (
-            request.form["nama_umkm"],
-            request.form["alamat"],
-            request.form["kategori"],
-            id
-        ))
-        db.commit()
+        with transaction(db):
+            umkm_repo.update(
+                db, id,
+                request.form["nama_umkm"],
+                request.form["alamat"],
+                request.form["kategori"]
+            )
+        query_cache.invalidate("umkm")
 
         log_activity(session["user_id"], "edit_umkm")
 
-        cur.close()
-        db.close()
         return redirect("/umkm/dashboard")
 
-    cur.close()
-    db.close()
-
     return render_template("umkm/umkm_edit.html", umkm=umkm)
 
 @app.route("/umkm/delete/<int:id>", methods=["POST"])
@@ -569,33 +526,23 @@ def umkm_delete(id):
         return redirect("/login")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     # 1. Validasi kepemilikan UMKM
-    cur.execute("""
-        SELECT id FROM umkm
-        WHERE id=%s AND user_id=%s
-    """, (id, session["user_id"]))
-    umkm = cur.fetchone()
-
-    if not umkm:
-        cur.close()
-        db.close()
+    if not umkm_repo.get_owned(db, id, session["user_id"]):
         return redirect("/umkm/dashboard")
 
     # 2. Cek apakah masih ada produk
-    cur.execute("SELECT COUNT(*) total FROM produk WHERE umkm_id=%s", (id,))
-    if cur.fetchone()["total"] > 0:
-        cur.close()
-        db.close()
+    if umkm_repo.produk_count(db, id) > 0:
         return render_template(
             "umkm/dashboard.html",
             error="UMKM tidak bisa dihapus karena masih memiliki produk"
         )
 
     # 3. Hapus UMKM
-    cur.execute("DELETE FROM umkm WHERE id=%s", (id,))
-    db.commit()
+    with transaction(db) as cur:
+        umkm_repo.delete(db, id)
+        rollup.umkm_changed(cur, id, -1)
+    query_cache.invalidate("umkm")
 
     # 4. Log aktivitas
     log_activity(session["user_id"], "hapus_umkm")
@@ -604,9 +551,6 @@ def umkm_delete(id):
     if session.get("active_umkm_id") == id:
         session.pop("active_umkm_id")
 
-    cur.close()
-    db.close()
-
     return redirect("/umkm/dashboard")
 
 
@@ -621,35 +565,25 @@ def produk_data():
         return redirect("/umkm/dashboard")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     # ================= CREATE =================
     if request.method == "POST":
-        cur.execute("""
-            INSERT INTO produk
-            (umkm_id, nama_produk, kategori, harga, stok, deskripsi, created_at)
-            VALUES (%s,%s,%s,%s,%s,%s,%s)
-        """, (
-            active_umkm_id,
-            request.form["nama_produk"],
-            request.form["kategori"],
-            request.form["harga"],
-            request.form["stok"],
-            request.form.get("deskripsi"),
-            datetime.now()
-        ))
-        db.commit()
+        with transaction(db) as cur:
+            produk_repo.create(
+                db,
+                active_umkm_id,
+                request.form["nama_produk"],
+                request.form["kategori"],
+                request.form["harga"],
+                request.form["stok"],
+                request.form.get("deskripsi"),
+                datetime.now()
+            )
+            rollup.produk_changed(cur, active_umkm_id, 1)
+        query_cache.invalidate("produk")
 
     # ================= READ =================
-    cur.execute("""
-        SELECT * FROM produk
-        WHERE umkm_id = %s
-        ORDER BY created_at DESC
-    """, (active_umkm_id,))
-    produk = cur.fetchall()
-
-    cur.close()
-    db.close()
+    produk = produk_repo.by_umkm(db, active_umkm_id)
 
     return render_template("umkm/produk.html", produk=produk)
 
@@ -659,38 +593,23 @@ def produk_edit(id):
         return redirect("/")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
     # ================= UPDATE =================
     if request.method == "POST":
-        cur.execute("""
-            UPDATE produk SET
-                nama_produk=%s,
-                kategori=%s,
-                harga=%s,
-                stok=%s,
-                deskripsi=%s
-            WHERE id=%s
-        """, (
-            request.form["nama_produk"],
-            request.form["kategori"],
-            request.form["harga"],
-            request.form["stok"],
-            request.form.get("deskripsi"),
-            id
-        ))
-        db.commit()
-        cur.close()
-        db.close()
+        with transaction(db):
+            produk_repo.update(
+                db, id,
+                request.form["nama_produk"],
+                request.form["kategori"],
+                request.form["harga"],
+                request.form["stok"],
+                request.form.get("deskripsi")
+            )
+        query_cache.invalidate("produk")
         return redirect("/produk/data")
 
     # ================= READ =================
-    cur.execute("SELECT * FROM produk WHERE id=%s", (id,))
-    produk = cur.fetchone()
-
-    cur.close()
-    db.close()
-
+    produk = produk_repo.get(db, id)
     if not produk:
         return redirect("/produk/data")
 
@@ -701,14 +620,7 @@ def produk_delete(id):
     if session.get("role") != "umkm":
         return redirect("/")
 
-    db = get_db()
-    cur = db.cursor()
-
-    cur.execute("DELETE FROM produk WHERE id=%s", (id,))
-    db.commit()
-
-    cur.close()
-    db.close()
+    delete_produk(id)
 
     return redirect("/produk/data")
 
@@ -718,25 +630,29 @@ def penjualan_data():
     if session.get("role") != "umkm":
         return redirect("/")
 
-    if not session.get("active_umkm_id"):
+    umkm_id = session.get("active_umkm_id")
+    if not umkm_id:
         return redirect("/umkm/dashboard")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
+    filters = (
+        Filters(request.args)
+        .where("pr.umkm_id = %s", umkm_id)
+        .date_range("p.tanggal")
+        .equals("produk_id", "p.produk_id")
+    )
 
-    cur.execute("""
-        SELECT p.id, pr.nama_produk, p.tanggal, p.jumlah, p.total_harga
-        FROM penjualan p
-        JOIN produk pr ON p.produk_id = pr.id
-        WHERE pr.umkm_id = %s
-        ORDER BY p.tanggal DESC
-    """, (session["active_umkm_id"],))
+    db = get_db()
+    page = penjualan_repo.umkm_page(db, filters)
 
-    penjualan = cur.fetchall()
-    cur.close()
-    db.close()
+    if wants_json(request):
+        return jsonify(page.to_dict())
 
-    return render_template("umkm/penjualan.html", penjualan=penjualan)
+    return render_template(
+        "umkm/penjualan.html",
+        penjualan=page.items,
+        page=page,
+        produk_options=produk_repo.options(db, umkm_id)
+    )
 
 @app.route("/penjualan/tambah", methods=["GET", "POST"])
 def penjualan_tambah():
@@ -748,84 +664,91 @@ def penjualan_tambah():
         return redirect("/umkm/dashboard")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    # Ambil produk UMKM aktif
-    cur.execute("SELECT id, nama_produk, harga FROM produk WHERE umkm_id=%s", (umkm_id,))
-    produk_list = cur.fetchall()
 
     if request.method == "POST":
         produk_id = request.form["produk_id"]
         jumlah = int(request.form["jumlah"])
         tanggal = request.form["tanggal"]
 
-        cur.execute("SELECT harga FROM produk WHERE id=%s", (produk_id,))
-        harga = cur.fetchone()["harga"]
-
-        total = harga * jumlah
+        total = penjualan_repo.harga_produk(db, produk_id) * jumlah
 
-        cur.execute("""
-            INSERT INTO penjualan (produk_id, tanggal, jumlah, total_harga, created_at)
-            VALUES (%s,%s,%s,%s,%s)
-        """, (
-            produk_id, tanggal, jumlah, total, datetime.now()
-        ))
-        db.commit()
+        with transaction(db) as cur:
+            penjualan_repo.create(
+                db, produk_id, tanggal, jumlah, total, datetime.now()
+            )
+            rollup.penjualan_changed(
+                cur, umkm_id, tanggal, 1, jumlah, total, produk_id=produk_id
+            )
+        query_cache.invalidate("penjualan")
 
         log_activity(session["user_id"], "tambah_penjualan")
 
-        cur.close()
-        db.close()
-
         return redirect("/penjualan/data")
 
-    cur.close()
-    db.close()
+    # Ambil produk UMKM aktif
+    produk_list = produk_repo.options(db, umkm_id)
 
     return render_template("umkm/penjualan_tambah.html", produk_list=produk_list)
 
+@app.route("/penjualan/import", methods=["GET", "POST"])
+def penjualan_import():
+    if session.get("role") != "umkm":
+        return redirect("/")
+
+    umkm_id = session.get("active_umkm_id")
+    if not umkm_id:
+        return redirect("/umkm/dashboard")
+
+    report, error = None, None
+    if request.method == "POST":
+        # NumPy hanya dimuat saat import dipakai (lihat catatan stack ML di atas)
+        from services.import_service import InvalidImport, import_penjualan
+
+        try:
+            report = import_penjualan(
+                get_db(), umkm_id, read_import_rows(),
+                dry_run=request.form.get("dry_run") == "1"
+            )
+            log_activity(session["user_id"], "import_penjualan")
+        except InvalidImport as e:
+            error = str(e)
+
+    return render_template("umkm/penjualan_import.html", report=report, error=error)
+
 @app.route("/penjualan/edit/<int:id>", methods=["GET", "POST"])
 def penjualan_edit(id):
     if session.get("role") != "umkm":
         return redirect("/")
 
     db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    cur.execute("""
-        SELECT p.*, pr.nama_produk, pr.harga
-        FROM penjualan p
-        JOIN produk pr ON p.produk_id = pr.id
-        WHERE p.id=%s
-    """, (id,))
-    penjualan = cur.fetchone()
 
+    penjualan = penjualan_repo.detail(db, id)
     if not penjualan:
-        cur.close()
-        db.close()
         return redirect("/penjualan/data")
 
     if request.method == "POST":
         jumlah = int(request.form["jumlah"])
-        total = jumlah * penjualan["harga"]
-
-        cur.execute("""
-            UPDATE penjualan
-            SET jumlah=%s, total_harga=%s
-            WHERE id=%s
-        """, (jumlah, total, id))
-        db.commit()
 
-        log_activity(session["user_id"], "edit_penjualan")
-
-        cur.close()
-        db.close()
+        # Selisih rollup dihitung dari baris yang dikunci, bukan dari
+        # pembacaan di atas: edit bersamaan tidak menulis selisih basi
+        with transaction(db) as cur:
+            penjualan = penjualan_repo.lock(db, id)
+            if penjualan:
+                total = jumlah * penjualan.harga
+                penjualan_repo.update(db, id, jumlah, total)
+                rollup.penjualan_changed(
+                    cur, penjualan.umkm_id, penjualan.tanggal, 0,
+                    jumlah - penjualan.jumlah,
+                    total - penjualan.total_harga,
+                    produk_id=penjualan.produk_id
+                )
+
+        if penjualan:
+            query_cache.invalidate("penjualan")
+            log_activity(session["user_id"], "edit_penjualan")
 
         return redirect("/penjualan/data")
 
-    cur.close()
-    db.close()
-
     return render_template("umkm/penjualan_edit.html", penjualan=penjualan)
 
 @app.route("/penjualan/delete/<int:id>")
@@ -834,15 +757,23 @@ def penjualan_delete(id):
         return redirect("/")
 
     db = get_db()
-    cur = db.cursor()
 
-    cur.execute("DELETE FROM penjualan WHERE id=%s", (id,))
-    db.commit()
-
-    log_activity(session["user_id"], "hapus_penjualan")
+    # Dibaca dengan FOR UPDATE di dalam transaksi: link hapus yang
+    # diklik dua kali hanya mengurangi counter rollup sekali
+    with transaction(db) as cur:
+        penjualan = penjualan_repo.lock(db, id)
+        if penjualan and penjualan_repo.delete(db, id) == 1:
+            rollup.penjualan_changed(
+                cur, penjualan.umkm_id, penjualan.tanggal, -1,
+                -penjualan.jumlah, -penjualan.total_harga,
+                produk_id=penjualan.produk_id
+            )
+        else:
+            penjualan = None
 
-    cur.close()
-    db.close()
+    if penjualan:
+        query_cache.invalidate("penjualan")
+        log_activity(session["user_id"], "hapus_penjualan")
 
     return redirect("/penjualan/data")
 
@@ -852,22 +783,120 @@ def umkm_log():
     if session.get("role") != "umkm":
         return redirect("/login")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
+    filters = (
+        Filters(request.args)
+        .where("user_id = %s", session["user_id"])
+        .date_range("created_at")
+    )
+
+    page = log_repo.user_page(get_db(), filters)
+
+    if wants_json(request):
+        return jsonify(page.to_dict())
+
+    return render_template("umkm/log_aktivitas.html", logs=page.items, page=page)
+
+# ================= EXPORT =================
+# CSV/XLSX di-stream langsung dari cursor unbuffered (services/export_service.py).
+# Filter sama dengan halaman daftar; ?format=csv|xlsx, ?gzip=1 untuk CSV.
+def _export_response(name, select, filters, order):
+    fmt = request.args.get("format", "csv")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": "format harus csv atau xlsx"}), 400
+
+    chunks, mimetype, ext = export_stream(
+        select + filters.sql() + " ORDER BY " + order,
+        tuple(filters.params),
+        fmt=fmt,
+        gzip=request.args.get("gzip") == "1"
+    )
+    log_activity(session["user_id"], "export_" + name)
+
+    filename = "%s_%s.%s" % (name, datetime.now().strftime("%Y%m%d_%H%M%S"), ext)
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": 'attachment; filename="%s"' % filename,
+            # Jangan ditahan proxy (nginx) sampai selesai
+            "X-Accel-Buffering": "no",
+        }
+    )
+
+
+def _export_filters():
+    """Filter export sesuai role; None jika user tidak berhak."""
+    if session.get("role") not in ("admin", "umkm"):
+        return None
+    return Filters(request.args)
 
-    cur.execute("""
-        SELECT created_at, aktivitas, endpoint, metode_http, ip_address
-        FROM log_aktivitas_user
-        WHERE user_id = %s
-        ORDER BY created_at DESC
-    """, (session["user_id"],))
 
-    logs = cur.fetchall()
+@app.route("/export/penjualan")
+def export_penjualan():
+    filters = _export_filters()
+    if filters is None:
+        return redirect("/login")
 
-    cur.close()
-    db.close()
+    if session["role"] == "umkm":
+        if not session.get("active_umkm_id"):
+            return redirect("/umkm/dashboard")
+        filters.where("pr.umkm_id = %s", session["active_umkm_id"])
+    else:
+        filters.equals("umkm_id", "pr.umkm_id")
 
-    return render_template("umkm/log_aktivitas.html", logs=logs)
+    filters.date_range("p.tanggal").equals("produk_id", "p.produk_id")
+
+    return _export_response("penjualan", """
+        SELECT p.id, p.tanggal, u.nama_umkm, pr.nama_produk,
+               p.jumlah, p.total_harga
+        FROM penjualan p
+        JOIN produk pr ON p.produk_id = pr.id
+        JOIN umkm u ON pr.umkm_id = u.id
+    """, filters, "p.tanggal DESC, p.id DESC")
+
+
+@app.route("/export/produk")
+def export_produk():
+    filters = _export_filters()
+    if filters is None:
+        return redirect("/login")
+
+    if session["role"] == "umkm":
+        if not session.get("active_umkm_id"):
+            return redirect("/umkm/dashboard")
+        filters.where("pr.umkm_id = %s", session["active_umkm_id"])
+    else:
+        filters.equals("umkm_id", "pr.umkm_id")
+
+    filters.date_range("pr.created_at")
+
+    return _export_response("produk", """
+        SELECT pr.id, u.nama_umkm, pr.nama_produk, pr.kategori,
+               pr.harga, pr.stok, pr.created_at
+        FROM produk pr
+        JOIN umkm u ON pr.umkm_id = u.id
+    """, filters, "pr.created_at DESC, pr.id DESC")
+
+
+@app.route("/export/log-aktivitas")
+def export_log():
+    filters = _export_filters()
+    if filters is None:
+        return redirect("/login")
+
+    if session["role"] == "umkm":
+        filters.where("l.user_id = %s", session["user_id"])
+    else:
+        filters.equals("user_id", "l.user_id")
+
+    filters.date_range("l.created_at")
+
+    return _export_response("log_aktivitas", """
+        SELECT l.created_at, u.name, u.role, l.aktivitas,
+               l.endpoint, l.metode_http, l.ip_address
+        FROM log_aktivitas_user l
+        LEFT JOIN users u ON l.user_id = u.id
+    """, filters, "l.created_at DESC, l.id DESC")
 
 # ================= LSTM PREDICTION MODEL =================
 @app.route("/prediksi/penjualan", methods=["GET"])
@@ -878,157 +907,154 @@ def umkm_prediksi_penjualan():
     if not session.get("active_umkm_id"):
         return redirect("/umkm/dashboard")
 
+    # NumPy hanya dimuat saat halaman prediksi dibuka
+    from services.timeseries import dates
+
     db = get_db()
-    cur = db.cursor(dictionary=True)
 
-    # histori penjualan UMKM aktif
-    cur.execute("""
-        SELECT tanggal, SUM(jumlah) AS total
-        FROM penjualan p
-        JOIN produk pr ON p.produk_id = pr.id
-        WHERE pr.umkm_id = %s
-        GROUP BY tanggal
-        ORDER BY tanggal ASC
-    """, (session["active_umkm_id"],))
-    data = cur.fetchall()
-
-    # prediksi terakhir
-    cur.execute("""
-        SELECT hasil_prediksi, mae, rmse, tanggal_prediksi
-        FROM prediksi_penjualan
-        ORDER BY created_at DESC
-        LIMIT 1
-    """)
-    prediksi = cur.fetchone()
-
-    cur.close()
-    db.close()
+    # histori penjualan UMKM aktif: deret harian rapat yang sama dengan
+    # input training, hari tanpa penjualan tampil sebagai 0
+    series = load_sales_daily(db, session["active_umkm_id"])
+    data = [
+        {"tanggal": tanggal, "total": float(total)}
+        for tanggal, total in zip(dates(series), series.values)
+    ]
+
+    # prediksi total terakhir UMKM aktif (satu baris per tanggal_prediksi)
+    # dan prediksi terakhir tiap produknya
+    horizon = prediksi_repo.total(db, session["active_umkm_id"])
+    prediksi = horizon[0] if horizon else None
+    prediksi_produk = prediksi_repo.per_produk(db, session["active_umkm_id"])
+
+    # job training yang masih berjalan untuk UMKM ini (jika ada)
+    job = job_queue.active_for(session["active_umkm_id"])
+    if job is None and request.args.get("job"):
+        job = job_queue.get(request.args["job"])
+        if job and job.umkm_id != session["active_umkm_id"]:
+            job = None
 
     return render_template(
         "umkm/prediksi_penjualan.html",
         data=data,
-        prediksi=prediksi["hasil_prediksi"] if prediksi else 0,
-        mae=prediksi["mae"] if prediksi else "-",
-        rmse=prediksi["rmse"] if prediksi else "-",
-        tanggal_prediksi=prediksi["tanggal_prediksi"] if prediksi else "-"
+        job=job.to_dict() if job else None,
+        horizon=horizon,
+        prediksi_produk=prediksi_produk,
+        prediksi=prediksi.hasil_prediksi if prediksi else 0,
+        mae=prediksi.mae if prediksi else "-",
+        rmse=prediksi.rmse if prediksi else "-",
+        tanggal_prediksi=prediksi.tanggal_prediksi if prediksi else "-"
     )    
 
-# ================= LSTM PREDICTION MODEL =================
-def lstm_predict_sales(sales_series, n_steps=7, epochs=50):
-    """
-    sales_series: list total penjualan harian
-    """
+# ================= GENERATE PREDIKSI PENJUALAN =================
+@app.route("/prediksi/penjualan/generate", methods=["POST"])
+def generate_prediksi_penjualan():
+    if session.get("role") != "umkm":
+        return redirect("/login")
 
-    if len(sales_series) < n_steps + 1:
-        return None, None, None
+    umkm_id = session.get("active_umkm_id")
+    if not umkm_id:
+        return redirect("/umkm/dashboard")
 
-    # ===== NORMALIZATION =====
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    data = scaler.fit_transform(
-        np.array(sales_series).reshape(-1, 1)
-    )
+    # Horizon prediksi (hari), dibatasi agar model tetap wajar
+    data = request.get_json(silent=True) or request.form
+    try:
+        hari = min(max(int(data.get("hari") or 1), 1), 30)
+    except (TypeError, ValueError):
+        return jsonify({"msg": "hari harus bilangan bulat"}), 400
 
-    # ===== CREATE SEQUENCE =====
-    X, y = [], []
-    for i in range(len(data) - n_steps):
-        X.append(data[i:i+n_steps])
-        y.append(data[i+n_steps])
+    # ===== PER PRODUK: SATU QUERY, MATRIKS PRODUK x HARI =====
+    if data.get("level") == "produk":
+        produk_ids, _, matrix = load_produk_matrix(get_db(), umkm_id)
 
-    X = np.array(X)
-    y = np.array(y)
+        if matrix.shape[1] < 10:
+            return redirect("/prediksi/penjualan")
 
-    # ===== TRAIN TEST SPLIT =====
-    split = int(len(X) * 0.8)
-    X_train, X_test = X[:split], X[split:]
-    y_train, y_test = y[:split], y[split:]
+        job = job_queue.submit_produk(
+            umkm_id, session["user_id"], produk_ids, matrix, hari
+        )
+    else:
+        # ===== AMBIL DATA TIME SERIES =====
+        sales_series = load_sales_series(get_db(), umkm_id)
 
-    # ===== MODEL =====
-    model = Sequential()
-    model.add(LSTM(50, activation='relu', input_shape=(n_steps, 1)))
-    model.add(Dense(1))
-    model.compile(optimizer='adam', loss='mse')
+        if len(sales_series) < 10:
+            return redirect("/prediksi/penjualan")
 
-    model.fit(X_train, y_train, epochs=epochs, verbose=0)
+        # ===== PROSES PREDIKSI (BACKGROUND JOB) =====
+        # Engine dipilih otomatis; LSTM berjalan di process pool,
+        # satu job aktif per UMKM
+        job = job_queue.submit(umkm_id, session["user_id"], sales_series, hari)
 
-    # ===== EVALUATION =====
-    y_pred = model.predict(X_test, verbose=0)
+    log_activity(session["user_id"], "generate_prediksi_penjualan_lstm")
 
-    y_test_inv = scaler.inverse_transform(y_test)
-    y_pred_inv = scaler.inverse_transform(y_pred)
+    if request.is_json:
+        return jsonify(job.to_dict()), 202
 
-    mae = mean_absolute_error(y_test_inv, y_pred_inv)
-    rmse = sqrt(mean_squared_error(y_test_inv, y_pred_inv))
+    return redirect(url_for("umkm_prediksi_penjualan", job=job.id))
 
-    # ===== NEXT DAY PREDICTION =====
-    last_sequence = data[-n_steps:]
-    next_pred = model.predict(
-        last_sequence.reshape(1, n_steps, 1),
-        verbose=0
-    )
-    next_pred_inv = scaler.inverse_transform(next_pred)[0][0]
 
-    return float(next_pred_inv), float(mae), float(rmse)
+@app.route("/prediksi/penjualan/job/<job_id>", methods=["GET"])
+def prediksi_job_status(job_id):
+    if session.get("role") != "umkm":
+        return jsonify({"msg": "Unauthorized"}), 401
 
-# ================= GENERATE PREDIKSI PENJUALAN =================
-@app.route("/prediksi/penjualan/generate", methods=["POST"])
-def generate_prediksi_penjualan():
+    job = job_queue.get(job_id)
+    if not job or job.umkm_id != session.get("active_umkm_id"):
+        return jsonify({"msg": "Job tidak ditemukan"}), 404
+
+    return jsonify(job.to_dict())
+
+
+@app.route("/prediksi/penjualan/job/<job_id>/cancel", methods=["POST"])
+def prediksi_job_cancel(job_id):
     if session.get("role") != "umkm":
-        return redirect("/login")
+        return jsonify({"msg": "Unauthorized"}), 401
 
-    umkm_id = session.get("active_umkm_id")
-    if not umkm_id:
-        return redirect("/umkm/dashboard")
+    job = job_queue.get(job_id)
+    if not job or job.umkm_id != session.get("active_umkm_id"):
+        return jsonify({"msg": "Job tidak ditemukan"}), 404
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
+    job = job_queue.cancel(job_id)
 
-    # ===== AMBIL DATA TIME SERIES =====
-    cur.execute("""
-        SELECT tanggal, SUM(jumlah) AS total
-        FROM penjualan p
-        JOIN produk pr ON p.produk_id = pr.id
-        WHERE pr.umkm_id = %s
-        GROUP BY tanggal
-        ORDER BY tanggal ASC
-    """, (umkm_id,))
-    rows = cur.fetchall()
-
-    if len(rows) < 10:
-        cur.close()
-        db.close()
-        return redirect("/prediksi/penjualan")
-
-    sales_series = [r["total"] for r in rows]
-
-    # ===== LSTM PROCESS =====
-    hasil, mae, rmse = lstm_predict_sales(sales_series)
-
-    if hasil is None:
-        cur.close()
-        db.close()
-        return redirect("/prediksi/penjualan")
-
-    # ===== SIMPAN KE DATABASE =====
-    cur.execute("""
-        INSERT INTO prediksi_penjualan
-        (produk_id, tanggal_prediksi, hasil_prediksi, mae, rmse, created_at)
-        VALUES (%s,%s,%s,%s,%s,%s)
-    """, (
-        None,
-        datetime.now().date(),
-        hasil,
-        mae,
-        rmse,
-        datetime.now()
-    ))
-    db.commit()
+    return jsonify(job.to_dict())
 
-    log_activity(session["user_id"], "generate_prediksi_penjualan_lstm")
 
-    cur.close()
-    db.close()
+@app.route("/prediksi/penjualan/riwayat", methods=["GET"])
+def prediksi_riwayat():
+    """
+    Tren MAE/RMSE per run prediksi (lama ke baru) untuk grafik.
+
+    Query: produk_id (kosong = prediksi total UMKM), limit (maks. 365).
+    Admin memilih UMKM lewat umkm_id.
+    """
+    if session.get("role") == "admin":
+        umkm_id = request.args.get("umkm_id", type=int)
+    elif session.get("role") == "umkm":
+        umkm_id = session.get("active_umkm_id")
+    else:
+        return jsonify({"msg": "Unauthorized"}), 401
+
+    if not umkm_id:
+        return jsonify({"msg": "umkm_id wajib diisi"}), 400
 
-    return redirect("/prediksi/penjualan")
+    produk_id = request.args.get("produk_id", type=int)
+    limit = min(max(request.args.get("limit", 90, type=int), 1), 365)
+
+    # Index (umkm_id, produk_id, created_at): baca mundur, berhenti di limit
+    rows = prediksi_repo.riwayat(get_db(), umkm_id, produk_id, limit)
+
+    return jsonify({
+        "umkm_id": umkm_id,
+        "produk_id": produk_id,
+        "data": [
+            {
+                "created_at": r.created_at.isoformat(),
+                "mae": float(r.mae) if r.mae is not None else None,
+                "rmse": float(r.rmse) if r.rmse is not None else None,
+                "horizon": r.horizon,
+            }
+            for r in reversed(rows)
+        ]
+    })
 
 
 # ================= REKOMENDASI PRODUK =================
@@ -1040,22 +1066,7 @@ def umkm_rekomendasi_produk():
     if not session.get("active_umkm_id"):
         return redirect("/umkm/dashboard")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    cur.execute("""
-        SELECT r.created_at, p.nama_produk,
-               r.rekomendasi, r.alasan
-        FROM rekomendasi_produk r
-        JOIN produk p ON r.produk_id = p.id
-        WHERE p.umkm_id = %s
-        ORDER BY r.created_at DESC
-    """, (session["active_umkm_id"],))
-
-    rekomendasi = cur.fetchall()
-
-    cur.close()
-    db.close()
+    rekomendasi = rekomendasi_repo.by_umkm(get_db(), session["active_umkm_id"])
 
     return render_template(
         "umkm/rekomendasi_produk.html",
@@ -1071,51 +1082,12 @@ def generate_rekomendasi_produk():
     if not umkm_id:
         return redirect("/umkm/dashboard")
 
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    # Ambil data produk + penjualan 30 hari
-    cur.execute("""
-        SELECT p.id, p.nama_produk, p.stok,
-               IFNULL(SUM(j.jumlah), 0) AS total_jual
-        FROM produk p
-        LEFT JOIN penjualan j
-            ON p.id = j.produk_id
-            AND j.tanggal >= DATE_SUB(CURDATE(), INTERVAL 30 DAY)
-        WHERE p.umkm_id = %s
-        GROUP BY p.id
-    """, (umkm_id,))
-    produk_list = cur.fetchall()
-
-    for p in produk_list:
-        rekomendasi = ""
-        alasan = ""
-
-        if p["total_jual"] >= 50 and p["stok"] < 20:
-            rekomendasi = "Tambah Stok"
-            alasan = "Produk sangat laku dan stok mulai menipis"
-
-        elif p["total_jual"] >= 50:
-            rekomendasi = "Pertahankan Stok"
-            alasan = "Produk laris dan stabil"
-
-        elif p["total_jual"] < 10:
-            rekomendasi = "Promosikan Produk"
-            alasan = "Penjualan rendah dalam 30 hari terakhir"
-
-        else:
-            rekomendasi = "Evaluasi Produk"
-            alasan = "Performa penjualan sedang"
-
-        cur.execute("""
-            INSERT INTO rekomendasi_produk
-            (produk_id, rekomendasi, alasan, created_at)
-            VALUES (%s, %s, %s, NOW())
-        """, (p["id"], rekomendasi, alasan))
+    # Aturan dievaluasi vektor di services/rekomendasi_service.py (NumPy,
+    # dimuat saat dipakai); satu SELECT fitur + satu bulk INSERT
+    from services.rekomendasi_service import generate
 
-    db.commit()
-    cur.close()
-    db.close()
+    generate(get_db(), umkm_id)
+    log_activity(session["user_id"], "generate_rekomendasi")
 
     return redirect("/rekomendasi/produk")
 
@@ -1124,24 +1096,12 @@ def generate_rekomendasi_produk():
 @app.route("/dashboard", methods=["GET"])
 @jwt_required()
 def dashboard_api():
-    user = get_jwt_identity()
-
-    db = get_db()
-    cur = db.cursor(dictionary=True)
-
-    cur.execute("SELECT COUNT(*) total FROM produk")
-    total_produk = cur.fetchone()["total"]
-
-    cur.execute("SELECT SUM(total_harga) omzet FROM penjualan")
-    omzet = cur.fetchone()["omzet"] or 0
-
-    cur.close()
-    db.close()
+    statistik = statistik_repo.ringkasan(get_db())
 
     return jsonify({
-        "role": user["role"],
-        "total_produk": total_produk,
-        "total_omzet": float(omzet)
+        "role": get_jwt().get("role"),
+        "total_produk": statistik.total_produk,
+        "total_omzet": float(statistik.total_omzet)
     })
 
 # ================= RUN =================
@@ -0,0 +1,447 @@
+"""
+Load test route Flask di app.py dengan data dari benchmarks/seed.py.
+
+Setiap virtual user (thread) login sebagai satu user UMKM benchmark,
+memilih UMKM-nya, lalu mengulang skenario campuran: dashboard, CRUD
+produk/penjualan, halaman dan generate prediksi, generate rekomendasi.
+Satu virtual user tambahan menjadi admin dan membuka halaman monitoring.
+
+Mode:
+- default     : in-process lewat app.test_client(), tanpa server HTTP
+                (mengukur aplikasi + DB saja)
+- --base-url  : HTTP ke server yang sudah jalan (mis. gunicorn), diukur
+                dari sisi klien
+
+Laporan per route: jumlah request, error, throughput, rata-rata dan
+p50/p95/p99 (ms). Hasil disimpan sebagai JSON (--json). --compare
+membandingkan p95 dengan hasil sebelumnya dan keluar dengan kode 1 bila
+ada route yang melambat lebih dari --threshold.
+
+    python -m benchmarks.seed --reset
+    python -m benchmarks.load_test --concurrency 8 --duration 60 \\
+        --json hasil/bench-$(git rev-parse --short HEAD).json \\
+        --compare hasil/bench-main.json
+"""
+import argparse
+import http.cookiejar
+import json
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+
+import numpy as np
+
+from benchmarks.seed import ADMIN_EMAIL, BENCH_PASSWORD, user_email
+from database.pool import get_pool
+
+LOGIN_PATHS = ("/", "/login")
+
+
+# ================= KLIEN =================
+class InProcessClient:
+    """Klien WSGI langsung ke objek app (cookie session per klien)."""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def request(self, method, path, data=None, json_body=None):
+        response = self._client.open(path, method=method, data=data, json=json_body)
+        status = response.status_code
+        location = response.headers.get("Location", "")
+        response.close()
+        return status, location
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpClient:
+    """Klien HTTP dengan cookie jar sendiri; redirect tidak diikuti."""
+
+    def __init__(self, base_url, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _NoRedirect()
+        )
+
+    def request(self, method, path, data=None, json_body=None):
+        headers = {}
+        body = None
+        if json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        elif data is not None:
+            body = urllib.parse.urlencode(data).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        req = urllib.request.Request(
+            self.base_url + path, data=body, headers=headers, method=method
+        )
+        try:
+            with self._opener.open(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status, response.headers.get("Location", "")
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, e.headers.get("Location", "")
+
+
+# ================= FIXTURE =================
+def load_fixtures(users):
+    """[(email, umkm_id, [produk_id, ...])] untuk user UMKM benchmark."""
+    emails = [user_email(n) for n in range(1, users + 1)]
+    db = get_pool().connection()
+    try:
+        cur = db.cursor()
+        cur.execute("""
+            SELECT u.email, um.id, MIN(p.id), MAX(p.id)
+            FROM users u
+            JOIN umkm um ON um.user_id = u.id
+            JOIN produk p ON p.umkm_id = um.id
+            WHERE u.email IN (%s)
+            GROUP BY u.email, um.id
+        """ % ", ".join(["%s"] * len(emails)), emails)
+        rows = cur.fetchall()
+        cur.close()
+    finally:
+        db.close()
+
+    # Satu UMKM per user; produk benchmark punya id berurutan per UMKM
+    fixtures = {}
+    for email, umkm_id, lo, hi in rows:
+        fixtures.setdefault(email, (email, umkm_id, list(range(lo, hi + 1))))
+    if not fixtures:
+        raise SystemExit("Data benchmark tidak ada; jalankan python -m benchmarks.seed")
+    return list(fixtures.values())
+
+
+def _lookup(sql, params):
+    db = get_pool().connection()
+    try:
+        cur = db.cursor()
+        cur.execute(sql, params)
+        row = cur.fetchone()
+        cur.close()
+    finally:
+        db.close()
+    return row[0] if row else None
+
+
+# ================= VIRTUAL USER =================
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, route, seconds, ok):
+        with self._lock:
+            self.samples[route].append(seconds)
+            if not ok:
+                self.errors[route] += 1
+
+
+class VirtualUser:
+    def __init__(self, client, recorder, rng):
+        self.client = client
+        self.recorder = recorder
+        self.rng = rng
+
+    def call(self, route, method, path, expect=(200,), data=None, json_body=None):
+        started = time.perf_counter()
+        try:
+            status, location = self.client.request(method, path, data, json_body)
+            # Redirect ke "/" atau /login berarti session/role hilang
+            ok = status in expect and urllib.parse.urlsplit(location).path not in LOGIN_PATHS
+        except Exception:
+            status, ok = None, False
+        self.recorder.add(route, time.perf_counter() - started, ok)
+        return status
+
+    def login(self, email):
+        return self.call("login", "POST", "/login",
+                         expect=(302,), data={"email": email, "password": BENCH_PASSWORD})
+
+
+class UmkmUser(VirtualUser):
+    def __init__(self, client, recorder, rng, fixture, prediksi=True):
+        super().__init__(client, recorder, rng)
+        self.email, self.umkm_id, self.produk_ids = fixture
+        self.prediksi = prediksi
+
+    def setup(self):
+        self.login(self.email)
+        self.call("umkm_select", "GET", "/umkm/select/%d" % self.umkm_id, expect=(302,))
+
+    # ----- langkah -----
+    def dashboard(self):
+        self.call("umkm_dashboard", "GET", "/umkm/dashboard")
+
+    def produk_list(self):
+        self.call("produk_list", "GET", "/produk/data")
+
+    def produk_crud(self):
+        nama = "bench-lt-%s" % uuid.uuid4().hex[:12]
+        form = {"nama_produk": nama, "kategori": "Makanan", "harga": "15000",
+                "stok": "10", "deskripsi": "load test"}
+        self.call("produk_create", "POST", "/produk/data", data=form)
+
+        produk_id = _lookup(
+            "SELECT id FROM produk WHERE umkm_id = %s AND nama_produk = %s",
+            (self.umkm_id, nama)
+        )
+        if produk_id is None:
+            return
+        form["harga"] = "17500"
+        self.call("produk_edit", "POST", "/produk/edit/%d" % produk_id,
+                  expect=(302,), data=form)
+        self.call("produk_delete", "GET", "/produk/delete/%d" % produk_id, expect=(302,))
+
+    def penjualan_list(self):
+        self.call("penjualan_list", "GET", "/penjualan/data")
+
+    def penjualan_crud(self):
+        produk_id = self.rng.choice(self.produk_ids)
+        self.call("penjualan_tambah", "POST", "/penjualan/tambah", expect=(302,), data={
+            "produk_id": str(produk_id),
+            "jumlah": str(self.rng.randint(1, 5)),
+            "tanggal": date.today().isoformat(),
+        })
+
+        penjualan_id = _lookup(
+            "SELECT MAX(id) FROM penjualan WHERE produk_id = %s", (produk_id,)
+        )
+        if penjualan_id is None:
+            return
+        self.call("penjualan_edit", "POST", "/penjualan/edit/%d" % penjualan_id,
+                  expect=(302,), data={"jumlah": "3"})
+        self.call("penjualan_delete", "GET", "/penjualan/delete/%d" % penjualan_id,
+                  expect=(302,))
+
+    def prediksi_page(self):
+        self.call("prediksi_page", "GET", "/prediksi/penjualan")
+
+    def prediksi_generate(self):
+        if self.prediksi:
+            self.call("prediksi_generate", "POST", "/prediksi/penjualan/generate",
+                      expect=(202,), json_body={"hari": 7})
+
+    def rekomendasi_generate(self):
+        self.call("rekomendasi_generate", "POST", "/rekomendasi/produk/generate",
+                  expect=(302,))
+
+    STEPS = [
+        (dashboard, 20),
+        (produk_list, 15),
+        (produk_crud, 5),
+        (penjualan_list, 15),
+        (penjualan_crud, 15),
+        (prediksi_page, 10),
+        (prediksi_generate, 2),
+        (rekomendasi_generate, 3),
+    ]
+
+    def step(self):
+        steps, weights = zip(*self.STEPS)
+        self.rng.choices(steps, weights)[0](self)
+
+
+class AdminUser(VirtualUser):
+    PAGES = [
+        ("admin_dashboard", "/admin/dashboard"),
+        ("admin_umkm", "/admin/umkm"),
+        ("admin_produk", "/admin/produk"),
+        ("admin_penjualan", "/admin/penjualan"),
+        ("admin_prediksi", "/admin/prediksi"),
+        ("admin_log", "/admin/log-aktivitas"),
+    ]
+
+    def setup(self):
+        self.login(ADMIN_EMAIL)
+
+    def step(self):
+        route, path = self.rng.choice(self.PAGES)
+        self.call(route, "GET", path)
+
+
+# ================= RUNNER =================
+def run(make_client, fixtures, concurrency=8, duration=30, iterations=0,
+        admin=True, prediksi=True, seed=42):
+    recorder = Recorder()
+    users = [
+        UmkmUser(make_client(), recorder, random.Random(seed + i),
+                 fixtures[i % len(fixtures)], prediksi)
+        for i in range(concurrency)
+    ]
+    if admin:
+        users.append(AdminUser(make_client(), recorder, random.Random(seed - 1)))
+
+    ready = threading.Barrier(len(users) + 1)
+    go = threading.Event()
+    deadline = [0.0]
+
+    def target(user):
+        user.setup()
+        ready.wait()
+        go.wait()
+        done = 0
+        while time.monotonic() < deadline[0] and (not iterations or done < iterations):
+            user.step()
+            done += 1
+
+    threads = [threading.Thread(target=target, args=(u,), daemon=True) for u in users]
+    for t in threads:
+        t.start()
+
+    # Login/setup tidak ikut diukur sebagai beban
+    ready.wait()
+    recorder.samples.clear()
+    recorder.errors.clear()
+    started = time.monotonic()
+    deadline[0] = started + duration if duration else float("inf")
+    go.set()
+
+    for t in threads:
+        t.join()
+    return recorder, time.monotonic() - started
+
+
+def summarize(recorder, elapsed):
+    routes = {}
+    for route, samples in sorted(recorder.samples.items()):
+        ms = np.array(samples) * 1000
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        routes[route] = {
+            "requests": len(samples),
+            "errors": recorder.errors.get(route, 0),
+            "rps": round(len(samples) / elapsed, 2),
+            "mean_ms": round(float(ms.mean()), 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(float(ms.max()), 2),
+        }
+
+    total = sum(r["requests"] for r in routes.values())
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(r["errors"] for r in routes.values()),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+def compare(current, baseline, threshold):
+    """[(route, p95 lama, p95 baru, rasio)] untuk route yang melambat."""
+    slower = []
+    for route, r in current["routes"].items():
+        old = baseline["routes"].get(route)
+        if not old or not old["p95_ms"]:
+            continue
+        ratio = r["p95_ms"] / old["p95_ms"]
+        if ratio > 1 + threshold:
+            slower.append((route, old["p95_ms"], r["p95_ms"], round(ratio, 2)))
+    return slower
+
+
+def _git_rev():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_report(summary):
+    print("%-22s %8s %6s %8s %9s %9s %9s %9s" % (
+        "route", "req", "error", "req/s", "mean", "p50", "p95", "p99"))
+    for route, r in summary["routes"].items():
+        print("%-22s %8d %6d %8.1f %9.1f %9.1f %9.1f %9.1f" % (
+            route, r["requests"], r["errors"], r["rps"],
+            r["mean_ms"], r["p50_ms"], r["p95_ms"], r["p99_ms"]))
+    print("total: %(requests)d request, %(errors)d error, %(rps).1f req/s "
+          "dalam %(elapsed_s).1f detik" % summary)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test route app.py")
+    parser.add_argument("--base-url", help="uji server HTTP yang sudah jalan")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="detik")
+    parser.add_argument("--iterations", type=int, default=0,
+                        help="langkah per virtual user (0 = sampai durasi habis)")
+    parser.add_argument("--users", type=int, default=50,
+                        help="jumlah user UMKM hasil seed yang boleh dipakai")
+    parser.add_argument("--no-admin", action="store_true")
+    parser.add_argument("--no-prediksi", action="store_true",
+                        help="lewati generate prediksi (training model)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    parser.add_argument("--compare", help="JSON hasil sebelumnya")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="batas kenaikan p95 (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    if not args.duration and not args.iterations:
+        parser.error("--duration atau --iterations harus lebih dari 0")
+
+    fixtures = load_fixtures(args.users)
+
+    if args.base_url:
+        def make_client():
+            return HttpClient(args.base_url)
+    else:
+        from app import app
+
+        def make_client():
+            return InProcessClient(app)
+
+    recorder, elapsed = run(
+        make_client, fixtures, concurrency=args.concurrency,
+        duration=args.duration, iterations=args.iterations,
+        admin=not args.no_admin, prediksi=not args.no_prediksi, seed=args.seed
+    )
+
+    summary = summarize(recorder, elapsed)
+    summary["meta"] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git": _git_rev(),
+        "mode": "http" if args.base_url else "in-process",
+        "base_url": args.base_url,
+        "python": platform.python_version(),
+        "args": vars(args),
+    }
+    print_report(summary)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            slower = compare(summary, json.load(f), args.threshold)
+        for route, old, new, ratio in slower:
+            print("LEBIH LAMBAT %-20s p95 %.1f -> %.1f ms (x%.2f)" % (route, old, new, ratio))
+        if slower:
+            sys.exit(1)
+
+    return summary
+
+
+if __name__ == "__main__":
+    main()
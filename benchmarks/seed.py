@@ -0,0 +1,271 @@
+"""
+Data sintetis untuk benchmark dan load test.
+
+Mengisi database MySQL/MariaDB (Config.DB_*) dengan user, UMKM, produk,
+penjualan harian bertahun-tahun dan log aktivitas. Hasilnya sama persis
+untuk --seed yang sama. Query aplikasi memakai sintaks khusus MySQL
+(ON DUPLICATE KEY, DATE_FORMAT, ...), sehingga pengganti seperti SQLite
+tidak bisa dipakai. Gunakan database MySQL/MariaDB lokal yang terpisah.
+
+Semua data benchmark dikenali dari email user:
+- bench-admin@umkm.test (admin)
+- bench<N>@umkm.test     (UMKM), N = 1..--users
+dengan password BENCH_PASSWORD. --reset menghapus data benchmark
+sebelumnya (hanya milik user di atas) sebelum mengisi ulang.
+
+Penjualan dibangkitkan per UMKM per hari: jumlah transaksi ~ Poisson
+(--sales-per-day) dengan pola mingguan, produk dipilih dengan popularitas
+Zipf sehingga rekomendasi dan co-occurrence punya sinyal. Setelah
+selesai, tabel rollup (statistik_* dan penjualan_harian) dibangun ulang.
+Skema harus sudah lengkap (python -m database.migrate upgrade).
+
+    python -m benchmarks.seed --users 50 --umkm-per-user 2 --produk 30 \\
+        --years 3 --sales-per-day 6 --logs 200000 --reset
+"""
+import argparse
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from werkzeug.security import generate_password_hash
+
+from database.pool import get_pool
+from services import rollup_service
+
+BENCH_PASSWORD = "bench123"
+ADMIN_EMAIL = "bench-admin@umkm.test"
+EMAIL = "bench%d@umkm.test"
+
+KATEGORI = ["Makanan", "Minuman", "Fashion", "Kerajinan", "Jasa", "Pertanian"]
+AKTIVITAS = [
+    ("login", "/login", "POST"),
+    ("tambah_penjualan", "/penjualan/tambah", "POST"),
+    ("edit_penjualan", "/penjualan/edit", "POST"),
+    ("generate_prediksi_penjualan_lstm", "/prediksi/penjualan/generate", "POST"),
+    ("generate_rekomendasi", "/rekomendasi/produk/generate", "POST"),
+]
+
+
+def user_email(n):
+    return EMAIL % n
+
+
+def _insert(cur, sql, rows, batch):
+    for start in range(0, len(rows), batch):
+        cur.executemany(sql, rows[start:start + batch])
+
+
+def _bench_user_ids(cur):
+    cur.execute(
+        "SELECT id FROM users WHERE email = %s OR email LIKE %s",
+        (ADMIN_EMAIL, "bench%@umkm.test")
+    )
+    return [r[0] for r in cur.fetchall()]
+
+
+def _in(ids):
+    return ", ".join(["%s"] * len(ids))
+
+
+# ================= RESET =================
+def reset(db):
+    """Hapus data benchmark lama (urut anak -> induk)."""
+    cur = db.cursor()
+    users = _bench_user_ids(cur)
+    if not users:
+        cur.close()
+        return 0
+
+    cur.execute("SELECT id FROM umkm WHERE user_id IN (%s)" % _in(users), users)
+    umkm = [r[0] for r in cur.fetchall()]
+    if umkm:
+        sub = "SELECT id FROM produk WHERE umkm_id IN (%s)" % _in(umkm)
+        cur.execute("DELETE FROM penjualan WHERE produk_id IN (%s)" % sub, umkm)
+        cur.execute("DELETE FROM rekomendasi_produk WHERE produk_id IN (%s)" % sub, umkm)
+        cur.execute("DELETE FROM prediksi_penjualan WHERE umkm_id IN (%s)" % _in(umkm), umkm)
+        cur.execute("DELETE FROM prediksi_terakhir WHERE umkm_id IN (%s)" % _in(umkm), umkm)
+        cur.execute("DELETE FROM produk WHERE umkm_id IN (%s)" % _in(umkm), umkm)
+        cur.execute("DELETE FROM umkm WHERE id IN (%s)" % _in(umkm), umkm)
+
+    cur.execute("DELETE FROM log_aktivitas_user WHERE user_id IN (%s)" % _in(users), users)
+    cur.execute("DELETE FROM users WHERE id IN (%s)" % _in(users), users)
+    db.commit()
+    cur.close()
+    return len(users)
+
+
+# ================= SEED =================
+def seed(db, users=50, umkm_per_user=2, produk=30, years=3, sales_per_day=6,
+         logs=100000, seed=42, batch=5000, progress=print):
+    rng = np.random.default_rng(seed)
+    now = datetime.now()
+    end = date.today()
+    start = end - timedelta(days=int(years * 365) - 1)
+    days = (end - start).days + 1
+    started = time.monotonic()
+    cur = db.cursor()
+
+    # ===== USERS =====
+    # Satu hash dipakai semua user: generate_password_hash sengaja lambat
+    password = generate_password_hash(BENCH_PASSWORD)
+    rows = [("Bench Admin", ADMIN_EMAIL, password, "admin", now)]
+    rows += [("Bench UMKM %d" % n, user_email(n), password, "umkm", now)
+             for n in range(1, users + 1)]
+    _insert(cur, """
+        INSERT INTO users (name, email, password, role, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """, rows, batch)
+    db.commit()
+
+    cur.execute(
+        "SELECT id FROM users WHERE email LIKE %s AND role = 'umkm' ORDER BY id",
+        ("bench%@umkm.test",)
+    )
+    user_ids = [r[0] for r in cur.fetchall()]
+    progress("users: %d" % (len(user_ids) + 1))
+
+    # ===== UMKM =====
+    rows = [
+        (uid, "UMKM Bench %d-%d" % (uid, k), "Jl. Benchmark No. %d" % k,
+         KATEGORI[int(rng.integers(len(KATEGORI)))], now)
+        for uid in user_ids for k in range(1, umkm_per_user + 1)
+    ]
+    _insert(cur, """
+        INSERT INTO umkm (user_id, nama_umkm, alamat, kategori, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """, rows, batch)
+    db.commit()
+
+    cur.execute("SELECT id FROM umkm WHERE user_id IN (%s) ORDER BY id" % _in(user_ids), user_ids)
+    umkm_ids = [r[0] for r in cur.fetchall()]
+    progress("umkm: %d" % len(umkm_ids))
+
+    # ===== PRODUK =====
+    rows = []
+    for uid in umkm_ids:
+        harga = rng.integers(5, 500, size=produk) * 1000
+        stok = rng.integers(0, 200, size=produk)
+        for k in range(produk):
+            rows.append((uid, "Produk %d-%d" % (uid, k + 1),
+                         KATEGORI[k % len(KATEGORI)], int(harga[k]), int(stok[k]),
+                         "Produk sintetis benchmark", now))
+    _insert(cur, """
+        INSERT INTO produk
+        (umkm_id, nama_produk, kategori, harga, stok, deskripsi, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, rows, batch)
+    db.commit()
+
+    cur.execute(
+        "SELECT umkm_id, id, harga FROM produk WHERE umkm_id IN (%s) ORDER BY umkm_id, id"
+        % _in(umkm_ids), umkm_ids
+    )
+    katalog = {}
+    for umkm_id, pid, harga in cur.fetchall():
+        katalog.setdefault(umkm_id, []).append((pid, float(harga)))
+    progress("produk: %d" % sum(len(v) for v in katalog.values()))
+
+    # ===== PENJUALAN =====
+    weekday = (np.arange(days) + start.weekday()) % 7
+    pola = np.where(weekday >= 5, 1.4, 1.0)  # akhir pekan lebih ramai
+    total = 0
+    insert_penjualan = """
+        INSERT INTO penjualan (produk_id, tanggal, jumlah, total_harga, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    for umkm_id in umkm_ids:
+        items = katalog[umkm_id]
+        pids = np.array([p for p, _ in items])
+        harga = np.array([h for _, h in items])
+        popularitas = 1.0 / np.arange(1, len(items) + 1) ** 1.1
+        popularitas /= popularitas.sum()
+
+        per_day = rng.poisson(sales_per_day * pola)
+        hari = np.repeat(np.arange(days), per_day)
+        pilih = rng.choice(len(items), size=len(hari), p=popularitas)
+        jumlah = rng.integers(1, 6, size=len(hari))
+
+        rows = [
+            (int(pids[p]), start + timedelta(days=int(d)), int(j),
+             float(harga[p] * j), now)
+            for d, p, j in zip(hari, pilih, jumlah)
+        ]
+        _insert(cur, insert_penjualan, rows, batch)
+        db.commit()
+        total += len(rows)
+    progress("penjualan: %d (%d hari)" % (total, days))
+
+    # ===== LOG AKTIVITAS =====
+    if logs:
+        detik = int(days * 86400)
+        offsets = np.sort(rng.integers(0, detik, size=logs))
+        pelaku = rng.choice(user_ids, size=logs)
+        jenis = rng.integers(len(AKTIVITAS), size=logs)
+        mulai = datetime.combine(start, datetime.min.time())
+        rows = [
+            (int(u), AKTIVITAS[k][0], AKTIVITAS[k][1], AKTIVITAS[k][2],
+             "10.0.%d.%d" % (u % 256, k), mulai + timedelta(seconds=int(s)))
+            for u, k, s in zip(pelaku, jenis, offsets)
+        ]
+        _insert(cur, """
+            INSERT INTO log_aktivitas_user
+            (user_id, aktivitas, endpoint, metode_http, ip_address, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, rows, batch)
+        db.commit()
+        progress("log aktivitas: %d" % logs)
+
+    cur.close()
+
+    # Counter dashboard dan agregat harian konsisten dengan data baru
+    rollup_service.rebuild(db)
+    progress("rollup dibangun ulang")
+
+    return {
+        "users": len(user_ids),
+        "umkm": len(umkm_ids),
+        "produk": sum(len(v) for v in katalog.values()),
+        "penjualan": total,
+        "log_aktivitas": logs,
+        "hari": days,
+        "detik": round(time.monotonic() - started, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Data sintetis benchmark")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--umkm-per-user", type=int, default=2)
+    parser.add_argument("--produk", type=int, default=30, help="produk per UMKM")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--sales-per-day", type=float, default=6,
+                        help="rata-rata transaksi per UMKM per hari")
+    parser.add_argument("--logs", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--reset", action="store_true",
+                        help="hapus data benchmark lama lebih dulu")
+    args = parser.parse_args(argv)
+
+    db = get_pool().connection()
+    try:
+        if args.reset:
+            print("dihapus: %d user benchmark lama" % reset(db))
+        summary = seed(
+            db, users=args.users, umkm_per_user=args.umkm_per_user,
+            produk=args.produk, years=args.years,
+            sales_per_day=args.sales_per_day, logs=args.logs,
+            seed=args.seed, batch=args.batch
+        )
+    finally:
+        db.close()
+
+    print(
+        "Selesai: %(users)d user, %(umkm)d UMKM, %(produk)d produk, "
+        "%(penjualan)d penjualan, %(detik).1f detik" % summary
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark waktu startup dan RSS worker web.
+
+Setiap skenario dijalankan di interpreter baru (subprocess) agar cache
+import tidak saling memengaruhi:
+
+- app        : `import app` (stack ML lazy, kondisi sekarang)
+- app+ml     : `import app` lalu stack ML yang dulu di-import di top-level
+               app.py (numpy, pandas, sklearn, tensorflow.keras)
+
+Jalankan dari root repo:
+
+    python -m benchmarks.startup_bench --repeat 5 --json hasil.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ML_IMPORTS = """
+import numpy, pandas
+from sklearn.preprocessing import MinMaxScaler
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import LSTM, Dense
+"""
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+{extra}
+elapsed = time.perf_counter() - t0
+rss = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss = int(line.split()[1]) // 1024
+ml = [m for m in ("tensorflow", "sklearn", "pandas", "numpy") if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss, "ml_loaded": ml}}))
+"""
+
+SCENARIOS = {
+    "app": "",
+    "app+ml": ML_IMPORTS,
+}
+
+
+def run_once(extra):
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3")
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(extra=extra)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, extra in SCENARIOS.items():
+        runs = [run_once(extra) for _ in range(args.repeat)]
+        results[name] = {
+            "seconds_median": statistics.median(r["seconds"] for r in runs),
+            "rss_mb_median": statistics.median(r["rss_mb"] for r in runs),
+            "ml_loaded": runs[-1]["ml_loaded"],
+            "runs": runs,
+        }
+
+    print("%-8s %12s %10s  %s" % ("skenario", "startup (s)", "RSS (MB)", "modul ML"))
+    for name, r in results.items():
+        print("%-8s %12.3f %10d  %s" % (
+            name, r["seconds_median"], r["rss_mb_median"],
+            ", ".join(r["ml_loaded"]) or "-"
+        ))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Micro-benchmark pembentukan window: loop append (cara lama di
+lstm_predict_sales) vs sliding_window_view.
+
+    python -m benchmarks.windowing_bench --days 1095 --umkm 200
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from services.windowing import sliding_windows, stack_series, batch_windows
+
+
+def loop_windows(data, n_steps):
+    X, y = [], []
+    for i in range(len(data) - n_steps):
+        X.append(data[i:i+n_steps])
+        y.append(data[i+n_steps])
+    return np.array(X), np.array(y)
+
+
+def bench(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print("%-34s %10.3f ms" % (label, seconds * 1000))
+    return seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sliding window")
+    parser.add_argument("--days", type=int, default=365 * 3)
+    parser.add_argument("--umkm", type=int, default=200)
+    parser.add_argument("--n-steps", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    data = rng.random((args.days, 1))
+    series_list = [rng.random(rng.integers(args.days // 2, args.days))
+                   for _ in range(args.umkm)]
+
+    print("1 deret, %d hari:" % args.days)
+    old = bench("  loop append + np.array", lambda: loop_windows(data, args.n_steps), 20)
+    new = bench("  sliding_windows (view)", lambda: sliding_windows(data, args.n_steps), 20)
+    print("  speedup: %.1fx" % (old / new))
+
+    print("%d UMKM, hingga %d hari:" % (args.umkm, args.days))
+    old = bench("  loop per UMKM + concatenate", lambda: np.concatenate(
+        [loop_windows(s.reshape(-1, 1), args.n_steps)[0] for s in series_list]
+    ), 1)
+
+    def batched():
+        matrix, lengths = stack_series(series_list)
+        return batch_windows(matrix, args.n_steps, lengths)
+
+    new = bench("  stack_series + batch_windows", batched, 1)
+    print("  speedup: %.1fx" % (old / new))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,3 +6,83 @@ class Config:
     DB_USER = "root"
     DB_PASSWORD = ""
     DB_NAME = "umkm_smart"
+
+    # ===== CONNECTION POOL =====
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 3600))
+    DB_POOL_PING_IDLE = int(os.environ.get("DB_POOL_PING_IDLE", 30))
+
+    # ===== DATA ACCESS =====
+    # Prepared statement yang disimpan per koneksi (LRU); 0 = nonaktif
+    DB_STATEMENT_CACHE = int(os.environ.get("DB_STATEMENT_CACHE", 64))
+
+    # ===== ACTIVITY LOG =====
+    LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+    LOG_BATCH_SIZE = int(os.environ.get("LOG_BATCH_SIZE", 200))
+    LOG_FLUSH_INTERVAL = float(os.environ.get("LOG_FLUSH_INTERVAL", 1.0))
+    LOG_QUEUE_POLICY = os.environ.get("LOG_QUEUE_POLICY", "drop")
+    # Jeda (detik) sebelum batch yang gagal ditulis dicoba sekali lagi
+    LOG_RETRY_BACKOFF = float(os.environ.get("LOG_RETRY_BACKOFF", 0.5))
+
+    # ===== PREDIKSI JOB QUEUE =====
+    PREDIKSI_WORKERS = int(os.environ.get("PREDIKSI_WORKERS", 2))
+    # Detik status job selesai disimpan / batas umur job aktif
+    PREDIKSI_JOB_RETENTION = int(os.environ.get("PREDIKSI_JOB_RETENTION", 3600))
+    PREDIKSI_JOB_TIMEOUT = int(os.environ.get("PREDIKSI_JOB_TIMEOUT", 3600))
+
+    # ===== MODEL CACHE =====
+    MODEL_CACHE_DIR = os.environ.get(
+        "MODEL_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "model_cache")
+    )
+    MODEL_CACHE_MAX_MB = int(os.environ.get("MODEL_CACHE_MAX_MB", 512))
+    MODEL_WARM_START_MAX_NEW = int(os.environ.get("MODEL_WARM_START_MAX_NEW", 30))
+
+    # ===== FORECASTER =====
+    FORECAST_LSTM_MIN_DAYS = int(os.environ.get("FORECAST_LSTM_MIN_DAYS", 60))
+    FORECAST_BASELINE_MAX_ERROR = float(os.environ.get("FORECAST_BASELINE_MAX_ERROR", 0.15))
+    # LSTM harus menurunkan MAE backtest baseline minimal sebesar ini
+    FORECAST_LSTM_MIN_GAIN = float(os.environ.get("FORECAST_LSTM_MIN_GAIN", 0.1))
+
+    # ===== QUERY CACHE (halaman monitoring admin) =====
+    QUERY_CACHE_ENABLED = os.environ.get("QUERY_CACHE_ENABLED", "1") == "1"
+    QUERY_CACHE_BACKEND = os.environ.get("QUERY_CACHE_BACKEND", "local")
+    QUERY_CACHE_REDIS_URL = os.environ.get("QUERY_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    QUERY_CACHE_MAX_ENTRIES = int(os.environ.get("QUERY_CACHE_MAX_ENTRIES", 1024))
+    QUERY_CACHE_TTL = int(os.environ.get("QUERY_CACHE_TTL", 60))
+    # Generasi tabel backend local, dibagi antar worker di host yang sama
+    # ("" = hanya di memori proses)
+    QUERY_CACHE_GEN_DIR = os.environ.get(
+        "QUERY_CACHE_GEN_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "query_cache")
+    )
+
+    # ===== REKOMENDASI PRODUK =====
+    REKOMENDASI_WINDOW_HARI = int(os.environ.get("REKOMENDASI_WINDOW_HARI", 30))
+    REKOMENDASI_LARIS = int(os.environ.get("REKOMENDASI_LARIS", 50))
+    REKOMENDASI_STOK_TIPIS = int(os.environ.get("REKOMENDASI_STOK_TIPIS", 20))
+    REKOMENDASI_SEPI = int(os.environ.get("REKOMENDASI_SEPI", 10))
+
+    # ===== CO-OCCURRENCE PRODUK =====
+    COOCCURRENCE_DIR = os.environ.get(
+        "COOCCURRENCE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "cooccurrence")
+    )
+    COOCCURRENCE_TOP_K = int(os.environ.get("COOCCURRENCE_TOP_K", 20))
+
+    # ===== PROFILING REQUEST =====
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "1") == "1"
+    PROFILING_SERVER_TIMING = os.environ.get("PROFILING_SERVER_TIMING", "1") == "1"
+    PROFILING_SLOW_REQUEST_MS = float(os.environ.get("PROFILING_SLOW_REQUEST_MS", 500))
+    PROFILING_SLOW_QUERY_MS = float(os.environ.get("PROFILING_SLOW_QUERY_MS", 100))
+    PROFILING_LOG = os.environ.get(
+        "PROFILING_LOG",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "slow.log")
+    )
+
+    # ===== METRIK PROMETHEUS =====
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+    METRICS_REFRESH_SECONDS = float(os.environ.get("METRICS_REFRESH_SECONDS", 5))
+    # Jika diisi, /metrics butuh header "Authorization: Bearer <token>"
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
@@ -1,11 +1,38 @@
-from flask import Blueprint, render_template, request
-from services.prediksi_service import prediksi
+from flask import Blueprint, redirect, render_template, request, session
+from database.pool import get_db
+from services.prediksi_service import prediksi, load_sales_series
 
 prediksi_bp = Blueprint("prediksi", __name__)
 
 @prediksi_bp.route("/prediksi", methods=["GET","POST"])
 def index():
+    if session.get("role") != "umkm":
+        return redirect("/login")
+    if not session.get("active_umkm_id"):
+        return redirect("/umkm/dashboard")
+
     hasil = None
+    error = None
     if request.method == "POST":
-        hasil = prediksi(int(request.form["hari"]))
-    return render_template("prediksi/index.html", hasil=hasil)
+        # Horizon 1-30 hari seperti /prediksi/penjualan/generate; seluruh
+        # vektor prediksi didapat dari satu panggilan engine
+        try:
+            hari = min(max(int(request.form.get("hari") or 1), 1), 30)
+        except (TypeError, ValueError):
+            return render_template(
+                "prediksi/index.html", hasil=None,
+                error="hari harus bilangan bulat"
+            ), 400
+
+        sales_series = load_sales_series(get_db(), session["active_umkm_id"])
+        try:
+            hasil = prediksi(
+                hari,
+                sales_series,
+                engine=request.form.get("engine", "auto")
+            )
+        except ValueError as e:
+            return render_template("prediksi/index.html", hasil=None, error=str(e)), 400
+        if hasil is None:
+            error = "Data penjualan belum cukup untuk prediksi"
+    return render_template("prediksi/index.html", hasil=hasil, error=error)
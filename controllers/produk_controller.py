@@ -12,8 +12,8 @@ def list_produk():
 def detail_produk(produk_id):
     return get_produk_by_id(produk_id)
 
-def store_produk(data):
-    return create_produk(data)
+def store_produk(data, umkm_id):
+    return create_produk(data, umkm_id)
 
 def edit_produk(produk_id, data):
     return update_produk(produk_id, data)
@@ -1,3 +1,287 @@
-from flask_sqlalchemy import SQLAlchemy
+"""
+Lapisan akses data (repository) di atas pool koneksi.
 
-db = SQLAlchemy()
+- get_connection() : koneksi untuk request/proses saat ini
+- transaction(db)  : scope transaksi eksplisit (commit / rollback)
+- record()         : kelas baris hasil query ber-__slots__
+- Projection       : kolom yang boleh dipilih klien API (?fields=)
+- Repository       : basis repository per tabel di models/
+
+Query dijalankan sebagai prepared statement server-side yang di-cache per
+koneksi pool (PooledConnection.prepared): MySQL mem-parse teks SQL sekali
+per koneksi dan parameter dikirim dalam format biner. Baris dibaca sebagai
+tuple lalu dibungkus record, tanpa satu dict per baris seperti
+cursor(dictionary=True). Template tetap bisa memakai row.kolom maupun
+row["kolom"].
+"""
+import sys
+from contextlib import contextmanager
+from itertools import starmap
+
+from config import Config
+from database.pool import get_db
+from services.pagination import keyset_page
+
+
+def get_connection():
+    """Koneksi pool; terikat ke request bila dipanggil di app context."""
+    return get_db()
+
+
+# ================= TRANSAKSI =================
+@contextmanager
+def transaction(db):
+    """
+    Scope transaksi:
+
+        with transaction(db) as cur:
+            produk.create(db, ...)
+            rollup.produk_changed(cur, umkm_id, 1)
+
+    Commit di akhir blok terluar, rollback bila blok melempar exception.
+    Blok bersarang ikut transaksi luar (tidak ada savepoint). cur adalah
+    cursor biasa untuk statement ad-hoc di dalam transaksi yang sama.
+    """
+    depth = getattr(db, "tx_depth", 0)
+    db.tx_depth = depth + 1
+    cur = db.cursor()
+    try:
+        yield cur
+        if depth == 0:
+            db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        cur.close()
+        db.tx_depth = depth
+
+
+# ================= RECORD =================
+class Record:
+    """Basis baris hasil query; subclass dibuat dengan record()."""
+
+    __slots__ = ()
+    fields = ()
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except (AttributeError, TypeError):
+            raise KeyError(name)
+
+    def get(self, name, default=None):
+        return getattr(self, name, default)
+
+    def keys(self):
+        return self.fields
+
+    def values(self):
+        return tuple(getattr(self, f) for f in self.fields)
+
+    def _asdict(self):
+        return {f: getattr(self, f) for f in self.fields}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.values() == other.values()
+
+    def __hash__(self):
+        return hash(self.values())
+
+    def __reduce__(self):
+        # Pickle ringkas untuk backend redis di services/query_cache.py
+        return type(self), self.values()
+
+    def __repr__(self):
+        return "%s(%s)" % (type(self).__name__, ", ".join(
+            "%s=%r" % (f, getattr(self, f)) for f in self.fields
+        ))
+
+
+def record(name, fields):
+    """
+    Kelas record dengan kolom fields (urut sama dengan SELECT):
+
+        Produk = record("Produk", "id umkm_id nama_produk harga")
+        Produk(*row).nama_produk
+    """
+    if isinstance(fields, str):
+        fields = fields.replace(",", " ").split()
+    fields = tuple(fields)
+
+    # __init__ dibangkitkan seperti dataclasses: satu assignment per slot
+    ns = {}
+    exec("def __init__(self, %s):\n    %s" % (
+        ", ".join(fields),
+        "\n    ".join("self.%s = %s" % (f, f) for f in fields) or "pass"
+    ), ns)
+
+    cls = type(name, (Record,), {
+        "__slots__": fields,
+        "fields": fields,
+        "__init__": ns["__init__"],
+    })
+    # Agar bisa di-pickle: modul pemanggil, bukan database.db
+    cls.__module__ = sys._getframe(1).f_globals.get("__name__", __name__)
+    return cls
+
+
+# ================= PROJECTION =================
+class InvalidFields(ValueError):
+    """?fields= berisi kolom yang tidak dikenal (dijawab 400)."""
+
+
+class Projection:
+    """
+    Kolom query yang boleh dipilih klien API lewat ?fields=:
+
+        API = Projection({
+            "id": "pr.id",
+            "nama_produk": "pr.nama_produk",
+            "harga": "pr.harga",
+        }, "FROM produk pr", keys=[("pr.id", "id")])
+
+    Hanya kolom yang diminta yang masuk SELECT. Kolom kunci keyset selalu
+    ikut agar cursor halaman bisa dibentuk. Urutan kolom mengikuti
+    definisi, bukan urutan di query string, sehingga teks SQL (dan
+    prepared statement-nya) sama untuk kombinasi kolom yang sama.
+    """
+
+    def __init__(self, columns, from_sql, keys=(), order=None):
+        self.columns = dict(columns)
+        self.from_sql = from_sql
+        self.keys = list(keys)
+        self.order = order or ", ".join("%s DESC" % expr for expr, _ in self.keys)
+        self._required = {name for _, name in self.keys}
+        self._rows = {}
+
+    def fields(self, raw=None):
+        """Tuple nama kolom dari nilai ?fields= (kosong = semua kolom)."""
+        if not raw:
+            return tuple(self.columns)
+        wanted = {f.strip() for f in raw.split(",")} - {""}
+        unknown = wanted.difference(self.columns)
+        if unknown:
+            raise InvalidFields("field tidak dikenal: %s (pilihan: %s)" % (
+                ", ".join(sorted(unknown)), ", ".join(self.columns)
+            ))
+        wanted |= self._required
+        return tuple(f for f in self.columns if f in wanted)
+
+    def select(self, fields):
+        return "SELECT %s %s" % (
+            ", ".join(self.columns[f] for f in fields), self.from_sql
+        )
+
+    def query(self, fields, filters):
+        """(sql, params) seluruh hasil terurut, untuk dibaca streaming."""
+        sql = self.select(fields) + filters.sql()
+        if self.order:
+            sql += " ORDER BY " + self.order
+        return sql, tuple(filters.params)
+
+    def row(self, fields):
+        """Kelas record untuk kombinasi kolom ini (di-cache)."""
+        cls = self._rows.get(fields)
+        if cls is None:
+            cls = self._rows.setdefault(fields, record("Row", fields))
+        return cls
+
+
+# ================= STATEMENT =================
+@contextmanager
+def _statement(db, sql, prepared=True):
+    """(sql, cursor): prepared dari cache koneksi, atau cursor biasa."""
+    cached = getattr(db, "prepared", None)
+    if prepared and cached is not None and Config.DB_STATEMENT_CACHE > 0:
+        yield cached(sql)
+        return
+
+    cur = db.cursor()
+    try:
+        yield sql, cur
+    finally:
+        cur.close()
+
+
+class _RecordCursor:
+    """Cursor minimal (execute/fetchall) untuk services.pagination."""
+
+    def __init__(self, repo, db, row):
+        self._repo = repo
+        self._db = db
+        self._row = row
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self._rows = self._repo._all(self._db, sql, params, self._row)
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+# ================= REPOSITORY =================
+class Repository:
+    """
+    Basis repository. Method publik subclass menerima db (koneksi dari
+    get_connection()) sebagai argumen pertama sehingga repository tidak
+    menyimpan state dan dapat dipakai sebagai singleton modul.
+
+    prepared=False untuk SQL yang bentuknya berubah-ubah (mis. IN dengan
+    jumlah parameter berbeda) agar tidak memenuhi cache statement.
+    """
+
+    def _all(self, db, sql, params=(), row=None, prepared=True):
+        with _statement(db, sql, prepared) as (sql, cur):
+            cur.execute(sql, tuple(params))
+            # Prepared cursor tidak di-buffer: hasil selalu dibaca habis
+            rows = cur.fetchall()
+        return list(starmap(row, rows)) if row is not None else rows
+
+    def _one(self, db, sql, params=(), row=None, prepared=True):
+        rows = self._all(db, sql, params, row, prepared)
+        return rows[0] if rows else None
+
+    def _scalar(self, db, sql, params=(), prepared=True):
+        rows = self._all(db, sql, params, None, prepared)
+        return rows[0][0] if rows else None
+
+    def _execute(self, db, sql, params=(), prepared=True):
+        """(lastrowid, rowcount) dari INSERT/UPDATE/DELETE."""
+        with _statement(db, sql, prepared) as (sql, cur):
+            cur.execute(sql, tuple(params))
+            return cur.lastrowid, cur.rowcount
+
+    def _execute_many(self, db, sql, seq_params):
+        # Cursor biasa: connector menulis ulang INSERT jadi satu multi-row
+        with _statement(db, sql, prepared=False) as (sql, cur):
+            cur.executemany(sql, [tuple(p) for p in seq_params])
+            return cur.rowcount
+
+    def _page(self, db, select, keys, filters, row, **kwargs):
+        """services.pagination.keyset_page dengan baris berupa record."""
+        return keyset_page(
+            _RecordCursor(self, db, row), select, keys, filters, **kwargs
+        )
+
+    # ----- projection (API) -----
+    def project_page(self, db, projection, fields, filters, **kwargs):
+        """Satu halaman keyset berisi kolom fields saja."""
+        return self._page(
+            db, projection.select(fields), projection.keys, filters,
+            projection.row(fields), **kwargs
+        )
+
+    def project_all(self, db, projection, fields, filters):
+        sql, params = projection.query(fields, filters)
+        return self._all(db, sql, params, projection.row(fields))
+
+    def project_one(self, db, projection, fields, filters):
+        return self._one(
+            db, projection.select(fields) + filters.sql(), filters.params,
+            projection.row(fields)
+        )
@@ -0,0 +1,331 @@
+"""
+Migrasi skema berversi.
+
+Setiap file database/migrations/NNNN_nama.py berisi fungsi up(db) dan
+dijalankan sekali, urut menurut nomor versi. Versi yang sudah jalan
+dicatat di tabel schema_migrations.
+
+    python -m database.migrate status     # daftar migrasi + statusnya
+    python -m database.migrate upgrade    # jalankan yang belum
+    python -m database.migrate explain    # EXPLAIN query app.py dan models/
+
+DDL MySQL auto-commit, jadi helper seperti create_index() mengecek
+information_schema lebih dulu agar migrasi yang terputus aman diulang.
+"""
+import argparse
+import ast
+import importlib
+import os
+import re
+import sys
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BASE_DIR)
+MIGRATIONS_DIR = os.path.join(BASE_DIR, "migrations")
+APP_PATH = os.path.join(ROOT_DIR, "app.py")
+MODELS_DIR = os.path.join(ROOT_DIR, "models")
+
+_NAME = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+
+# ================= HELPER UNTUK MIGRASI =================
+def index_exists(cur, table, name):
+    cur.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (table, name))
+    return cur.fetchone() is not None
+
+
+def column_exists(cur, table, column):
+    cur.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    """, (table, column))
+    return cur.fetchone() is not None
+
+
+def create_index(cur, table, name, columns, unique=False):
+    if index_exists(cur, table, name):
+        return False
+    cur.execute("CREATE %sINDEX %s ON %s (%s)" % (
+        "UNIQUE " if unique else "", name, table, ", ".join(columns)
+    ))
+    return True
+
+
+def add_column(cur, table, column, definition):
+    if column_exists(cur, table, column):
+        return False
+    cur.execute("ALTER TABLE %s ADD COLUMN %s %s" % (table, column, definition))
+    return True
+
+
+# ================= RUNNER =================
+def discover():
+    """[(versi, nama, modul)] urut menurut versi."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        m = _NAME.match(filename)
+        if m:
+            migrations.append((m.group(1), m.group(2), filename[:-3]))
+    versions = [v for v, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("Nomor versi migrasi ganda: %s" % versions)
+    return migrations
+
+
+def ensure_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version CHAR(4) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            applied_at DATETIME NOT NULL
+        )
+    """)
+
+
+def applied_versions(cur):
+    ensure_table(cur)
+    cur.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cur.fetchall()}
+
+
+def upgrade(db, target=None, progress=print):
+    cur = db.cursor()
+    done = applied_versions(cur)
+    db.commit()  # akhiri transaksi baca; migrasi boleh membuka transaksinya sendiri
+    ran = []
+
+    for version, name, module in discover():
+        if version in done:
+            continue
+        if target and version > target:
+            break
+
+        progress("Menjalankan %s_%s ..." % (version, name))
+        migration = importlib.import_module("database.migrations." + module)
+        migration.up(db)
+
+        cur.execute(
+            "INSERT INTO schema_migrations (version, name, applied_at) VALUES (%s, %s, %s)",
+            (version, name, datetime.now())
+        )
+        db.commit()
+        ran.append(version)
+
+    cur.close()
+    return ran
+
+
+def status(db):
+    cur = db.cursor()
+    done = applied_versions(cur)
+    cur.close()
+    return [(v, n, v in done) for v, n, _ in discover()]
+
+
+# ================= EXPLAIN =================
+def _const_str(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _is_query(sql):
+    words = sql.split(None, 1)
+    return bool(words) and words[0].upper() in ("SELECT", "UPDATE", "DELETE")
+
+
+def _page_sql(sql, order):
+    """SELECT halaman keyset seperti yang dibentuk services.pagination."""
+    return "%s ORDER BY %s LIMIT 51" % (
+        sql.rstrip(), ", ".join("%s DESC" % o for o in order if o)
+    )
+
+
+def collect_app_queries(path=APP_PATH):
+    """
+    Query SQL literal di app.py: [("app.py:baris", sql)].
+
+    Mengambil argumen pertama cur.execute("...") dan SELECT dasar dari
+    keyset_page(cur, "...", keys, ...) (dilengkapi ORDER BY sesuai keys).
+    Query yang dibentuk dinamis (f-string, format) dilewati.
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+
+    queries = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or not node.args:
+            continue
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+
+        if name == "execute":
+            sql = _const_str(node.args[0])
+        elif name == "keyset_page" and len(node.args) >= 3:
+            sql = _const_str(node.args[1])
+            keys = node.args[2]
+            if sql and isinstance(keys, ast.List):
+                order = [_const_str(k.elts[0]) for k in keys.elts if isinstance(k, ast.Tuple)]
+                sql = _page_sql(sql, order)
+        else:
+            continue
+
+        if sql and _is_query(sql):
+            queries.append((node.lineno, " ".join(sql.split())))
+
+    name = os.path.basename(path)
+    return [("%s:%d" % (name, lineno), sql) for lineno, sql in sorted(queries)]
+
+
+def _page_keys(tree, cls):
+    """
+    {nama konstanta SELECT: [kolom urut]} dari panggilan
+    self._page(db, self.SELECT_X, keys, ...) di kelas repository cls;
+    keys berupa self.KEYS atau list literal [("kolom", "nama"), ...].
+    """
+    found = {}
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.ClassDef) and node.name == cls.__name__):
+            continue
+        for call in ast.walk(node):
+            if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                    and call.func.attr == "_page" and len(call.args) >= 3):
+                continue
+            select, keys = call.args[1], call.args[2]
+            if not isinstance(select, ast.Attribute):
+                continue
+            if isinstance(keys, ast.Attribute):
+                order = [expr for expr, _ in getattr(cls, keys.attr, ())]
+            elif isinstance(keys, ast.List):
+                order = [_const_str(k.elts[0]) for k in keys.elts if isinstance(k, ast.Tuple)]
+            else:
+                continue
+            found[select.attr] = order
+    return found
+
+
+def collect_model_queries(models_dir=MODELS_DIR):
+    """
+    Query repository di models/: [("models/x.py Kelas.NAMA", sql)].
+
+    Konstanta SQL kelas Repository (SELECT/UPDATE/DELETE; SELECT halaman
+    dilengkapi ORDER BY dari keys-nya) dan query lengkap setiap
+    Projection API dengan semua kolom.
+    """
+    from database.db import Projection, Repository
+    from services.pagination import Filters
+
+    queries = []
+    for filename in sorted(os.listdir(models_dir)):
+        if not filename.endswith(".py") or filename.startswith("_"):
+            continue
+        module = importlib.import_module("models." + filename[:-3])
+        with open(os.path.join(models_dir, filename)) as f:
+            tree = ast.parse(f.read(), filename)
+
+        for cls in vars(module).values():
+            if not (isinstance(cls, type) and issubclass(cls, Repository)
+                    and cls.__module__ == module.__name__):
+                continue
+            pages = _page_keys(tree, cls)
+
+            for name, value in vars(cls).items():
+                where = "models/%s %s.%s" % (filename, cls.__name__, name)
+                if isinstance(value, Projection):
+                    sql, _ = value.query(tuple(value.columns), Filters({}))
+                    if value.keys:
+                        sql += " LIMIT 51"
+                elif isinstance(value, str) and _is_query(value) and "{" not in value:
+                    sql = _page_sql(value, pages[name]) if name in pages else value
+                else:
+                    continue
+                queries.append((where, " ".join(sql.split())))
+
+    return queries
+
+
+def collect_queries():
+    """Semua query yang diperiksa explain: app.py lalu models/."""
+    return collect_app_queries() + collect_model_queries()
+
+
+def explain(db, queries, min_rows=0):
+    """
+    Jalankan EXPLAIN untuk setiap query. Placeholder %s diganti 1.
+
+    Mengembalikan [(lokasi, sql, tabel, rows)] untuk akses type=ALL
+    (full table scan) dengan estimasi rows >= min_rows.
+    """
+    cur = db.cursor(dictionary=True)
+    flagged, errors = [], []
+
+    for where, sql in queries:
+        try:
+            cur.execute("EXPLAIN " + sql.replace("%s", "1"))
+            plan = cur.fetchall()
+        except Exception as e:
+            errors.append((where, sql, str(e)))
+            continue
+
+        for row in plan:
+            if row.get("type") == "ALL" and (row.get("rows") or 0) >= min_rows:
+                flagged.append((where, sql, row.get("table"), row.get("rows")))
+
+    cur.close()
+    return flagged, errors
+
+
+# ================= CLI =================
+def main(argv=None):
+    from database.pool import get_pool
+
+    parser = argparse.ArgumentParser(description="Migrasi skema database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status")
+    up = sub.add_parser("upgrade")
+    up.add_argument("--target", help="berhenti setelah versi ini (mis. 0002)")
+    ex = sub.add_parser("explain")
+    ex.add_argument("--min-rows", type=int, default=0,
+                    help="abaikan full scan dengan estimasi rows di bawah ini")
+    args = parser.parse_args(argv)
+
+    db = get_pool().connection()
+    try:
+        if args.command == "status":
+            for version, name, applied in status(db):
+                print("%s  %-40s %s" % (version, name, "sudah" if applied else "BELUM"))
+
+        elif args.command == "upgrade":
+            ran = upgrade(db, target=args.target)
+            print("%d migrasi dijalankan" % len(ran))
+
+        elif args.command == "explain":
+            queries = collect_queries()
+            if not queries:
+                # Collector yang tidak menemukan apa pun berarti gate mati
+                print("Tidak ada query yang ditemukan untuk di-EXPLAIN")
+                sys.exit(1)
+            flagged, errors = explain(db, queries, min_rows=args.min_rows)
+
+            for where, sql, error in errors:
+                print("%s  GAGAL EXPLAIN: %s\n    %s" % (where, error, sql[:160]))
+            for where, sql, table, rows in flagged:
+                print("%s  FULL SCAN %s (rows~%s)\n    %s" % (where, table, rows, sql[:160]))
+
+            print("%d query diperiksa, %d full scan, %d gagal" % (
+                len(queries), len(flagged), len(errors)
+            ))
+            if flagged:
+                sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""Tabel ringkasan dashboard (statistik_global/umkm/harian) + isi awal."""
+from services import rollup_service
+
+
+def up(db):
+    # rebuild() membuat tabel bila belum ada lalu mengisinya dari data
+    # mentah dalam satu transaksi
+    rollup_service.rebuild(db)
@@ -0,0 +1,30 @@
+"""Index untuk filter dan urutan yang dipakai query utama di app.py."""
+from database.migrate import create_index
+
+INDEXES = [
+    # Window 30 hari rekomendasi, deret prediksi, penjualan_data per produk
+    ("penjualan", "idx_penjualan_produk_tanggal", ("produk_id", "tanggal")),
+    # Keyset (tanggal, id) di admin_penjualan
+    ("penjualan", "idx_penjualan_tanggal", ("tanggal",)),
+
+    ("produk", "idx_produk_umkm_created", ("umkm_id", "created_at")),
+    ("produk", "idx_produk_created", ("created_at",)),
+
+    # umkm_log (per user) dan admin_log / dashboard (global)
+    ("log_aktivitas_user", "idx_log_user_created", ("user_id", "created_at")),
+    ("log_aktivitas_user", "idx_log_created", ("created_at",)),
+
+    # Login / register, keyset admin_users
+    ("users", "idx_users_email", ("email",)),
+    ("users", "idx_users_created", ("created_at",)),
+
+    ("prediksi_penjualan", "idx_prediksi_created", ("created_at",)),
+    ("prediksi_penjualan", "idx_prediksi_produk_created", ("produk_id", "created_at")),
+]
+
+
+def up(db):
+    cur = db.cursor()
+    for table, name, columns in INDEXES:
+        create_index(cur, table, name, columns)
+    cur.close()
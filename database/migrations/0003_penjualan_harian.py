@@ -0,0 +1,13 @@
+"""Agregat harian per produk (penjualan_harian) + isi awal dari penjualan."""
+from services import rollup_service
+
+
+def up(db):
+    cur = db.cursor()
+    rollup_service.ensure_schema(cur)
+
+    db.start_transaction()
+    cur.execute("DELETE FROM penjualan_harian")
+    cur.execute(rollup_service.FILL_PENJUALAN_HARIAN)
+    db.commit()
+    cur.close()
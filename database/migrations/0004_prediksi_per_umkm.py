@@ -0,0 +1,43 @@
+"""
+prediksi_penjualan.umkm_id + pointer prediksi terakhir per UMKM/produk.
+
+Baris prediksi per produk diisi umkm_id dari produknya. Baris total
+UMKM lama (produk_id NULL) tidak menyimpan UMKM asalnya sehingga
+dibiarkan NULL dan tidak lagi tampil di halaman UMKM mana pun.
+"""
+from database.migrate import add_column, create_index
+
+
+def up(db):
+    cur = db.cursor()
+    add_column(cur, "prediksi_penjualan", "umkm_id", "INT NULL")
+    create_index(cur, "prediksi_penjualan", "idx_prediksi_umkm_produk_created",
+                 ("umkm_id", "produk_id", "created_at"))
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS prediksi_terakhir (
+            umkm_id INT NOT NULL,
+            produk_id INT NOT NULL DEFAULT 0,
+            created_at DATETIME NOT NULL,
+            PRIMARY KEY (umkm_id, produk_id),
+            KEY idx_prediksi_terakhir_created (created_at)
+        )
+    """)
+
+    db.start_transaction()
+    cur.execute("""
+        UPDATE prediksi_penjualan pp
+        JOIN produk pr ON pp.produk_id = pr.id
+        SET pp.umkm_id = pr.umkm_id
+        WHERE pp.umkm_id IS NULL
+    """)
+    cur.execute("DELETE FROM prediksi_terakhir")
+    cur.execute("""
+        INSERT INTO prediksi_terakhir (umkm_id, produk_id, created_at)
+        SELECT umkm_id, IFNULL(produk_id, 0), MAX(created_at)
+        FROM prediksi_penjualan
+        WHERE umkm_id IS NOT NULL
+        GROUP BY umkm_id, IFNULL(produk_id, 0)
+    """)
+    db.commit()
+    cur.close()
@@ -0,0 +1,32 @@
+"""
+Status job prediksi di MySQL (services/prediksi_job.py).
+
+Semua worker gunicorn membaca job yang sama, dan UNIQUE
+(active_umkm_id, level) menjadi kunci "satu job aktif per UMKM per
+level": active_umkm_id berisi umkm_id selama job antre/berjalan dan
+NULL setelah selesai (NULL boleh ganda di index UNIQUE).
+"""
+
+
+def up(db):
+    cur = db.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS prediksi_job (
+            id CHAR(32) PRIMARY KEY,
+            umkm_id INT NOT NULL,
+            user_id INT NULL,
+            level VARCHAR(10) NOT NULL,
+            horizon INT NOT NULL DEFAULT 1,
+            status VARCHAR(10) NOT NULL,
+            result LONGTEXT NULL,
+            error TEXT NULL,
+            cancel_requested TINYINT(1) NOT NULL DEFAULT 0,
+            active_umkm_id INT NULL,
+            created_at DATETIME NOT NULL,
+            finished_at DATETIME NULL,
+            UNIQUE KEY uq_prediksi_job_active (active_umkm_id, level),
+            KEY idx_prediksi_job_umkm (umkm_id, created_at),
+            KEY idx_prediksi_job_finished (finished_at)
+        )
+    """)
+    cur.close()
@@ -0,0 +1,355 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+import mysql.connector
+from flask import g, has_app_context
+
+from config import Config
+
+
+class PoolTimeout(Exception):
+    """Tidak ada koneksi yang bisa dipinjam sebelum batas waktu checkout."""
+
+
+# ================= CONNECTION WRAPPER =================
+class _Slot:
+    """Koneksi MySQL fisik milik pool beserta cache statement-nya."""
+
+    __slots__ = ("raw", "created_at", "last_used", "statements")
+
+    def __init__(self, raw, created_at):
+        self.raw = raw
+        self.created_at = created_at
+        self.last_used = created_at
+        # sql -> (sql, cursor prepared), lihat PooledConnection.prepared()
+        self.statements = OrderedDict()
+
+
+class PooledConnection:
+    """
+    Handle satu kali peminjaman koneksi dari pool.
+
+    Semua atribut diteruskan ke koneksi asli, kecuali close():
+    koneksi dikembalikan ke pool, bukan ditutup. Untuk handle yang
+    terikat request (lewat g), close() dari route diabaikan dan koneksi
+    baru dikembalikan saat teardown.
+
+    Setiap connection() membuat handle baru untuk koneksi fisik yang
+    sama. Setelah dikembalikan, handle lama terlepas dari koneksinya:
+    close()/release() berikutnya tidak berbuat apa-apa, sehingga pemegang
+    handle basi tidak bisa mengembalikan koneksi yang sedang dipakai
+    peminjam lain.
+    """
+
+    # Fungsi cursor -> cursor; dipasang oleh services/profiler.py
+    cursor_hook = None
+
+    def __init__(self, pool, slot):
+        self._pool = pool
+        self._slot = slot
+        self.request_scoped = False
+        # Kedalaman database.db.transaction() yang sedang terbuka
+        self.tx_depth = 0
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+    @property
+    def raw(self):
+        slot = self._slot
+        if slot is None:
+            raise RuntimeError("Koneksi sudah dikembalikan ke pool")
+        return slot.raw
+
+    @property
+    def released(self):
+        return self._slot is None
+
+    @property
+    def created_at(self):
+        return self._slot.created_at
+
+    @property
+    def statements(self):
+        return self._slot.statements
+
+    def cursor(self, *args, **kwargs):
+        cur = self.raw.cursor(*args, **kwargs)
+        hook = PooledConnection.cursor_hook
+        return hook(cur) if hook else cur
+
+    def prepared(self, sql):
+        """
+        (sql, cursor) prepared server-side untuk teks SQL ini.
+
+        MySQL hanya mem-parse statement sekali per koneksi: cursor prepared
+        menyiapkan ulang statement bila objek string SQL berbeda, jadi
+        eksekusi harus memakai objek sql yang dikembalikan di sini. Cache
+        LRU sebesar Config.DB_STATEMENT_CACHE per koneksi fisik (bertahan
+        antar peminjaman); statement yang terbuang di-DEALLOCATE saat
+        cursornya ditutup.
+        """
+        statements = self.statements
+        entry = statements.get(sql)
+        if entry is None:
+            entry = (sql, self.raw.cursor(prepared=True))
+            statements[sql] = entry
+            if len(statements) > Config.DB_STATEMENT_CACHE:
+                _, (_, old) = statements.popitem(last=False)
+                try:
+                    old.close()
+                except Exception:
+                    pass
+        else:
+            statements.move_to_end(sql)
+
+        hook = PooledConnection.cursor_hook
+        return entry[0], hook(entry[1]) if hook else entry[1]
+
+    def close(self):
+        if self.request_scoped or self._slot is None:
+            return
+        self.release()
+
+    def release(self):
+        if self._slot is None:
+            return
+        self._pool._put(self)
+
+
+# ================= POOL =================
+class ConnectionPool:
+    """
+    Pool koneksi MySQL thread-safe.
+
+    - size         : jumlah koneksi maksimum yang boleh terbuka
+    - timeout      : detik menunggu koneksi bebas sebelum PoolTimeout
+    - recycle      : umur maksimum koneksi (detik) sebelum dibuat ulang
+    - ping_idle    : koneksi yang menganggur lebih lama dari ini di-ping
+                     saat dipinjam (0 = selalu ping)
+    """
+
+    def __init__(self, size=10, timeout=5, recycle=3600, ping_idle=30,
+                 **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_idle = ping_idle
+        self.connect_args = connect_args
+
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._opened = 0
+        self._in_use = 0
+        self._waiting = 0
+
+        # ===== METRICS =====
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._broken = 0
+        self._max_in_use = 0
+        self._wait_total = 0.0
+
+    # ----- internal -----
+    def _connect(self):
+        raw = mysql.connector.connect(**self.connect_args)
+        with self._cond:
+            self._created += 1
+        return _Slot(raw, time.monotonic())
+
+    def _discard(self, slot):
+        # Prepared statement ikut hilang bersama koneksinya di server
+        slot.statements.clear()
+        try:
+            slot.raw.close()
+        except Exception:
+            pass
+        slot.raw = None
+
+    def _is_healthy(self, slot):
+        now = time.monotonic()
+        if self.recycle and now - slot.created_at > self.recycle:
+            with self._cond:
+                self._recycled += 1
+            return False
+        if now - slot.last_used >= self.ping_idle:
+            try:
+                slot.raw.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._broken += 1
+                return False
+        return True
+
+    def _put(self, conn):
+        # Lepaskan handle dari koneksinya di bawah lock: close()/release()
+        # kedua (atau dari thread lain) berhenti di sini dan tidak
+        # mengurangi _in_use lagi
+        with self._cond:
+            slot = conn._slot
+            if slot is None:
+                return
+            conn._slot = None
+
+        healthy = True
+        try:
+            # Jangan wariskan transaksi yang belum selesai ke peminjam berikutnya
+            if slot.raw.in_transaction:
+                slot.raw.rollback()
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy:
+                slot.last_used = time.monotonic()
+                self._idle.append(slot)
+            else:
+                self._opened -= 1
+                self._broken += 1
+            self._cond.notify()
+
+        if not healthy:
+            self._discard(slot)
+
+    # ----- public -----
+    def connection(self):
+        """
+        Pinjam satu koneksi: handle baru setiap kali; panggil
+        close()/release() untuk mengembalikan.
+        """
+        deadline = time.monotonic() + self.timeout
+        started = time.monotonic()
+
+        while True:
+            slot = None
+            open_new = False
+
+            with self._cond:
+                while not self._idle and self._opened >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            "Pool koneksi penuh (%d koneksi dipakai)" % self._in_use
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    # LIFO: koneksi yang paling baru dipakai masih hangat
+                    slot = self._idle.pop()
+                else:
+                    self._opened += 1
+                    open_new = True
+
+                self._in_use += 1
+
+            if open_new:
+                try:
+                    slot = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opened -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(slot):
+                self._discard(slot)
+                with self._cond:
+                    self._opened -= 1
+                    self._in_use -= 1
+                continue
+
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += time.monotonic() - started
+                self._max_in_use = max(self._max_in_use, self._in_use)
+            return PooledConnection(self, slot)
+
+    def stats(self):
+        """Metrik saturasi pool."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "opened": self._opened,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "max_in_use": self._max_in_use,
+                "saturation": round(self._in_use / self.size, 3),
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "created": self._created,
+                "recycled": self._recycled,
+                "broken": self._broken,
+                "avg_wait_ms": round(
+                    self._wait_total / self._checkouts * 1000, 3
+                ) if self._checkouts else 0.0,
+            }
+
+    def close_all(self):
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._opened -= len(idle)
+        for slot in idle:
+            self._discard(slot)
+
+
+# ================= GLOBAL POOL =================
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=Config.DB_POOL_SIZE,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    recycle=Config.DB_POOL_RECYCLE,
+                    ping_idle=Config.DB_POOL_PING_IDLE,
+                    host=Config.DB_HOST,
+                    user=Config.DB_USER,
+                    password=Config.DB_PASSWORD,
+                    database=Config.DB_NAME,
+                )
+    return _pool
+
+
+def get_db():
+    """
+    Koneksi untuk request saat ini.
+
+    Di dalam app context koneksi disimpan di g sehingga semua pemanggilan
+    dalam satu request memakai koneksi yang sama; koneksi dikembalikan ke
+    pool oleh teardown. Di luar app context (CLI, worker) koneksi biasa
+    dari pool yang dikembalikan lewat close().
+    """
+    if not has_app_context():
+        return get_pool().connection()
+
+    if "db" not in g:
+        conn = get_pool().connection()
+        conn.request_scoped = True
+        g.db = conn
+    return g.db
+
+
+def release_db(exc=None):
+    conn = g.pop("db", None)
+    if conn is not None:
+        conn.release()
+
+
+def init_app(app):
+    app.teardown_appcontext(release_db)
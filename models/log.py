@@ -0,0 +1,60 @@
+from database.db import Projection, Repository, record
+
+LogTerbaru = record("LogTerbaru", "created_at name aktivitas endpoint")
+LogAdmin = record(
+    "LogAdmin",
+    "id created_at name role aktivitas endpoint metode_http ip_address"
+)
+LogUser = record(
+    "LogUser", "id created_at aktivitas endpoint metode_http ip_address"
+)
+
+
+class LogRepository(Repository):
+    # Penulisan log lewat antrean batch di services/log_service.py;
+    # repository ini hanya untuk halaman baca
+    TERBARU = """
+        SELECT l.created_at, u.name, l.aktivitas, l.endpoint
+        FROM log_aktivitas_user l
+        LEFT JOIN users u ON l.user_id = u.id
+        ORDER BY l.created_at DESC
+        LIMIT %s
+    """
+    SELECT_ADMIN = """
+        SELECT l.id, l.created_at, u.name, u.role,
+               l.aktivitas, l.endpoint, l.metode_http, l.ip_address
+        FROM log_aktivitas_user l
+        LEFT JOIN users u ON l.user_id = u.id
+    """
+    SELECT_USER = """
+        SELECT id, created_at, aktivitas, endpoint, metode_http, ip_address
+        FROM log_aktivitas_user
+    """
+    KEYS = [("l.created_at", "created_at"), ("l.id", "id")]
+
+    # API (routes/log_routes.py)
+    API = Projection({
+        "id": "l.id",
+        "user_id": "l.user_id",
+        "aktivitas": "l.aktivitas",
+        "endpoint": "l.endpoint",
+        "metode_http": "l.metode_http",
+        "ip_address": "l.ip_address",
+        "created_at": "l.created_at",
+    }, "FROM log_aktivitas_user l", keys=KEYS)
+
+    def terbaru(self, db, limit=10):
+        return self._all(db, self.TERBARU, (limit,), LogTerbaru)
+
+    def admin_page(self, db, filters):
+        return self._page(db, self.SELECT_ADMIN, self.KEYS, filters, LogAdmin)
+
+    def user_page(self, db, filters):
+        """Log milik satu user; filters wajib membatasi user_id."""
+        return self._page(
+            db, self.SELECT_USER,
+            [("created_at", "created_at"), ("id", "id")], filters, LogUser
+        )
+
+
+logs = LogRepository()
@@ -1,9 +1,117 @@
-from database.db import get_connection
-
-class Penjualan:
-    @staticmethod
-    def all():
-        db = get_connection()
-        c = db.cursor(dictionary=True)
-        c.execute("SELECT * FROM penjualan")
-        return c.fetchall()
+from database.db import Projection, Repository, record
+
+Penjualan = record("Penjualan", "id produk_id tanggal jumlah total_harga created_at")
+PenjualanDetail = record(
+    "PenjualanDetail",
+    "id produk_id tanggal jumlah total_harga nama_produk harga umkm_id"
+)
+PenjualanRow = record("PenjualanRow", "id nama_produk tanggal jumlah total_harga")
+PenjualanAdmin = record(
+    "PenjualanAdmin", "id tanggal nama_produk nama_umkm jumlah total_harga"
+)
+PenjualanTanggal = record("PenjualanTanggal", "tanggal transaksi jumlah omzet")
+
+
+class PenjualanRepository(Repository):
+    HARGA = "SELECT harga FROM produk WHERE id = %s"
+    DETAIL = """
+        SELECT p.id, p.produk_id, p.tanggal, p.jumlah, p.total_harga,
+               pr.nama_produk, pr.harga, pr.umkm_id
+        FROM penjualan p
+        JOIN produk pr ON p.produk_id = pr.id
+        WHERE p.id = %s
+    """
+    # Baris dikunci sampai transaksi selesai: edit/hapus ganda tidak
+    # menghitung selisih rollup dari data yang sudah basi
+    DETAIL_LOCK = DETAIL + " FOR UPDATE"
+    PER_TANGGAL_PRODUK = """
+        SELECT tanggal, COUNT(*), SUM(jumlah), SUM(total_harga)
+        FROM penjualan
+        WHERE produk_id = %s
+        GROUP BY tanggal
+        FOR UPDATE
+    """
+    INSERT = """
+        INSERT INTO penjualan (produk_id, tanggal, jumlah, total_harga, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    UPDATE = """
+        UPDATE penjualan
+        SET jumlah = %s, total_harga = %s
+        WHERE id = %s
+    """
+    DELETE = "DELETE FROM penjualan WHERE id = %s"
+    DELETE_PRODUK = "DELETE FROM penjualan WHERE produk_id = %s"
+    SELECT_UMKM = """
+        SELECT p.id, pr.nama_produk, p.tanggal, p.jumlah, p.total_harga
+        FROM penjualan p
+        JOIN produk pr ON p.produk_id = pr.id
+    """
+    SELECT_ADMIN = """
+        SELECT p.id, p.tanggal, pr.nama_produk, u.nama_umkm,
+               p.jumlah, p.total_harga
+        FROM penjualan p
+        JOIN produk pr ON p.produk_id = pr.id
+        JOIN umkm u ON pr.umkm_id = u.id
+    """
+    KEYS = [("p.tanggal", "tanggal"), ("p.id", "id")]
+
+    # API (routes/penjualan_routes.py); join produk untuk filter UMKM
+    API = Projection({
+        "id": "p.id",
+        "produk_id": "p.produk_id",
+        "nama_produk": "pr.nama_produk",
+        "umkm_id": "pr.umkm_id",
+        "tanggal": "p.tanggal",
+        "jumlah": "p.jumlah",
+        "total_harga": "p.total_harga",
+        "created_at": "p.created_at",
+    }, "FROM penjualan p JOIN produk pr ON p.produk_id = pr.id", keys=KEYS)
+
+    def harga_produk(self, db, produk_id):
+        return self._scalar(db, self.HARGA, (produk_id,))
+
+    def detail(self, db, penjualan_id):
+        """Penjualan beserta nama, harga dan UMKM produknya."""
+        return self._one(db, self.DETAIL, (penjualan_id,), PenjualanDetail)
+
+    def lock(self, db, penjualan_id):
+        """detail() dengan SELECT ... FOR UPDATE; panggil di dalam transaction()."""
+        return self._one(db, self.DETAIL_LOCK, (penjualan_id,), PenjualanDetail)
+
+    def per_tanggal_produk(self, db, produk_id):
+        """Total penjualan satu produk per tanggal (dikunci), untuk rollup hapus produk."""
+        return self._all(
+            db, self.PER_TANGGAL_PRODUK, (produk_id,), PenjualanTanggal
+        )
+
+    def create(self, db, produk_id, tanggal, jumlah, total_harga, created_at):
+        return self._execute(db, self.INSERT, (
+            produk_id, tanggal, jumlah, total_harga, created_at
+        ))[0]
+
+    def update(self, db, penjualan_id, jumlah, total_harga):
+        return self._execute(
+            db, self.UPDATE, (jumlah, total_harga, penjualan_id)
+        )[1]
+
+    def create_many(self, db, rows):
+        """Bulk insert [(produk_id, tanggal, jumlah, total_harga, created_at)]."""
+        return self._execute_many(db, self.INSERT, rows)
+
+    def delete(self, db, penjualan_id):
+        return self._execute(db, self.DELETE, (penjualan_id,))[1]
+
+    def delete_by_produk(self, db, produk_id):
+        """Hapus semua penjualan satu produk (ikut hapus produk)."""
+        return self._execute(db, self.DELETE_PRODUK, (produk_id,))[1]
+
+    def umkm_page(self, db, filters):
+        """Halaman penjualan UMKM; filters wajib membatasi pr.umkm_id."""
+        return self._page(db, self.SELECT_UMKM, self.KEYS, filters, PenjualanRow)
+
+    def admin_page(self, db, filters):
+        return self._page(db, self.SELECT_ADMIN, self.KEYS, filters, PenjualanAdmin)
+
+
+penjualan = PenjualanRepository()
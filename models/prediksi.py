@@ -0,0 +1,113 @@
+from database.db import Projection, Repository, record
+
+PrediksiTotal = record(
+    "PrediksiTotal", "hasil_prediksi mae rmse tanggal_prediksi"
+)
+PrediksiProduk = record(
+    "PrediksiProduk", "nama_produk tanggal_prediksi hasil_prediksi mae rmse"
+)
+PrediksiTerbaru = record(
+    "PrediksiTerbaru",
+    "nama_produk nama_umkm tanggal_prediksi hasil_prediksi mae rmse created_at"
+)
+RunPrediksi = record("RunPrediksi", "created_at mae rmse horizon")
+
+
+class PrediksiRepository(Repository):
+    # Semua bacaan lewat pointer prediksi_terakhir (produk_id 0 = total
+    # UMKM) dan index (umkm_id, produk_id, created_at), lihat migrasi 0004
+    TOTAL = """
+        SELECT pp.hasil_prediksi, pp.mae, pp.rmse, pp.tanggal_prediksi
+        FROM prediksi_terakhir t
+        JOIN prediksi_penjualan pp
+            ON pp.umkm_id = t.umkm_id
+            AND pp.produk_id IS NULL
+            AND pp.created_at = t.created_at
+        WHERE t.umkm_id = %s AND t.produk_id = 0
+        ORDER BY pp.tanggal_prediksi ASC
+    """
+    PER_PRODUK = """
+        SELECT pr.nama_produk, pp.tanggal_prediksi, pp.hasil_prediksi,
+               pp.mae, pp.rmse
+        FROM prediksi_terakhir t
+        JOIN prediksi_penjualan pp
+            ON pp.umkm_id = t.umkm_id
+            AND pp.produk_id = t.produk_id
+            AND pp.created_at = t.created_at
+        JOIN produk pr ON pp.produk_id = pr.id
+        WHERE t.umkm_id = %s AND t.produk_id <> 0
+        ORDER BY pr.nama_produk, pp.tanggal_prediksi
+    """
+    TERBARU = """
+        SELECT
+            pr.nama_produk,
+            um.nama_umkm,
+            pp.tanggal_prediksi,
+            pp.hasil_prediksi,
+            pp.mae,
+            pp.rmse,
+            pp.created_at
+        FROM prediksi_terakhir t
+        JOIN prediksi_penjualan pp
+            ON pp.umkm_id = t.umkm_id
+            AND pp.produk_id = t.produk_id
+            AND pp.created_at = t.created_at
+        JOIN produk pr ON pp.produk_id = pr.id
+        JOIN umkm um ON t.umkm_id = um.id
+        WHERE t.produk_id <> 0
+        ORDER BY t.created_at DESC, pp.tanggal_prediksi
+        LIMIT %s
+    """
+    RIWAYAT = """
+        SELECT created_at, MIN(mae) AS mae, MIN(rmse) AS rmse,
+               COUNT(*) AS horizon
+        FROM prediksi_penjualan
+        WHERE umkm_id = %s AND {produk}
+        GROUP BY created_at
+        ORDER BY created_at DESC
+        LIMIT %s
+    """
+    RIWAYAT_TOTAL = RIWAYAT.format(produk="produk_id IS NULL")
+    RIWAYAT_PRODUK = RIWAYAT.format(produk="produk_id = %s")
+
+    # Prediksi terakhir per UMKM/produk untuk API; produk_id null = total
+    # UMKM (pointer produk_id 0)
+    API = Projection({
+        "umkm_id": "t.umkm_id",
+        "produk_id": "pp.produk_id",
+        "nama_produk": "pr.nama_produk",
+        "tanggal_prediksi": "pp.tanggal_prediksi",
+        "hasil_prediksi": "pp.hasil_prediksi",
+        "mae": "pp.mae",
+        "rmse": "pp.rmse",
+        "created_at": "pp.created_at",
+    }, """
+        FROM prediksi_terakhir t
+        JOIN prediksi_penjualan pp
+            ON pp.umkm_id = t.umkm_id
+            AND pp.produk_id <=> NULLIF(t.produk_id, 0)
+            AND pp.created_at = t.created_at
+        LEFT JOIN produk pr ON pp.produk_id = pr.id
+    """, order="t.umkm_id, t.produk_id, pp.tanggal_prediksi")
+
+    def total(self, db, umkm_id):
+        """Horizon prediksi total terakhir UMKM, urut tanggal."""
+        return self._all(db, self.TOTAL, (umkm_id,), PrediksiTotal)
+
+    def per_produk(self, db, umkm_id):
+        return self._all(db, self.PER_PRODUK, (umkm_id,), PrediksiProduk)
+
+    def terbaru(self, db, limit=50):
+        """Prediksi produk terbaru lintas UMKM untuk monitoring admin."""
+        return self._all(db, self.TERBARU, (limit,), PrediksiTerbaru)
+
+    def riwayat(self, db, umkm_id, produk_id=None, limit=90):
+        """MAE/RMSE per run, dari yang terbaru."""
+        if produk_id:
+            return self._all(
+                db, self.RIWAYAT_PRODUK, (umkm_id, produk_id, limit), RunPrediksi
+            )
+        return self._all(db, self.RIWAYAT_TOTAL, (umkm_id, limit), RunPrediksi)
+
+
+prediksi = PrediksiRepository()
@@ -0,0 +1,101 @@
+from database.db import Repository, record
+
+PrediksiJobRow = record(
+    "PrediksiJobRow",
+    "id umkm_id user_id level horizon status result error cancel_requested "
+    "created_at finished_at"
+)
+
+
+class PrediksiJobRepository(Repository):
+    # Tabel dibuat oleh migrasi 0005; status/antrean di services/prediksi_job.py
+    COLUMNS = (
+        "id, umkm_id, user_id, level, horizon, status, result, error, "
+        "cancel_requested, created_at, finished_at"
+    )
+
+    GET = "SELECT %s FROM prediksi_job WHERE id = %%s" % COLUMNS
+    ACTIVE = """
+        SELECT %s FROM prediksi_job
+        WHERE active_umkm_id = %%s AND level = %%s
+    """ % COLUMNS
+    ACTIVE_ANY = """
+        SELECT %s FROM prediksi_job
+        WHERE active_umkm_id = %%s
+        ORDER BY created_at DESC
+        LIMIT 1
+    """ % COLUMNS
+    INSERT = """
+        INSERT INTO prediksi_job
+        (id, umkm_id, user_id, level, horizon, status, active_umkm_id, created_at)
+        VALUES (%s, %s, %s, %s, %s, 'queued', %s, %s)
+    """
+    START = """
+        UPDATE prediksi_job SET status = 'running'
+        WHERE id = %s AND status = 'queued' AND cancel_requested = 0
+    """
+    FINISH = """
+        UPDATE prediksi_job
+        SET status = %s, result = %s, error = %s, finished_at = %s,
+            active_umkm_id = NULL
+        WHERE id = %s AND cancel_requested = 0
+    """
+    CANCEL = """
+        UPDATE prediksi_job
+        SET cancel_requested = 1, status = 'cancelled', finished_at = %s,
+            active_umkm_id = NULL
+        WHERE id = %s AND status IN ('queued', 'running')
+    """
+    # Job yang pemiliknya mati (worker di-restart) tidak pernah selesai;
+    # kuncinya dilepas setelah batas waktu
+    EXPIRE = """
+        UPDATE prediksi_job
+        SET status = 'failed', error = %s, finished_at = %s,
+            active_umkm_id = NULL
+        WHERE active_umkm_id = %s AND level = %s AND created_at < %s
+    """
+    PRUNE = "DELETE FROM prediksi_job WHERE finished_at < %s"
+    COUNTS = "SELECT status, COUNT(*) FROM prediksi_job GROUP BY status"
+
+    def get(self, db, job_id):
+        return self._one(db, self.GET, (job_id,), PrediksiJobRow)
+
+    def active(self, db, umkm_id, level=None):
+        """Job antre/berjalan UMKM (untuk level tertentu, atau yang terbaru)."""
+        if level is None:
+            return self._one(db, self.ACTIVE_ANY, (umkm_id,), PrediksiJobRow)
+        return self._one(db, self.ACTIVE, (umkm_id, level), PrediksiJobRow)
+
+    def create(self, db, job_id, umkm_id, user_id, level, horizon, created_at):
+        """IntegrityError bila UMKM sudah punya job aktif di level ini."""
+        self._execute(db, self.INSERT, (
+            job_id, umkm_id, user_id, level, horizon, umkm_id, created_at
+        ))
+
+    def start(self, db, job_id):
+        """False bila job sudah dibatalkan sebelum mulai."""
+        return self._execute(db, self.START, (job_id,))[1] == 1
+
+    def finish(self, db, job_id, status, result, error, finished_at):
+        """False bila job sudah dibatalkan (status tidak ditimpa)."""
+        return self._execute(db, self.FINISH, (
+            status, result, error, finished_at, job_id
+        ))[1] == 1
+
+    def cancel(self, db, job_id, finished_at):
+        return self._execute(db, self.CANCEL, (finished_at, job_id))[1] == 1
+
+    def expire(self, db, umkm_id, level, created_before, error, finished_at):
+        return self._execute(db, self.EXPIRE, (
+            error, finished_at, umkm_id, level, created_before
+        ))[1]
+
+    def prune(self, db, finished_before):
+        return self._execute(db, self.PRUNE, (finished_before,))[1]
+
+    def counts(self, db):
+        """{status: jumlah} job yang masih disimpan."""
+        return dict(self._all(db, self.COUNTS))
+
+
+prediksi_jobs = PrediksiJobRepository()
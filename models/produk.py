@@ -1,10 +1,128 @@
-from database.db import db
+from database.db import Projection, Repository, record
 
-class Produk(db.Model):
-    __tablename__ = 'produk'
+Produk = record(
+    "Produk", "id umkm_id nama_produk kategori harga stok deskripsi created_at"
+)
+ProdukOption = record("ProdukOption", "id nama_produk harga")
+ProdukPemilik = record("ProdukPemilik", "umkm_id user_id")
+ProdukAdmin = record(
+    "ProdukAdmin", "id nama_produk harga stok created_at nama_umkm"
+)
 
-    id = db.Column(db.Integer, primary_key=True)
-    umkm_id = db.Column(db.Integer, nullable=False)
-    nama_produk = db.Column(db.String(150), nullable=False)
-    harga = db.Column(db.Float, nullable=False)
-    kategori = db.Column(db.String(100))
+
+class ProdukRepository(Repository):
+    COLUMNS = "id, umkm_id, nama_produk, kategori, harga, stok, deskripsi, created_at"
+
+    BY_UMKM = """
+        SELECT %s FROM produk
+        WHERE umkm_id = %%s
+        ORDER BY created_at DESC
+    """ % COLUMNS
+    ALL = "SELECT %s FROM produk ORDER BY id" % COLUMNS
+    GET = "SELECT %s FROM produk WHERE id = %%s" % COLUMNS
+    GET_LOCK = GET + " FOR UPDATE"
+    PEMILIK = """
+        SELECT p.umkm_id, u.user_id
+        FROM produk p
+        JOIN umkm u ON p.umkm_id = u.id
+        WHERE p.id = %s
+    """
+    NAMES = "SELECT id, nama_produk FROM produk WHERE umkm_id = %%s AND id IN (%s)"
+    HARGA_IN = "SELECT id, harga FROM produk WHERE umkm_id = %%s AND id IN (%s)"
+    OPTIONS = """
+        SELECT id, nama_produk, harga FROM produk
+        WHERE umkm_id = %s
+        ORDER BY nama_produk
+    """
+    INSERT = """
+        INSERT INTO produk
+        (umkm_id, nama_produk, kategori, harga, stok, deskripsi, created_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    UPDATE = """
+        UPDATE produk SET
+            nama_produk = %s,
+            kategori = %s,
+            harga = %s,
+            stok = %s,
+            deskripsi = %s
+        WHERE id = %s
+    """
+    DELETE = "DELETE FROM produk WHERE id = %s"
+    SELECT_ADMIN = """
+        SELECT pr.id, pr.nama_produk, pr.harga, pr.stok,
+               pr.created_at, u.nama_umkm
+        FROM produk pr
+        JOIN umkm u ON pr.umkm_id = u.id
+    """
+
+    # Katalog untuk API (routes/produk_routes.py), urut id menurun
+    API = Projection({
+        "id": "pr.id",
+        "umkm_id": "pr.umkm_id",
+        "nama_produk": "pr.nama_produk",
+        "kategori": "pr.kategori",
+        "harga": "pr.harga",
+        "stok": "pr.stok",
+        "deskripsi": "pr.deskripsi",
+        "created_at": "pr.created_at",
+    }, "FROM produk pr", keys=[("pr.id", "id")])
+
+    def all(self, db):
+        return self._all(db, self.ALL, (), Produk)
+
+    def by_umkm(self, db, umkm_id):
+        return self._all(db, self.BY_UMKM, (umkm_id,), Produk)
+
+    def get(self, db, produk_id):
+        return self._one(db, self.GET, (produk_id,), Produk)
+
+    def lock(self, db, produk_id):
+        """get() dengan SELECT ... FOR UPDATE; panggil di dalam transaction()."""
+        return self._one(db, self.GET_LOCK, (produk_id,), Produk)
+
+    def pemilik(self, db, produk_id):
+        """(umkm_id, user_id) pemilik produk, None jika tidak ada."""
+        return self._one(db, self.PEMILIK, (produk_id,), ProdukPemilik)
+
+    def names(self, db, umkm_id, produk_ids):
+        """{id: nama_produk} untuk produk_ids yang milik umkm_id."""
+        if not produk_ids:
+            return {}
+        sql = self.NAMES % ", ".join(["%s"] * len(produk_ids))
+        return dict(self._all(db, sql, (umkm_id, *produk_ids), prepared=False))
+
+    def harga(self, db, umkm_id, produk_ids):
+        """[(id, harga)] untuk produk_ids yang milik umkm_id (import massal)."""
+        if not produk_ids:
+            return []
+        sql = self.HARGA_IN % ", ".join(["%s"] * len(produk_ids))
+        return self._all(db, sql, (umkm_id, *produk_ids), prepared=False)
+
+    def options(self, db, umkm_id):
+        """(id, nama_produk, harga) untuk pilihan form penjualan."""
+        return self._all(db, self.OPTIONS, (umkm_id,), ProdukOption)
+
+    def create(self, db, umkm_id, nama_produk, kategori, harga, stok,
+               deskripsi, created_at):
+        return self._execute(db, self.INSERT, (
+            umkm_id, nama_produk, kategori, harga, stok, deskripsi, created_at
+        ))[0]
+
+    def update(self, db, produk_id, nama_produk, kategori, harga, stok, deskripsi):
+        return self._execute(db, self.UPDATE, (
+            nama_produk, kategori, harga, stok, deskripsi, produk_id
+        ))[1]
+
+    def delete(self, db, produk_id):
+        return self._execute(db, self.DELETE, (produk_id,))[1]
+
+    def admin_page(self, db, filters):
+        return self._page(
+            db, self.SELECT_ADMIN,
+            [("pr.created_at", "created_at"), ("pr.id", "id")], filters,
+            ProdukAdmin
+        )
+
+
+produk = ProdukRepository()
@@ -0,0 +1,44 @@
+from database.db import Repository, record
+
+Rekomendasi = record("Rekomendasi", "created_at nama_produk rekomendasi alasan")
+
+
+class RekomendasiRepository(Repository):
+    BY_UMKM = """
+        SELECT r.created_at, p.nama_produk, r.rekomendasi, r.alasan
+        FROM rekomendasi_produk r
+        JOIN produk p ON r.produk_id = p.id
+        WHERE p.umkm_id = %s
+        ORDER BY r.created_at DESC
+    """
+    # Fitur aturan (services/rekomendasi_service.py) untuk semua produk
+    # UMKM: stok dan total terjual dalam window hari terakhir
+    FITUR = """
+        SELECT p.id, p.nama_produk, p.stok,
+               IFNULL(SUM(j.jumlah), 0) AS total_jual
+        FROM produk p
+        LEFT JOIN penjualan j
+            ON p.id = j.produk_id
+            AND j.tanggal >= DATE_SUB(CURDATE(), INTERVAL %s DAY)
+        WHERE p.umkm_id = %s
+        GROUP BY p.id
+    """
+    INSERT = """
+        INSERT INTO rekomendasi_produk
+        (produk_id, rekomendasi, alasan, created_at)
+        VALUES (%s, %s, %s, %s)
+    """
+
+    def by_umkm(self, db, umkm_id):
+        return self._all(db, self.BY_UMKM, (umkm_id,), Rekomendasi)
+
+    def fitur(self, db, umkm_id, window_days):
+        """[(id, nama_produk, stok, total_jual)] mentah, untuk array NumPy."""
+        return self._all(db, self.FITUR, (window_days, umkm_id))
+
+    def create_many(self, db, rows):
+        """Bulk insert [(produk_id, rekomendasi, alasan, created_at)]."""
+        return self._execute_many(db, self.INSERT, rows)
+
+
+rekomendasi = RekomendasiRepository()
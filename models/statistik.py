@@ -0,0 +1,69 @@
+from database.db import Repository, record
+
+StatistikGlobal = record(
+    "StatistikGlobal",
+    "total_user total_umkm total_produk total_transaksi total_omzet"
+)
+KOSONG = StatistikGlobal(0, 0, 0, 0, 0)
+
+# Deret harian (services/timeseries.py); {col} = kolom nilai per fitur
+_HARIAN_UMKM = """
+    SELECT tanggal, {col}
+    FROM statistik_harian
+    WHERE umkm_id = %s AND {col} <> 0
+    ORDER BY tanggal
+"""
+_HARIAN_SEMUA = """
+    SELECT umkm_id, tanggal, {col}
+    FROM statistik_harian
+    WHERE {col} <> 0
+    ORDER BY umkm_id, tanggal
+"""
+_HARIAN_PRODUK = """
+    SELECT produk_id, tanggal, {col}
+    FROM penjualan_harian
+    WHERE umkm_id = %s AND {col} <> 0
+"""
+
+
+class StatistikRepository(Repository):
+    # Tabel rollup yang dipelihara services/rollup_service.py; repository
+    # ini hanya untuk bacaan dashboard dan deret waktu prediksi
+    GLOBAL = """
+        SELECT total_user, total_umkm, total_produk,
+               total_transaksi, total_omzet
+        FROM statistik_global WHERE id = 1
+    """
+
+    # Fitur deret: qty / omzet (statistik_harian, penjualan_harian)
+    HARIAN_UMKM_QTY = _HARIAN_UMKM.format(col="total_jumlah")
+    HARIAN_UMKM_OMZET = _HARIAN_UMKM.format(col="total_omzet")
+    HARIAN_SEMUA_QTY = _HARIAN_SEMUA.format(col="total_jumlah")
+    HARIAN_SEMUA_OMZET = _HARIAN_SEMUA.format(col="total_omzet")
+    HARIAN_PRODUK_QTY = _HARIAN_PRODUK.format(col="qty")
+    HARIAN_PRODUK_OMZET = _HARIAN_PRODUK.format(col="omzet")
+    HARIAN = {
+        "qty": (HARIAN_UMKM_QTY, HARIAN_SEMUA_QTY, HARIAN_PRODUK_QTY),
+        "omzet": (HARIAN_UMKM_OMZET, HARIAN_SEMUA_OMZET, HARIAN_PRODUK_OMZET),
+    }
+
+    def ringkasan(self, db):
+        """Satu baris statistik_global; nol semua jika rollup belum diisi."""
+        return self._one(db, self.GLOBAL, (), StatistikGlobal) or KOSONG
+
+    # Deret harian dikembalikan sebagai tuple mentah: langsung diubah ke
+    # array NumPy, tanpa objek per baris
+    def harian_umkm(self, db, umkm_id, field="qty"):
+        """[(tanggal, nilai)] hari berpenjualan satu UMKM, urut tanggal."""
+        return self._all(db, self.HARIAN[field][0], (umkm_id,))
+
+    def harian_semua(self, db, field="qty"):
+        """[(umkm_id, tanggal, nilai)] semua UMKM, urut UMKM lalu tanggal."""
+        return self._all(db, self.HARIAN[field][1])
+
+    def harian_produk(self, db, umkm_id, field="qty"):
+        """[(produk_id, tanggal, nilai)] semua produk satu UMKM."""
+        return self._all(db, self.HARIAN[field][2], (umkm_id,))
+
+
+statistik = StatistikRepository()
@@ -0,0 +1,79 @@
+from database.db import Repository, record
+
+Umkm = record("Umkm", "id user_id nama_umkm alamat kategori created_at")
+UmkmOption = record("UmkmOption", "id nama_umkm")
+UmkmSummary = record(
+    "UmkmSummary",
+    "id nama_umkm pemilik kategori total_produk total_penjualan"
+)
+
+
+class UmkmRepository(Repository):
+    COLUMNS = "id, user_id, nama_umkm, alamat, kategori, created_at"
+
+    BY_USER = "SELECT %s FROM umkm WHERE user_id = %%s" % COLUMNS
+    GET = "SELECT %s FROM umkm WHERE id = %%s" % COLUMNS
+    GET_OWNED = "SELECT %s FROM umkm WHERE id = %%s AND user_id = %%s" % COLUMNS
+    OPTIONS = "SELECT id, nama_umkm FROM umkm ORDER BY nama_umkm"
+    COUNT_PRODUK = "SELECT COUNT(*) FROM produk WHERE umkm_id = %s"
+    INSERT = """
+        INSERT INTO umkm (user_id, nama_umkm, alamat, kategori, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    UPDATE = """
+        UPDATE umkm
+        SET nama_umkm = %s, alamat = %s, kategori = %s
+        WHERE id = %s
+    """
+    DELETE = "DELETE FROM umkm WHERE id = %s"
+    MONITORING = """
+        SELECT
+            u.id,
+            u.nama_umkm,
+            us.name AS pemilik,
+            u.kategori,
+            COUNT(DISTINCT pr.id) AS total_produk,
+            COALESCE(SUM(pj.total_harga), 0) AS total_penjualan
+        FROM umkm u
+        JOIN users us ON u.user_id = us.id
+        LEFT JOIN produk pr ON pr.umkm_id = u.id
+        LEFT JOIN penjualan pj ON pj.produk_id = pr.id
+        GROUP BY u.id, us.name, u.kategori
+        ORDER BY total_penjualan DESC
+    """
+
+    def by_user(self, db, user_id):
+        return self._all(db, self.BY_USER, (user_id,), Umkm)
+
+    def get(self, db, umkm_id):
+        return self._one(db, self.GET, (umkm_id,), Umkm)
+
+    def get_owned(self, db, umkm_id, user_id):
+        """UMKM umkm_id bila milik user_id, selain itu None."""
+        return self._one(db, self.GET_OWNED, (umkm_id, user_id), Umkm)
+
+    def options(self, db):
+        return self._all(db, self.OPTIONS, (), UmkmOption)
+
+    def produk_count(self, db, umkm_id):
+        return self._scalar(db, self.COUNT_PRODUK, (umkm_id,))
+
+    def create(self, db, user_id, nama_umkm, alamat, kategori, created_at):
+        return self._execute(
+            db, self.INSERT, (user_id, nama_umkm, alamat, kategori, created_at)
+        )[0]
+
+    def update(self, db, umkm_id, nama_umkm, alamat, kategori):
+        return self._execute(
+            db, self.UPDATE, (nama_umkm, alamat, kategori, umkm_id)
+        )[1]
+
+    def delete(self, db, umkm_id):
+        return self._execute(db, self.DELETE, (umkm_id,))[1]
+
+    def monitoring(self, db):
+        """Ringkasan produk dan omzet per UMKM untuk admin."""
+        return self._all(db, self.MONITORING, (), UmkmSummary)
+
+
+umkm = UmkmRepository()
@@ -0,0 +1,49 @@
+from werkzeug.security import check_password_hash
+
+from database.db import Repository, record
+
+User = record("User", "id name email password role created_at")
+UserRow = record("UserRow", "id name email role created_at")
+
+
+class UserRepository(Repository):
+    BY_EMAIL = """
+        SELECT id, name, email, password, role, created_at
+        FROM users WHERE email = %s
+    """
+    EXISTS = "SELECT 1 FROM users WHERE email = %s LIMIT 1"
+    INSERT = """
+        INSERT INTO users (name, email, password, role, created_at)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    SELECT_PAGE = """
+        SELECT id, name, email, role, created_at
+        FROM users
+    """
+
+    def by_email(self, db, email):
+        return self._one(db, self.BY_EMAIL, (email,), User)
+
+    def email_exists(self, db, email):
+        return self._scalar(db, self.EXISTS, (email,)) is not None
+
+    def authenticate(self, db, email, password):
+        """User bila email dan password cocok, selain itu None."""
+        user = self.by_email(db, email)
+        if user is None or not check_password_hash(user.password, password):
+            return None
+        return user
+
+    def create(self, db, name, email, password_hash, role, created_at):
+        return self._execute(
+            db, self.INSERT, (name, email, password_hash, role, created_at)
+        )[0]
+
+    def page(self, db, filters):
+        return self._page(
+            db, self.SELECT_PAGE,
+            [("created_at", "created_at"), ("id", "id")], filters, UserRow
+        )
+
+
+users = UserRepository()
@@ -1,10 +1,34 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request
+
+from database.db import get_connection
+from models.log import logs as log_repo
+from services import json_api as api
+from services.pagination import Filters
+
+log_bp = api.init_blueprint(Blueprint('log_bp', __name__))
 
-log_bp = Blueprint('log_bp', __name__)
 
 @log_bp.route('/', methods=['GET'])
 def log_aktivitas():
-    return jsonify({
-        'status': True,
-        'message': 'Log aktivitas user'
-    }), 200
+    """
+    Log aktivitas, urut terbaru. User biasa hanya melihat log miliknya;
+    admin dapat menyaring lewat user_id.
+
+    Query: fields, user_id (admin), dari/sampai, limit/after/before,
+    stream=1.
+    """
+    user_id, role = api.require_user()
+    fields = api.fields(log_repo.API)
+
+    filters = Filters(request.args)
+    if role == 'admin':
+        filters.equals('user_id', 'l.user_id')
+    else:
+        filters.where('l.user_id = %s', user_id)
+    filters.date_range('l.created_at')
+
+    if api.wants_stream():
+        return api.stream_response(log_repo.API, fields, filters)
+
+    page = log_repo.project_page(get_connection(), log_repo.API, fields, filters)
+    return api.page_response(page)
@@ -1,20 +1,158 @@
-from flask import Blueprint, jsonify, request
+import json
+from datetime import date, datetime
+
+from flask import Blueprint, request, session
+
+from database.db import get_connection, transaction
+from models.penjualan import penjualan as penjualan_repo
+from models.produk import produk as produk_repo
+from models.umkm import umkm as umkm_repo
+from services import json_api as api
+from services import log_service
+from services import rollup_service as rollup
+from services.pagination import Filters
+from services.query_cache import query_cache
+
+penjualan_bp = api.init_blueprint(Blueprint('penjualan_bp', __name__))
 
-penjualan_bp = Blueprint('penjualan_bp', __name__)
 
 @penjualan_bp.route('/', methods=['GET'])
 def get_penjualan():
-    return jsonify({
-        'status': True,
-        'message': 'Data penjualan'
-    }), 200
+    """
+    Daftar penjualan, urut tanggal terbaru.
+
+    Query: fields, umkm_id, produk_id, dari/sampai (tanggal),
+    limit/after/before, stream=1 untuk seluruh hasil sekaligus.
+    """
+    user = api.require_user()
+    fields = api.fields(penjualan_repo.API)
+
+    filters = api.scope_umkm(Filters(request.args), user, 'pr.umkm_id')
+    filters.date_range('p.tanggal').equals('produk_id', 'p.produk_id')
+
+    if api.wants_stream():
+        return api.stream_response(penjualan_repo.API, fields, filters)
+
+    page = penjualan_repo.project_page(
+        get_connection(), penjualan_repo.API, fields, filters
+    )
+    return api.page_response(page)
 
 
 @penjualan_bp.route('/', methods=['POST'])
 def tambah_penjualan():
-    data = request.get_json()
-    return jsonify({
-        'status': True,
-        'message': 'Penjualan berhasil disimpan',
-        'data': data
-    }), 201
+    """Body: {"produk_id": 1, "jumlah": 3, "tanggal": "2024-01-31"} (tanggal opsional)."""
+    user_id, role = api.require_user()
+    data = api.body()
+    api.require(data, 'produk_id', 'jumlah')
+
+    try:
+        jumlah = int(data['jumlah'])
+        tanggal = date.fromisoformat(data.get('tanggal') or date.today().isoformat())
+    except (TypeError, ValueError):
+        raise api.ApiError('jumlah harus angka dan tanggal berformat YYYY-MM-DD')
+    if jumlah <= 0:
+        raise api.ApiError('jumlah harus lebih dari 0')
+
+    db = get_connection()
+    produk = produk_repo.get(db, data['produk_id'])
+    if role != 'umkm' or not produk or not umkm_repo.get_owned(db, produk.umkm_id, user_id):
+        raise api.ApiError('Produk tidak ditemukan', 404)
+
+    total = produk.harga * jumlah
+    with transaction(db) as cur:
+        penjualan_id = penjualan_repo.create(
+            db, produk.id, tanggal, jumlah, total, datetime.now()
+        )
+        rollup.penjualan_changed(
+            cur, produk.umkm_id, tanggal, 1, jumlah, total, produk_id=produk.id
+        )
+    query_cache.invalidate('penjualan')
+
+    log_service.log_activity(
+        user_id, 'tambah_penjualan',
+        endpoint=request.path, metode_http=request.method,
+        ip_address=request.remote_addr, created_at=datetime.now()
+    )
+
+    return api.ok({
+        'id': penjualan_id,
+        'produk_id': produk.id,
+        'tanggal': tanggal,
+        'jumlah': jumlah,
+        'total_harga': total,
+    }, 'Penjualan berhasil disimpan', 201)
+
+
+# ===============================
+# IMPORT MASSAL
+# ===============================
+def read_import_rows():
+    """Baris import dari upload file (CSV/JSON) atau body JSON."""
+    from services.import_service import InvalidImport, parse_csv, parse_json
+
+    upload = request.files.get('file')
+    if upload:
+        if upload.filename.lower().endswith('.json'):
+            try:
+                return parse_json(json.load(upload.stream))
+            except ValueError as e:
+                raise InvalidImport(str(e))
+        return parse_csv(upload.read())
+
+    payload = request.get_json(silent=True)
+    if payload is None:
+        raise InvalidImport('kirim file CSV/JSON (field "file") atau body JSON')
+    return parse_json(payload)
+
+
+def _import_target():
+    """(user_id, umkm_id) dari session web atau JWT; None jika tidak berhak."""
+    user = api.current_user()
+    if user is None or user[1] != 'umkm':
+        return None
+    user_id = user[0]
+
+    umkm_id = request.args.get('umkm_id', type=int) or session.get('active_umkm_id')
+    if not umkm_id or not umkm_repo.get_owned(get_connection(), umkm_id, user_id):
+        return None
+    return user_id, umkm_id
+
+
+@penjualan_bp.route('/import', methods=['POST'])
+def import_penjualan_api():
+    """
+    Import penjualan massal.
+
+    Body: file CSV/JSON (multipart, field "file") atau JSON
+    [{"produk_id": 1, "tanggal": "2024-01-31", "jumlah": 3}, ...].
+    Query: umkm_id (wajib untuk JWT), dry_run=1 untuk validasi saja.
+    """
+    # services.import_service memakai NumPy; dimuat saat endpoint dipanggil
+    from services.import_service import InvalidImport, import_penjualan
+
+    target = _import_target()
+    if target is None:
+        return api.error('UMKM tidak valid atau tidak berhak', 403)
+    user_id, umkm_id = target
+
+    try:
+        rows = read_import_rows()
+        report = import_penjualan(
+            get_connection(), umkm_id, rows,
+            dry_run=request.args.get('dry_run') == '1'
+        )
+    except InvalidImport as e:
+        return api.error(str(e), 400)
+
+    log_service.log_activity(
+        user_id, 'import_penjualan',
+        endpoint=request.path, metode_http=request.method,
+        ip_address=request.remote_addr, created_at=datetime.now()
+    )
+
+    return api.json_response({
+        'status': report['aborted'] is None,
+        'message': '%d dari %d baris disimpan' % (report['inserted'], report['total']),
+        'data': report
+    })
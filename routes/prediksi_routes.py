@@ -1,14 +1,124 @@
-from flask import Blueprint, jsonify, request
+from datetime import datetime
 
-prediksi_bp = Blueprint('prediksi_bp', __name__)
+from flask import Blueprint, request, session
 
+from database.db import get_connection
+from models.prediksi import prediksi as prediksi_repo
+from models.umkm import umkm as umkm_repo
+from services import json_api as api
+from services import log_service
+from services.pagination import Filters
+from services.prediksi_job import job_queue
+from services.prediksi_service import load_sales_series, load_produk_matrix
+
+prediksi_bp = api.init_blueprint(Blueprint('prediksi_bp', __name__))
+
+
+def _umkm_target(user, umkm_id):
+    """UMKM yang boleh dibaca/diprediksi user (admin: semua); selain itu 403."""
+    user_id, role = user
+    if not umkm_id:
+        raise api.ApiError('umkm_id wajib diisi')
+    if role != 'admin' and not umkm_repo.get_owned(get_connection(), umkm_id, user_id):
+        raise api.ApiError('UMKM tidak valid atau tidak berhak', 403)
+    return umkm_id
+
+
+# ===============================
+# PREDIKSI TERAKHIR
+# ===============================
+@prediksi_bp.route('/', methods=['GET'])
+def get_prediksi():
+    """
+    Horizon prediksi terakhir per UMKM/produk.
+
+    Query: fields, umkm_id, produk_id (0 = prediksi total UMKM),
+    stream=1. Hanya run terakhir (pointer prediksi_terakhir) sehingga
+    ukurannya dibatasi horizon, tanpa pagination.
+    """
+    user = api.require_user()
+    fields = api.fields(prediksi_repo.API)
+
+    filters = api.scope_umkm(Filters(request.args), user, 't.umkm_id')
+    filters.equals('produk_id', 't.produk_id')
+
+    if api.wants_stream():
+        return api.stream_response(prediksi_repo.API, fields, filters)
+
+    rows = prediksi_repo.project_all(get_connection(), prediksi_repo.API, fields, filters)
+    return api.ok(rows)
+
+
+# ===============================
+# RIWAYAT AKURASI
+# ===============================
+@prediksi_bp.route('/riwayat', methods=['GET'])
+def riwayat_prediksi():
+    """MAE/RMSE per run (lama ke baru). Query: umkm_id, produk_id, limit."""
+    user = api.require_user()
+    umkm_id = _umkm_target(
+        user, request.args.get('umkm_id', type=int) or session.get('active_umkm_id')
+    )
+    produk_id = request.args.get('produk_id', type=int)
+    limit = min(max(request.args.get('limit', 90, type=int), 1), 365)
+
+    rows = prediksi_repo.riwayat(get_connection(), umkm_id, produk_id, limit)
+
+    return api.ok(rows[::-1], umkm_id=umkm_id, produk_id=produk_id)
+
+
+# ===============================
+# GENERATE (BACKGROUND JOB)
+# ===============================
 @prediksi_bp.route('/', methods=['POST'])
-def prediksi_penjualan():
-    data = request.get_json()
-
-    return jsonify({
-        'status': True,
-        'message': 'Prediksi penjualan berhasil',
-        'hasil_prediksi': 120,
-        'input': data
-    }), 200
+def generate_prediksi():
+    """
+    Antrekan training prediksi; status job lewat GET /job/<id>.
+
+    Body: umkm_id, hari (1-30), level ("produk" = per produk).
+    """
+    user_id, role = api.require_user()
+    data = api.body()
+    if role != 'umkm':
+        raise api.ApiError('Hanya UMKM yang dapat membuat prediksi', 403)
+    try:
+        umkm_id = int(data.get('umkm_id') or session.get('active_umkm_id') or 0)
+    except (TypeError, ValueError):
+        raise api.ApiError('umkm_id harus bilangan bulat')
+    umkm_id = _umkm_target((user_id, role), umkm_id)
+
+    try:
+        hari = min(max(int(data.get('hari') or 1), 1), 30)
+    except (TypeError, ValueError):
+        raise api.ApiError('hari harus bilangan bulat')
+
+    if data.get('level') == 'produk':
+        produk_ids, _, matrix = load_produk_matrix(get_connection(), umkm_id)
+        if matrix.shape[1] < 10:
+            raise api.ApiError('Data penjualan belum cukup (minimal 10 hari)', 422)
+        job = job_queue.submit_produk(umkm_id, user_id, produk_ids, matrix, hari)
+    else:
+        sales_series = load_sales_series(get_connection(), umkm_id)
+        if len(sales_series) < 10:
+            raise api.ApiError('Data penjualan belum cukup (minimal 10 hari)', 422)
+        job = job_queue.submit(umkm_id, user_id, sales_series, hari)
+
+    log_service.log_activity(
+        user_id, 'generate_prediksi_penjualan_lstm',
+        endpoint=request.path, metode_http=request.method,
+        ip_address=request.remote_addr, created_at=datetime.now()
+    )
+
+    return api.ok(job.to_dict(), 'Prediksi diantrekan', 202)
+
+
+@prediksi_bp.route('/job/<job_id>', methods=['GET'])
+def status_job(job_id):
+    user_id, role = api.require_user()
+    job = job_queue.get(job_id)
+    if not job or (
+        role != 'admin' and not umkm_repo.get_owned(get_connection(), job.umkm_id, user_id)
+    ):
+        return api.error('Job tidak ditemukan', 404)
+
+    return api.ok(job.to_dict())
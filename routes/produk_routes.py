@@ -1,32 +1,46 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, session
+
 from controllers.produk_controller import (
     store_produk,
-    get_all_produk,
-    get_produk_by_id,
-    update_produk,
-    delete_produk
+    edit_produk,
+    remove_produk
 )
+from database.db import get_connection
+from models.produk import produk as produk_repo
+from models.umkm import umkm as umkm_repo
+from services import json_api as api
+from services.pagination import Filters
+
+produk_bp = api.init_blueprint(Blueprint('produk_bp', __name__))
+
+
+def _owned_produk(db, user, produk_id):
+    """Produk bila user berhak (pemilik UMKM atau admin); selain itu 404."""
+    user_id, role = user
+    produk = produk_repo.get(db, produk_id)
+    if produk and (role == 'admin' or umkm_repo.get_owned(db, produk.umkm_id, user_id)):
+        return produk
+    raise api.ApiError('Produk tidak ditemukan', 404)
 
-produk_bp = Blueprint('produk_bp', __name__)
 
 # ===============================
 # CREATE
 # ===============================
 @produk_bp.route('/', methods=['POST'])
 def create_produk():
-    data = request.get_json()
-    umkm_id = 1  # sementara (DEV)
+    user_id, role = api.require_user()
+    data = api.body()
+    api.require(data, 'nama_produk', 'harga')
+
+    umkm_id = data.get('umkm_id') or session.get('active_umkm_id')
+    if role != 'umkm' or not umkm_id or not umkm_repo.get_owned(
+        get_connection(), umkm_id, user_id
+    ):
+        raise api.ApiError('UMKM tidak valid atau tidak berhak', 403)
 
     produk = store_produk(data, umkm_id)
 
-    return jsonify({
-        'status': True,
-        'message': 'Produk berhasil ditambahkan',
-        'data': {
-            'id': produk.id,
-            'nama_produk': produk.nama_produk
-        }
-    }), 201
+    return api.ok(produk, 'Produk berhasil ditambahkan', 201)
 
 
 # ===============================
@@ -34,12 +48,23 @@ def create_produk():
 # ===============================
 @produk_bp.route('/', methods=['GET'])
 def get_produk():
-    produk_list = get_all_produk()
+    """
+    Katalog produk, urut id terbaru.
 
-    return jsonify({
-        'status': True,
-        'data': produk_list
-    })
+    Query: fields, umkm_id, dari/sampai (created_at), limit/after/before,
+    stream=1 untuk seluruh katalog sekaligus.
+    """
+    user = api.require_user()
+    fields = api.fields(produk_repo.API)
+
+    filters = api.scope_umkm(Filters(request.args), user, 'pr.umkm_id')
+    filters.date_range('pr.created_at')
+
+    if api.wants_stream():
+        return api.stream_response(produk_repo.API, fields, filters)
+
+    page = produk_repo.project_page(get_connection(), produk_repo.API, fields, filters)
+    return api.page_response(page)
 
 
 # ===============================
@@ -47,12 +72,16 @@ def get_produk():
 # ===============================
 @produk_bp.route('/<int:id>', methods=['GET'])
 def detail_produk(id):
-    produk = get_produk_by_id(id)
+    user = api.require_user()
+    fields = api.fields(produk_repo.API)
+
+    filters = api.scope_umkm(Filters({}), user, 'pr.umkm_id').where('pr.id = %s', id)
+    produk = produk_repo.project_one(get_connection(), produk_repo.API, fields, filters)
 
     if not produk:
-        return jsonify({'status': False, 'message': 'Produk tidak ditemukan'}), 404
+        return api.error('Produk tidak ditemukan', 404)
 
-    return jsonify({'status': True, 'data': produk})
+    return api.ok(produk)
 
 
 # ===============================
@@ -60,13 +89,13 @@ def detail_produk(id):
 # ===============================
 @produk_bp.route('/<int:id>', methods=['PUT'])
 def update_produk_route(id):
-    data = request.get_json()
-    produk = update_produk(id, data)
+    user = api.require_user()
+    data = api.body()
+    _owned_produk(get_connection(), user, id)
 
-    if not produk:
-        return jsonify({'status': False, 'message': 'Produk tidak ditemukan'}), 404
+    produk = edit_produk(id, data)
 
-    return jsonify({'status': True, 'message': 'Produk diperbarui'})
+    return api.ok(produk, 'Produk diperbarui')
 
 
 # ===============================
@@ -74,9 +103,9 @@ def update_produk_route(id):
 # ===============================
 @produk_bp.route('/<int:id>', methods=['DELETE'])
 def delete_produk_route(id):
-    success = delete_produk(id)
+    user = api.require_user()
+    _owned_produk(get_connection(), user, id)
 
-    if not success:
-        return jsonify({'status': False, 'message': 'Produk tidak ditemukan'}), 404
+    remove_produk(id)
 
-    return jsonify({'status': True, 'message': 'Produk dihapus'})
+    return api.ok(message='Produk dihapus')
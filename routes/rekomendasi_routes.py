@@ -1,14 +1,43 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, request
+
+from database.pool import get_db
+from models.produk import produk as produk_repo
+from services import json_api as api
+
+rekomendasi_bp = api.init_blueprint(Blueprint('rekomendasi_bp', __name__))
 
-rekomendasi_bp = Blueprint('rekomendasi_bp', __name__)
 
 @rekomendasi_bp.route('/', methods=['GET'])
-def rekomendasi_produk():
-    return jsonify({
-        'status': True,
-        'message': 'Rekomendasi produk',
-        'data': [
-            {'produk': 'Beras 5kg', 'skor': 0.92},
-            {'produk': 'Minyak Goreng', 'skor': 0.87}
-        ]
-    }), 200
+@rekomendasi_bp.route('/<int:produk_id>', methods=['GET'])
+def rekomendasi_produk(produk_id=None):
+    """
+    Produk yang paling sering terjual bersama produk_id.
+
+    Query: produk_id (jika tidak di path), k = jumlah hasil (default 5).
+    Skor diambil dari index co-occurrence yang dibangun offline
+    (python -m services.cooccurrence build).
+    """
+    # services.cooccurrence memakai NumPy; dimuat saat endpoint dipanggil
+    from services.cooccurrence import index
+
+    user_id, role = api.require_user()
+
+    produk_id = produk_id or request.args.get('produk_id', type=int)
+    if not produk_id:
+        return api.error('produk_id wajib diisi', 400)
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+
+    db = get_db()
+    owner = produk_repo.pemilik(db, produk_id)
+    if not owner or (role != 'admin' and owner.user_id != user_id):
+        return api.error('Produk tidak ditemukan', 404)
+
+    neighbours = index.neighbours(produk_id, k)
+
+    # Nama produk tetangga dalam satu query; hanya produk UMKM yang sama
+    names = produk_repo.names(db, owner.umkm_id, [pid for pid, _, _ in neighbours])
+
+    return api.ok([
+        {'produk_id': pid, 'produk': names[pid], 'skor': skor, 'bersama': bersama}
+        for pid, skor, bersama in neighbours if pid in names
+    ], 'Rekomendasi produk')
@@ -0,0 +1,140 @@
+"""
+Prediksi batch untuk semua UMKM sekaligus.
+
+Mengambil deret harian seluruh UMKM dengan satu query ke agregat
+statistik_harian (hari kosong diisi 0), melatih model di process pool
+seukuran jumlah core, lalu menyimpan semua hasil ke prediksi_penjualan
+dengan satu bulk insert. Cocok dijalankan dari
+cron untuk jadwal malam:
+
+    python -m services.batch_prediksi --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from database.db import transaction
+from database.pool import get_pool
+from services.query_cache import query_cache
+from services.prediksi_job import train_prediksi
+from services.prediksi_service import last_complete_day, prediksi_rows, simpan_rows
+from services.timeseries import all_umkm_series
+
+MIN_ROWS = 10
+
+
+def _init_worker():
+    # Satu thread TensorFlow per proses agar N proses tidak saling rebut core
+    os.environ.setdefault("TF_NUM_INTRAOP_THREADS", "1")
+    os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+
+def load_all_series(db, end):
+    """
+    Deret total penjualan harian rapat per UMKM sampai end (inklusif):
+    {umkm_id: np.ndarray}.
+    """
+    series = all_umkm_series(db, end=end)
+    return {umkm_id: s.values for umkm_id, s in series.items()}
+
+
+def simpan_batch(db, results, end):
+    now = datetime.now()
+
+    with transaction(db) as cur:
+        simpan_rows(cur, [
+            row for umkm_id, r in results.items()
+            for row in prediksi_rows(umkm_id, None, r, now, end)
+        ])
+
+
+def run_batch(workers=None, horizon=1, progress=print):
+    workers = workers or os.cpu_count() or 1
+    started = time.monotonic()
+
+    # Satu tanggal akhir untuk deret dan tanggal_prediksi seluruh batch
+    end = last_complete_day()
+
+    db = get_pool().connection()
+    try:
+        all_series = load_all_series(db, end)
+    finally:
+        db.close()
+
+    eligible = {u: s for u, s in all_series.items() if len(s) >= MIN_ROWS}
+    results, failed = {}, {}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker
+    ) as executor:
+        futures = {
+            executor.submit(train_prediksi, umkm_id, series, "auto", horizon): umkm_id
+            for umkm_id, series in eligible.items()
+        }
+
+        for done, future in enumerate(as_completed(futures), 1):
+            umkm_id = futures[future]
+            try:
+                result = future.result()
+                if result is None:
+                    failed[umkm_id] = "data belum cukup"
+                else:
+                    results[umkm_id] = result
+            except Exception as e:
+                failed[umkm_id] = str(e)
+
+            elapsed = time.monotonic() - started
+            progress("[%d/%d] UMKM %s %s (%.1f UMKM/menit)" % (
+                done, len(futures), umkm_id,
+                "gagal" if umkm_id in failed else "selesai",
+                done / elapsed * 60
+            ))
+
+    if results:
+        db = get_pool().connection()
+        try:
+            simpan_batch(db, results, end)
+        finally:
+            db.close()
+        # Hanya berpengaruh ke worker web bila backend cache "redis";
+        # dengan backend lokal halaman admin menunggu TTL habis
+        query_cache.invalidate("prediksi_penjualan")
+
+    elapsed = time.monotonic() - started
+    return {
+        "umkm_total": len(all_series),
+        "dilatih": len(results),
+        "dilewati": len(all_series) - len(eligible),
+        "gagal": failed,
+        "workers": workers,
+        "detik": round(elapsed, 2),
+        "umkm_per_menit": round(len(eligible) / elapsed * 60, 2) if elapsed else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prediksi batch semua UMKM")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="jumlah proses (default: jumlah core)")
+    parser.add_argument("--hari", type=int, default=1,
+                        help="horizon prediksi dalam hari")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(workers=args.workers, horizon=args.hari)
+    print(
+        "Selesai: %(dilatih)d UMKM dilatih, %(dilewati)d dilewati, "
+        "%(detik).1f detik, %(umkm_per_menit).1f UMKM/menit" % summary
+    )
+    for umkm_id, error in summary["gagal"].items():
+        print("  gagal UMKM %s: %s" % (umkm_id, error))
+
+
+if __name__ == "__main__":
+    main()
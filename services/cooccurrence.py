@@ -0,0 +1,287 @@
+"""
+Index "sering terjual bersama" antar produk.
+
+Dua produk dianggap terjual bersama jika sama-sama punya penjualan di
+hari yang sama pada UMKM yang sama (satu keranjang = umkm_id, tanggal).
+Untuk setiap bulan dibentuk matriks sparse keranjang x produk B; matriks
+co-occurrence bulan itu adalah C = B^T B (diagonal = jumlah hari produk
+terjual). Matriks per bulan disimpan sebagai partisi di disk.
+
+Build berikutnya hanya menghitung ulang bulan yang berubah: tanda
+tangan tiap bulan (COUNT(*), MAX(id) penjualan yang produknya masih ada,
+sama dengan baris yang dibaca load_baskets) dibandingkan dengan manifest,
+lalu semua partisi dijumlahkan dan top-K tetangga per produk disimpan
+ke index.npz. API cukup mencari satu baris di index yang sudah dimuat.
+
+    python -m services.cooccurrence build [--full] [--k 20]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+from config import Config
+
+INDEX_FILE = "index.npz"
+MANIFEST_FILE = "manifest.json"
+
+
+def _path(root, *parts):
+    return os.path.join(root, *parts)
+
+
+def _atomic_savez(path, **arrays):
+    tmp = path + ".%d.tmp.npz" % os.getpid()
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def _atomic_json(path, data):
+    tmp = path + ".%d.tmp" % os.getpid()
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+# ================= PARTISI BULANAN =================
+def month_signatures(cur):
+    """
+    {'YYYY-MM': [jumlah baris, id maksimum]} untuk penjualan yang ikut
+    load_baskets(). JOIN produk yang sama membuat produk yang dihapus
+    (penjualannya tidak lagi terbaca) mengubah tanda tangan bulannya.
+    """
+    cur.execute("""
+        SELECT DATE_FORMAT(p.tanggal, '%Y-%m') AS bulan, COUNT(*), MAX(p.id)
+        FROM penjualan p
+        JOIN produk pr ON p.produk_id = pr.id
+        GROUP BY bulan
+    """)
+    return {bulan: [int(n), int(max_id)] for bulan, n, max_id in cur.fetchall()}
+
+
+def load_baskets(cur, bulan):
+    """(keranjang, produk_id) unik untuk satu bulan, sebagai dua array."""
+    start = np.datetime64(bulan, "M")
+    cur.execute("""
+        SELECT pr.umkm_id, p.tanggal, p.produk_id
+        FROM penjualan p
+        JOIN produk pr ON p.produk_id = pr.id
+        WHERE p.tanggal >= %s AND p.tanggal < %s
+        GROUP BY pr.umkm_id, p.tanggal, p.produk_id
+    """, (str(start.astype("datetime64[D]")), str((start + 1).astype("datetime64[D]"))))
+    rows = cur.fetchall()
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    umkm = np.array([r[0] for r in rows], dtype=np.int64)
+    hari = np.array([r[1] for r in rows], dtype="datetime64[D]").astype(np.int64)
+    produk = np.array([r[2] for r in rows], dtype=np.int64)
+
+    # Nomor keranjang dari pasangan (umkm_id, hari)
+    _, basket = np.unique(np.stack([umkm, hari], axis=1), axis=0, return_inverse=True)
+    return basket.ravel(), produk
+
+
+def month_counts(basket, produk):
+    """
+    Co-occurrence satu bulan dalam koordinat produk_id asli:
+    (baris, kolom, jumlah) termasuk diagonal.
+    """
+    if not len(produk):
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+
+    ids, col = np.unique(produk, return_inverse=True)
+    B = sparse.csr_matrix(
+        (np.ones(len(produk), dtype=np.int32), (basket, col)),
+        shape=(basket.max() + 1, len(ids))
+    )
+    C = (B.T @ B).tocoo()
+    return ids[C.row], ids[C.col], C.data.astype(np.int64)
+
+
+# ================= INDEX =================
+def top_k(rows, cols, counts, k):
+    """
+    Top-K tetangga per produk dari co-occurrence total (koordinat id).
+
+    Skor = cosine hari terjual bersama: C[a,b] / sqrt(C[a,a] * C[b,b]).
+    Mengembalikan produk_ids (P,), neighbours (P,K) berisi produk_id
+    atau -1, scores (P,K) dan together (P,K) jumlah hari bersama.
+    """
+    ids = np.unique(np.concatenate([rows, cols])) if len(rows) else np.empty(0, np.int64)
+    P = len(ids)
+    neighbours = np.full((P, k), -1, dtype=np.int64)
+    scores = np.zeros((P, k), dtype=np.float32)
+    together = np.zeros((P, k), dtype=np.int32)
+    if not P:
+        return ids, neighbours, scores, together
+
+    r = np.searchsorted(ids, rows)
+    c = np.searchsorted(ids, cols)
+    C = sparse.csr_matrix((counts, (r, c)), shape=(P, P))  # duplikat dijumlahkan
+    C.sum_duplicates()
+
+    freq = C.diagonal().astype(float)
+    C.setdiag(0)
+    C.eliminate_zeros()
+    C = C.tocoo()
+
+    score = C.data / np.sqrt(freq[C.row] * freq[C.col])
+
+    # Urutkan per baris berdasarkan skor menurun, ambil K pertama tiap baris
+    order = np.lexsort((-C.data, -score, C.row))
+    row, col = C.row[order], C.col[order]
+    starts = np.searchsorted(row, np.arange(P))
+    rank = np.arange(len(row)) - starts[row]
+    keep = rank < k
+
+    neighbours[row[keep], rank[keep]] = ids[col[keep]]
+    scores[row[keep], rank[keep]] = score[order][keep]
+    together[row[keep], rank[keep]] = C.data[order][keep]
+    return ids, neighbours, scores, together
+
+
+def build(db, root=None, k=None, full=False, progress=print):
+    """
+    Perbarui partisi bulan yang berubah lalu tulis ulang index top-K.
+
+    Mengembalikan ringkasan: bulan dihitung ulang / dilewati / dihapus.
+    """
+    root = root or Config.COOCCURRENCE_DIR
+    k = k or Config.COOCCURRENCE_TOP_K
+    started = time.monotonic()
+    os.makedirs(_path(root, "partisi"), exist_ok=True)
+
+    manifest_path = _path(root, MANIFEST_FILE)
+    manifest = {}
+    if not full and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    cur = db.cursor()
+    signatures = month_signatures(cur)
+
+    changed = [m for m, sig in sorted(signatures.items()) if manifest.get(m) != sig]
+    removed = [m for m in manifest if m not in signatures]
+
+    for bulan in changed:
+        basket, produk = load_baskets(cur, bulan)
+        rows, cols, counts = month_counts(basket, produk)
+        _atomic_savez(_path(root, "partisi", bulan + ".npz"),
+                      rows=rows, cols=cols, counts=counts)
+        manifest[bulan] = signatures[bulan]
+        progress("partisi %s: %d keranjang, %d pasangan" % (
+            bulan, len(np.unique(basket)), len(counts)))
+    cur.close()
+
+    for bulan in removed:
+        try:
+            os.remove(_path(root, "partisi", bulan + ".npz"))
+        except OSError:
+            pass
+        manifest.pop(bulan, None)
+
+    # Gabungkan semua partisi; hanya berisi pasangan yang pernah muncul
+    parts = []
+    for bulan in sorted(manifest):
+        with np.load(_path(root, "partisi", bulan + ".npz")) as data:
+            parts.append((data["rows"], data["cols"], data["counts"]))
+
+    if parts:
+        rows, cols, counts = (np.concatenate(x) for x in zip(*parts))
+    else:
+        rows = cols = counts = np.empty(0, dtype=np.int64)
+
+    ids, neighbours, scores, together = top_k(rows, cols, counts, k)
+    _atomic_savez(_path(root, INDEX_FILE), produk_ids=ids, neighbours=neighbours,
+                  scores=scores, together=together)
+    _atomic_json(manifest_path, manifest)
+
+    return {
+        "bulan_dihitung": changed,
+        "bulan_dilewati": len(signatures) - len(changed),
+        "bulan_dihapus": removed,
+        "produk": int(len(ids)),
+        "k": k,
+        "detik": round(time.monotonic() - started, 2),
+    }
+
+
+# ================= LOOKUP =================
+class CooccurrenceIndex:
+    """Index top-K di memori; dimuat ulang otomatis bila file berubah."""
+
+    def __init__(self, root):
+        self.path = _path(root, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._row = {}
+        self._data = None
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return True
+
+        with self._lock:
+            if mtime != self._mtime:
+                with np.load(self.path) as data:
+                    loaded = {name: data[name] for name in data.files}
+                self._row = {int(pid): i for i, pid in enumerate(loaded["produk_ids"])}
+                self._data = loaded
+                self._mtime = mtime
+        return True
+
+    def neighbours(self, produk_id, k=None):
+        """[(produk_id, skor, hari_bersama)] terurut skor; [] jika belum ada."""
+        if not self._load():
+            return []
+        i = self._row.get(int(produk_id))
+        if i is None:
+            return []
+
+        data = self._data
+        out = []
+        for pid, score, n in zip(data["neighbours"][i], data["scores"][i], data["together"][i]):
+            if pid < 0 or (k and len(out) >= k):
+                break
+            out.append((int(pid), round(float(score), 4), int(n)))
+        return out
+
+
+index = CooccurrenceIndex(Config.COOCCURRENCE_DIR)
+
+
+def main(argv=None):
+    from database.pool import get_pool
+
+    parser = argparse.ArgumentParser(description="Index produk yang sering terjual bersama")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--full", action="store_true",
+                        help="hitung ulang semua bulan")
+    parser.add_argument("--k", type=int, default=None,
+                        help="jumlah tetangga per produk")
+    args = parser.parse_args(argv)
+
+    db = get_pool().connection()
+    try:
+        summary = build(db, k=args.k, full=args.full)
+    finally:
+        db.close()
+    print(
+        "Selesai: %d bulan dihitung ulang, %d dilewati, %d produk, %.1f detik"
+        % (len(summary["bulan_dihitung"]), summary["bulan_dilewati"],
+           summary["produk"], summary["detik"])
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Export data (CSV / XLSX) secara streaming.
+
+Baris dibaca dengan cursor unbuffered dan fetchmany(), diubah menjadi
+potongan byte oleh generator, lalu langsung dikirim ke klien. Memori
+worker tetap datar berapa pun jumlah barisnya dan byte pertama
+terkirim begitu batch pertama tiba dari MySQL.
+
+Opsi gzip memampatkan keluaran CSV sambil jalan (zlib, format gzip).
+XLSX ditulis sebagai zip streaming (entri memakai data descriptor)
+dengan sel inlineStr, tanpa pustaka tambahan.
+"""
+import csv
+import io
+import re
+import zipfile
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from database.pool import get_pool
+
+FETCH_SIZE = 1000
+
+
+# ================= BACA =================
+def iter_query(sql, params=(), fetch_size=FETCH_SIZE):
+    """
+    Generator (columns, batches) dari koneksi pool khusus.
+
+    Yield pertama adalah daftar nama kolom, berikutnya list baris per
+    batch. Koneksi tidak diambil dari g karena generator masih berjalan
+    setelah request selesai diproses Flask.
+    """
+    db = get_pool().connection()
+    cur = None
+    try:
+        cur = db.cursor(buffered=False)
+        cur.execute(sql, params)
+        yield list(cur.column_names)
+        while True:
+            rows = cur.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        # Jika klien memutus di tengah jalan, sisa hasil yang belum dibaca
+        # membuat koneksi dibuang oleh pool (rollback gagal), bukan dipakai ulang
+        if cur is not None:
+            try:
+                cur.close()
+            except Exception:
+                pass
+        db.close()
+
+
+# ================= CSV =================
+def _cell(value):
+    if isinstance(value, Decimal):
+        return format(value, "f")
+    return value
+
+
+def csv_chunks(query):
+    columns = next(query)
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    # BOM agar Excel membaca UTF-8 dengan benar
+    buf.write("\ufeff")
+    writer.writerow(columns)
+
+    for rows in query:
+        writer.writerows([[_cell(v) for v in row] for row in rows])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# ================= XLSX =================
+class _Drain(io.RawIOBase):
+    """File tujuan zipfile yang tidak bisa di-seek; isinya diambil per potong."""
+
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Data" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+# Karakter kontrol C0 tidak sah di XML 1.0 (Excel menolak file-nya);
+# tab, LF dan CR tetap dipertahankan
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value):
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, (int, float, Decimal)):
+        return "<c><v>%s</v></c>" % _cell(value)
+    if isinstance(value, (date, datetime)):
+        value = str(value)
+    return '<c t="inlineStr"><is><t>%s</t></is></c>' % escape(
+        _XML_INVALID.sub("", str(value))
+    )
+
+
+def _xlsx_row(values):
+    return "<row>%s</row>" % "".join(_xlsx_cell(v) for v in values)
+
+
+def xlsx_chunks(query):
+    columns = next(query)
+    out = _Drain()
+
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC.items():
+            zf.writestr(name, content)
+        yield out.take()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>' + _xlsx_row(columns)
+            ).encode("utf-8"))
+
+            for rows in query:
+                sheet.write("".join(_xlsx_row(r) for r in rows).encode("utf-8"))
+                chunk = out.take()
+                if chunk:
+                    yield chunk
+
+            sheet.write(b"</sheetData></worksheet>")
+
+    yield out.take()
+
+
+# ================= RESPONSE =================
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+def export_stream(sql, params, fmt="csv", gzip=False):
+    """
+    (generator byte, mimetype, ekstensi file) untuk query ini.
+
+    gzip hanya berlaku untuk CSV; XLSX sudah berupa zip.
+    """
+    if fmt not in FORMATS:
+        raise ValueError("format export tidak dikenal: %s" % fmt)
+
+    query = iter_query(sql, params)
+    mimetype, ext = FORMATS[fmt]
+
+    if fmt == "xlsx":
+        return xlsx_chunks(query), mimetype, ext
+
+    chunks = csv_chunks(query)
+    if gzip:
+        return gzip_chunks(chunks), "application/gzip", ext + ".gz"
+    return chunks, mimetype, ext
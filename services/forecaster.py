@@ -0,0 +1,376 @@
+"""
+Engine forecasting yang bisa dipilih.
+
+Semua engine memakai antarmuka yang sama: predict(series, horizon)
+untuk vektor prediksi horizon hari ke depan dan backtest(series) untuk
+MAE/RMSE pada 20% data terakhir (one-step-ahead). Baseline NumPy selesai
+dalam hitungan mikrodetik; LSTM hanya dilatih bila deret cukup panjang,
+baseline terbaik masih meleset jauh dan masih ada ruang di atas noise
+penjualan, lalu hanya dipakai bila MAE backtest-nya memang lebih kecil
+dari baseline.
+
+Baseline bekerja pada sumbu terakhir, sehingga matriks (produk x hari)
+diproses sekaligus tanpa loop per produk.
+"""
+import numpy as np
+
+from config import Config
+
+
+def _errors(actual, predicted):
+    """MAE dan RMSE sepanjang sumbu terakhir (float untuk input 1-D)."""
+    diff = np.asarray(actual, dtype=float) - np.asarray(predicted, dtype=float)
+    mae = np.mean(np.abs(diff), axis=-1)
+    rmse = np.sqrt(np.mean(diff ** 2, axis=-1))
+    if diff.ndim == 1:
+        return float(mae), float(rmse)
+    return mae, rmse
+
+
+def result(prediksi, mae, rmse, engine):
+    prediksi = [float(v) for v in prediksi]
+    return {
+        "hasil_prediksi": prediksi[0],
+        "prediksi": prediksi,
+        "mae": mae,
+        "rmse": rmse,
+        "engine": engine,
+    }
+
+
+def _flat(values, horizon):
+    """Ulangi nilai (per baris) sepanjang horizon."""
+    return np.repeat(np.asarray(values)[..., None], horizon, axis=-1)
+
+
+def _split(n):
+    """Indeks awal data uji (20% terakhir, minimal 1 titik)."""
+    return min(n - 1, max(1, int(n * 0.8)))
+
+
+def noise_floor(series):
+    """
+    MAE terkecil yang bisa dicapai model apa pun bila penjualan harian
+    berdistribusi Poisson dengan rata-rata deret: E|X - λ| ≈ sqrt(2λ/π).
+    Per baris untuk matriks.
+    """
+    mean = np.mean(np.abs(np.asarray(series, dtype=float)), axis=-1)
+    return np.sqrt(2 * mean / np.pi)
+
+
+# ================= BASE =================
+class Forecaster:
+    name = None
+    min_length = 2
+
+    def predict(self, series, horizon=1):
+        """Vektor prediksi (horizon,) untuk hari-hari setelah deret."""
+        raise NotImplementedError
+
+    def fitted(self, series):
+        """
+        Prediksi one-step untuk setiap titik (indeks t memakai data < t).
+        NaN untuk titik yang belum punya cukup histori.
+        """
+        raise NotImplementedError
+
+    def backtest(self, series):
+        series = np.asarray(series, dtype=float)
+        length = series.shape[-1]
+        start = max(_split(length), self.min_length)
+        if start >= length:
+            return None, None
+        return _errors(series[..., start:], self.fitted(series)[..., start:])
+
+    def run(self, series, umkm_id=None, horizon=1):
+        series = np.asarray(series, dtype=float)
+        if len(series) < self.min_length:
+            return None
+        mae, rmse = self.backtest(series)
+        return result(self.predict(series, horizon), mae, rmse, self.name)
+
+
+# ================= BASELINES =================
+class MovingAverageForecaster(Forecaster):
+    name = "moving_average"
+
+    def __init__(self, window=7):
+        self.window = window
+        self.min_length = window
+
+    def predict(self, series, horizon=1):
+        return _flat(np.mean(series[..., -self.window:], axis=-1), horizon)
+
+    def fitted(self, series):
+        zeros = np.zeros(series.shape[:-1] + (1,))
+        csum = np.concatenate([zeros, np.cumsum(series, axis=-1)], axis=-1)
+        out = np.full(series.shape, np.nan)
+        w = self.window
+        out[..., w:] = (csum[..., w:-1] - csum[..., :-w - 1]) / w
+        return out
+
+
+class ExponentialSmoothingForecaster(Forecaster):
+    name = "exponential_smoothing"
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+
+    def _levels(self, series):
+        # level[t] = alpha * x[t] + (1 - alpha) * level[t-1]; satu iterasi
+        # per hari, semua baris (produk) diperbarui sekaligus
+        a = self.alpha
+        levels = np.empty(series.shape)
+        level = series[..., 0]
+        for t in range(series.shape[-1]):
+            level = a * series[..., t] + (1 - a) * level
+            levels[..., t] = level
+        return levels
+
+    def predict(self, series, horizon=1):
+        return _flat(self._levels(series)[..., -1], horizon)
+
+    def fitted(self, series):
+        out = np.full(series.shape, np.nan)
+        out[..., 1:] = self._levels(series)[..., :-1]
+        return out
+
+
+class SeasonalNaiveForecaster(Forecaster):
+    name = "seasonal_naive"
+
+    def __init__(self, season=7):
+        self.season = season
+        self.min_length = season
+
+    def predict(self, series, horizon=1):
+        # Ulangi musim terakhir sepanjang horizon
+        last = series[..., -self.season:]
+        return last[..., np.arange(horizon) % self.season]
+
+    def fitted(self, series):
+        out = np.full(series.shape, np.nan)
+        out[..., self.season:] = series[..., :-self.season]
+        return out
+
+
+# ================= LSTM =================
+class LSTMForecaster(Forecaster):
+    name = "lstm"
+
+    def __init__(self, n_steps=7, epochs=50):
+        self.n_steps = n_steps
+        self.epochs = epochs
+        self.min_length = n_steps + 1
+
+    def run(self, series, umkm_id=None, horizon=1):
+        from services.prediksi_service import lstm_predict_sales
+
+        hasil, mae, rmse = lstm_predict_sales(
+            list(series), self.n_steps, self.epochs,
+            umkm_id=umkm_id, horizon=horizon
+        )
+        if hasil is None:
+            return None
+        return result(hasil, mae, rmse, self.name)
+
+
+BASELINES = {
+    e.name: e for e in (
+        MovingAverageForecaster(),
+        ExponentialSmoothingForecaster(),
+        SeasonalNaiveForecaster(),
+    )
+}
+ENGINES = dict(BASELINES, lstm=LSTMForecaster())
+
+
+# ================= PEMILIHAN ENGINE =================
+def best_baseline(series):
+    """(engine, MAE backtest) baseline terbaik, atau (None, None)."""
+    series = np.asarray(series, dtype=float)
+
+    best, best_mae = None, None
+    for engine in BASELINES.values():
+        if len(series) <= engine.min_length:
+            continue
+        mae, _ = engine.backtest(series)
+        if mae is not None and (best_mae is None or mae < best_mae):
+            best, best_mae = engine, mae
+    return best, best_mae
+
+
+def _lstm_candidate(length, mean, baseline_mae, floor):
+    """
+    Apakah LSTM layak dilatih (array untuk banyak baris): deret cukup
+    panjang, MAE relatif baseline > FORECAST_BASELINE_MAX_ERROR, dan
+    baseline masih cukup jauh di atas noise_floor sehingga LSTM mungkin
+    menang minimal FORECAST_LSTM_MIN_GAIN. Deret jarang bervolume kecil
+    punya MAE relatif tinggi karena noise saja (≈ 0.8/√λ); di sana LSTM
+    tidak bisa lebih baik dari baseline.
+
+    MAE backtest dihitung dari sedikit titik uji, jadi batas noise diberi
+    margin dua standard error (SE relatif MAE ≈ 0.75/√n).
+    """
+    if length < Config.FORECAST_LSTM_MIN_DAYS:
+        return np.zeros(np.shape(baseline_mae), dtype=bool)
+    relative = baseline_mae / np.where(mean > 0, mean, 1.0)
+    n_test = length - _split(length)
+    floor = floor * (1 + 2 * 0.75 / np.sqrt(n_test))
+    headroom = baseline_mae * (1 - Config.FORECAST_LSTM_MIN_GAIN) > floor
+    return (relative > Config.FORECAST_BASELINE_MAX_ERROR) & headroom
+
+
+def beats_baseline(lstm_mae, baseline_mae):
+    """LSTM hanya dipakai bila MAE backtest-nya lebih kecil dari baseline."""
+    if lstm_mae is None:
+        return False
+    if baseline_mae is None:
+        return True
+    return lstm_mae < baseline_mae * (1 - Config.FORECAST_LSTM_MIN_GAIN)
+
+
+def select_engine(series):
+    """
+    Pilih engine untuk deret ini: baseline dengan MAE backtest terkecil,
+    atau LSTM bila layak dicoba (lihat _lstm_candidate). LSTM hasil
+    pilihan ini tetap dibandingkan dengan baseline setelah dilatih
+    (forecast / choose_result).
+    """
+    series = np.asarray(series, dtype=float)
+    best, best_mae = best_baseline(series)
+
+    if best is None:
+        return ENGINES["lstm"] if len(series) >= Config.FORECAST_LSTM_MIN_DAYS else None
+
+    mean = float(np.mean(np.abs(series)))
+    if _lstm_candidate(len(series), mean, best_mae, float(noise_floor(series))):
+        return ENGINES["lstm"]
+    return best
+
+
+def choose_result(lstm_result, series, horizon=1):
+    """Hasil LSTM bila mengalahkan baseline terbaik, selain itu hasil baseline."""
+    best, best_mae = best_baseline(series)
+    if best is None:
+        return lstm_result
+    if lstm_result is not None and beats_baseline(lstm_result["mae"], best_mae):
+        return lstm_result
+    return best.run(series, horizon=horizon)
+
+
+def get_engine(name, series):
+    if name in (None, "auto"):
+        return select_engine(series)
+    if name not in ENGINES:
+        raise ValueError("engine tidak dikenal: %s (pilihan: auto, %s)" % (
+            name, ", ".join(ENGINES)
+        ))
+    return ENGINES[name]
+
+
+def forecast(series, engine="auto", umkm_id=None, horizon=1):
+    """Prediksi horizon hari ke depan dengan engine terpilih, atau None."""
+    selected = get_engine(engine, series)
+    if selected is None:
+        return None
+    hasil = selected.run(series, umkm_id=umkm_id, horizon=horizon)
+    if engine in (None, "auto") and selected.name == "lstm":
+        return choose_result(hasil, series, horizon)
+    return hasil
+
+
+# ================= BANYAK DERET (PRODUK x HARI) =================
+def _baseline_errors(matrix):
+    """MAE backtest per engine per baris: (nama engine, array (E, P))."""
+    names, maes = [], []
+    for engine in BASELINES.values():
+        if matrix.shape[1] <= engine.min_length:
+            continue
+        mae, _ = engine.backtest(matrix)
+        if mae is not None:
+            names.append(engine.name)
+            maes.append(mae)
+    return names, np.array(maes)
+
+
+def plan_matrix(matrix, engine="auto"):
+    """
+    Nama engine untuk setiap baris matriks (P, T).
+
+    Aturan sama dengan select_engine, tetapi backtest baseline dihitung
+    untuk semua baris sekaligus.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    P, T = matrix.shape
+    if engine not in (None, "auto"):
+        return [engine] * P
+
+    names, maes = _baseline_errors(matrix)
+    if not names:
+        return ["lstm" if T >= Config.FORECAST_LSTM_MIN_DAYS else None] * P
+
+    best = np.argmin(maes, axis=0)
+    lstm = _lstm_candidate(
+        T, np.mean(np.abs(matrix), axis=1), maes[best, np.arange(P)],
+        noise_floor(matrix)
+    )
+    return ["lstm" if use else names[i] for i, use in zip(best, lstm)]
+
+
+def _fallback(subset, rows, maes, horizon, results):
+    """Isi results dengan hasil baseline untuk baris LSTM yang kalah."""
+    names, base_maes = _baseline_errors(subset)
+    if not names:
+        return
+    best = np.argmin(base_maes, axis=0)
+    for k, i in enumerate(rows):
+        base_mae = float(base_maes[best[k], k])
+        if not beats_baseline(None if maes is None else float(maes[k]), base_mae):
+            engine = ENGINES[names[best[k]]]
+            results[i] = engine.run(subset[k], horizon=horizon)
+
+
+def forecast_matrix(matrix, horizon=1, plan=None):
+    """
+    Prediksi semua baris matriks (P, T) sekaligus.
+
+    Baris dengan engine baseline yang sama dihitung dalam satu operasi
+    NumPy; semua baris LSTM dilatih bersama dalam satu model bersama
+    (services.prediksi_service.lstm_predict_matrix). Mengembalikan list
+    dict hasil per baris (None jika tidak bisa diprediksi). Baris LSTM
+    yang MAE backtest-nya tidak mengalahkan baseline terbaiknya memakai
+    hasil baseline tersebut.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    plan = plan or plan_matrix(matrix)
+    results = [None] * len(plan)
+
+    for name in set(plan):
+        if name is None:
+            continue
+        rows = np.array([i for i, n in enumerate(plan) if n == name])
+        subset = matrix[rows]
+
+        if name == "lstm":
+            from services.prediksi_service import lstm_predict_matrix
+
+            preds, maes, rmses = lstm_predict_matrix(subset, horizon=horizon)
+            if preds is None:
+                continue
+            _fallback(subset, rows, maes, horizon, results)
+        else:
+            engine = ENGINES[name]
+            preds = engine.predict(subset, horizon)
+            maes, rmses = engine.backtest(subset)
+
+        for k, i in enumerate(rows):
+            if results[i] is not None:
+                continue
+            results[i] = result(
+                preds[k],
+                None if maes is None else float(maes[k]),
+                None if rmses is None else float(rmses[k]),
+                name
+            )
+    return results
@@ -0,0 +1,246 @@
+"""
+Import penjualan massal (CSV / JSON).
+
+Alur:
+1. Baris input diubah ke kolom NumPy (produk_id, tanggal, jumlah);
+   nilai yang tidak bisa dibaca menjadi NaN/NaT.
+2. Validasi dihitung sebagai mask untuk semua baris sekaligus.
+3. Harga semua produk diambil dengan satu query IN (...) yang dibatasi
+   ke UMKM pemilik, lalu dipetakan dengan searchsorted.
+4. total_harga = harga * jumlah dihitung sekaligus.
+5. Baris valid ditulis dengan bulk insert repository per chunk; setiap
+   chunk satu transaction() bersama update tabel rollup (harian per UMKM
+   dan per produk).
+
+Laporan berisi jumlah baris, error per baris (nomor baris input,
+mulai 1) dan kecepatan baris/detik.
+"""
+import csv
+import io
+import time
+from datetime import date, datetime
+
+import numpy as np
+
+from database.db import transaction
+from models.penjualan import penjualan as penjualan_repo
+from models.produk import produk as produk_repo
+from services import rollup_service as rollup
+from services.query_cache import query_cache
+
+CHUNK_SIZE = 1000
+MAX_ROWS = 200000
+MAX_ERRORS = 1000  # error per baris yang dimasukkan ke laporan
+INT_MAX = 2 ** 31 - 1  # batas kolom INT produk.id / penjualan.jumlah
+COLUMNS = ("produk_id", "tanggal", "jumlah")
+
+
+class InvalidImport(ValueError):
+    """File/payload tidak bisa dibaca sama sekali (bukan error per baris)."""
+
+
+# ================= PARSING =================
+def parse_csv(stream):
+    """Baris dict dari file CSV (header wajib: produk_id, tanggal, jumlah)."""
+    try:
+        if isinstance(stream, (bytes, bytearray)):
+            text = stream.decode("utf-8-sig")
+        else:
+            text = io.TextIOWrapper(stream, encoding="utf-8-sig").read()
+    except UnicodeDecodeError:
+        raise InvalidImport("file CSV harus berenkode UTF-8")
+
+    sample = text[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+
+    try:
+        reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+        missing = [c for c in COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise InvalidImport("kolom wajib tidak ada: %s" % ", ".join(missing))
+        return list(reader)
+    except csv.Error as e:
+        raise InvalidImport("file CSV tidak bisa dibaca: %s" % e)
+
+
+def parse_json(payload):
+    """Baris dict dari JSON: list baris atau {"rows": [...]}."""
+    rows = payload.get("rows") if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        raise InvalidImport('JSON harus berupa list baris atau {"rows": [...]}')
+    return rows
+
+
+# ================= KOLOM =================
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _to_day(value):
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return np.datetime64(value, "D")
+    try:
+        return np.datetime64(str(value).strip()[:10], "D")
+    except (TypeError, ValueError):
+        return np.datetime64("NaT")
+
+
+def to_columns(rows):
+    """Kolom NumPy dari list dict; nilai rusak menjadi NaN/NaT."""
+    produk = np.array([_to_float(r.get("produk_id")) for r in rows], dtype=float)
+    jumlah = np.array([_to_float(r.get("jumlah")) for r in rows], dtype=float)
+    tanggal = np.array([_to_day(r.get("tanggal")) for r in rows], dtype="datetime64[D]")
+    return produk, tanggal, jumlah
+
+
+# ================= VALIDASI =================
+def _bad_int(values, low):
+    """Mask nilai yang bukan bilangan bulat hingga di rentang [low, INT_MAX]."""
+    with np.errstate(invalid="ignore"):
+        return (~np.isfinite(values) | (values != np.round(values))
+                | (values < low) | (values > INT_MAX))
+
+
+def validate(produk, tanggal, jumlah, known_ids, today=None):
+    """
+    Mask baris valid dan daftar (indeks, pesan) error.
+
+    Setiap aturan adalah satu operasi vektor; pesan error hanya dibentuk
+    untuk baris yang gagal.
+    """
+    today = np.datetime64(today or date.today(), "D")
+
+    # inf / 1e20 lolos dari cek bilangan bulat tetapi tidak muat di INT
+    # (int(inf) dan astype(int64) gagal atau membungkus nilai)
+    rules = [
+        (_bad_int(produk, 1), "produk_id tidak valid"),
+        (np.isnat(tanggal), "tanggal tidak valid (format YYYY-MM-DD)"),
+        (~np.isnat(tanggal) & (tanggal > today), "tanggal di masa depan"),
+        (_bad_int(jumlah, 1), "jumlah harus bilangan bulat 1-%d" % INT_MAX),
+    ]
+
+    bad_id = rules[0][0]
+    unknown = ~bad_id & ~np.isin(np.where(bad_id, -1, produk), known_ids)
+    rules.append((unknown, "produk tidak ditemukan di UMKM ini"))
+
+    valid = np.ones(len(produk), dtype=bool)
+    errors = {}
+    for mask, message in rules:
+        for i in np.flatnonzero(mask):
+            errors.setdefault(int(i), []).append(message)
+        valid &= ~mask
+
+    return valid, sorted(errors.items())
+
+
+# ================= HARGA =================
+def load_prices(db, umkm_id, produk_ids):
+    """(id terurut, harga) untuk produk_id milik UMKM, satu query IN (...)."""
+    ids = [int(i) for i in produk_ids]
+    if not ids:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    rows = sorted(
+        (int(pid), float(harga)) for pid, harga in produk_repo.harga(db, umkm_id, ids)
+    )
+    return (np.array([r[0] for r in rows], dtype=np.int64),
+            np.array([r[1] for r in rows], dtype=float))
+
+
+# ================= IMPORT =================
+def _insert_chunk(db, cur, umkm_id, p, t, j, tot, now):
+    """Satu chunk baris valid + update rollup; dipanggil di dalam transaction()."""
+    penjualan_repo.create_many(db, [
+        (int(pid), day.item(), int(qty), float(total), now)
+        for pid, day, qty, total in zip(p, t, j, tot)
+    ])
+
+    # Rollup: satu update per tanggal di chunk ini
+    days, inverse = np.unique(t, return_inverse=True)
+    transaksi_hari = np.bincount(inverse)
+    jumlah_hari = np.bincount(inverse, weights=j)
+    omzet_hari = np.bincount(inverse, weights=tot)
+    for k, day in enumerate(days):
+        rollup.penjualan_changed(
+            cur, umkm_id, day.item(), int(transaksi_hari[k]),
+            int(jumlah_hari[k]), round(float(omzet_hari[k]), 2)
+        )
+
+    # penjualan_harian: satu baris per (produk, tanggal)
+    pairs, inverse = np.unique(
+        np.stack([p, t.astype(np.int64)], axis=1),
+        axis=0, return_inverse=True
+    )
+    inverse = inverse.ravel()
+    qty_pair = np.bincount(inverse, weights=j)
+    omzet_pair = np.bincount(inverse, weights=tot)
+    rollup.produk_harian_changed(cur, [
+        (umkm_id, int(pid), np.datetime64(int(day), "D").item(),
+         int(qty_pair[k]), round(float(omzet_pair[k]), 2))
+        for k, (pid, day) in enumerate(pairs)
+    ])
+
+
+def import_penjualan(db, umkm_id, rows, chunk_size=CHUNK_SIZE, dry_run=False):
+    started = time.monotonic()
+    if len(rows) > MAX_ROWS:
+        raise InvalidImport("maksimal %d baris per import" % MAX_ROWS)
+
+    produk, tanggal, jumlah = to_columns(rows)
+
+    candidates = np.unique(produk[~_bad_int(produk, 1)])
+    ids, harga = load_prices(db, umkm_id, candidates)
+
+    valid, errors = validate(produk, tanggal, jumlah, ids)
+
+    # total_harga = harga[produk] * jumlah untuk semua baris valid
+    idx = np.flatnonzero(valid)
+    produk_ok = produk[idx].astype(np.int64)
+    jumlah_ok = jumlah[idx].astype(np.int64)
+    tanggal_ok = tanggal[idx]
+    total_ok = np.round(harga[np.searchsorted(ids, produk_ok)] * jumlah_ok, 2)
+
+    inserted, aborted = 0, None
+    if not dry_run and len(idx):
+        now = datetime.now()
+        for start in range(0, len(idx), chunk_size):
+            end = start + chunk_size
+            p, t, j, tot = (produk_ok[start:end], tanggal_ok[start:end],
+                            jumlah_ok[start:end], total_ok[start:end])
+            try:
+                with transaction(db) as cur:
+                    _insert_chunk(db, cur, umkm_id, p, t, j, tot, now)
+            except Exception as e:
+                # Chunk sebelumnya sudah tersimpan; laporkan di mana berhenti
+                aborted = {"baris_valid_ke": start + 1, "error": str(e)}
+                break
+            inserted += len(p)
+
+        if inserted:
+            query_cache.invalidate("penjualan")
+
+    elapsed = time.monotonic() - started
+
+    return {
+        "total": len(rows),
+        "valid": int(len(idx)),
+        "inserted": inserted,
+        "failed": len(errors),
+        "dry_run": dry_run,
+        "aborted": aborted,
+        "errors": [
+            {"baris": i + 1, "data": rows[i], "error": "; ".join(msgs)}
+            for i, msgs in errors[:MAX_ERRORS]
+        ],
+        "errors_truncated": len(errors) > MAX_ERRORS,
+        "detik": round(elapsed, 3),
+        "rows_per_sec": round(len(rows) / elapsed, 1) if elapsed else None,
+    }
@@ -0,0 +1,192 @@
+"""
+Lapisan JSON untuk blueprint API di routes/.
+
+- Serialisasi orjson: tanggal ISO 8601, Decimal jadi angka, record dari
+  database.db jadi object. Jauh lebih hemat CPU daripada jsonify untuk
+  daftar ribuan baris.
+- ?fields=a,b,c memilih kolom (database.db.Projection); kolom yang tidak
+  diminta tidak ikut di-SELECT maupun dikirim.
+- ?stream=1 mengirim seluruh koleksi sebagai array JSON bertahap dari
+  cursor unbuffered (services/export_service.iter_query), memori worker
+  tetap datar. Tanpa stream, daftar memakai keyset pagination
+  (?limit=, ?after=, ?before=) seperti halaman web.
+
+Bentuk respons mengikuti API lama: {"status", "message", "data"}, plus
+"next"/"prev" untuk halaman.
+"""
+from decimal import Decimal
+
+import orjson
+from flask import Response, request, session, stream_with_context
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from jwt.exceptions import InvalidTokenError
+
+from database.db import InvalidFields
+from services.export_service import iter_query
+from services.pagination import InvalidCursor
+
+MIMETYPE = "application/json"
+
+
+class ApiError(Exception):
+    """Kesalahan yang dijawab sebagai JSON {"status": false, "message"}."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+# ================= SERIALISASI =================
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    asdict = getattr(obj, "_asdict", None)
+    if asdict is not None:
+        return asdict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError("Tidak bisa diserialisasi ke JSON: %r" % type(obj))
+
+
+def dumps(data):
+    # Hasil prediksi/import bisa berisi skalar atau array NumPy
+    return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def json_response(data, status=200, headers=None):
+    return Response(dumps(data), status=status, headers=headers, mimetype=MIMETYPE)
+
+
+def ok(data=None, message=None, status=200, **extra):
+    body = {"status": True}
+    if message is not None:
+        body["message"] = message
+    if data is not None:
+        body["data"] = data
+    body.update(extra)
+    return json_response(body, status)
+
+
+def error(message, status=400):
+    return json_response({"status": False, "message": message}, status)
+
+
+def page_response(page):
+    """Halaman keyset (services.pagination.Page) sebagai JSON."""
+    return json_response({
+        "status": True,
+        "data": page.items,
+        "limit": page.limit,
+        "next": page.next_cursor,
+        "prev": page.prev_cursor,
+        "filters": page.filters,
+    })
+
+
+# ================= STREAMING =================
+def wants_stream():
+    return request.args.get("stream") == "1"
+
+
+def array_chunks(fields, batches):
+    """
+    Potongan byte {"status":true,"data":[...]} dari batch baris tuple.
+
+    Satu batch diserialisasi sekaligus oleh orjson lalu kurung luarnya
+    dibuang, sehingga array bisa disambung tanpa menahan seluruh hasil.
+    """
+    yield b'{"status":true,"data":['
+    first = True
+    for rows in batches:
+        if not rows:
+            continue
+        chunk = dumps([dict(zip(fields, row)) for row in rows])[1:-1]
+        yield chunk if first else b"," + chunk
+        first = False
+    yield b"]}"
+
+
+def stream_response(projection, fields, filters):
+    """Seluruh hasil query projection sebagai array JSON streaming."""
+    sql, params = projection.query(fields, filters)
+    query = iter_query(sql, params)
+    next(query)  # nama kolom; kunci JSON memakai nama field projection
+
+    return Response(
+        stream_with_context(array_chunks(fields, query)),
+        mimetype=MIMETYPE,
+        # Jangan ditahan proxy (nginx) sampai selesai
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+
+# ================= REQUEST =================
+def fields(projection):
+    """Kolom dari ?fields= (InvalidFields -> 400)."""
+    return projection.fields(request.args.get("fields"))
+
+
+def current_user():
+    """
+    (user_id, role) dari session web atau JWT; None jika belum login.
+
+    Token dari /login: subject = id user (string), role di claim "role".
+    """
+    if session.get("user_id"):
+        return session["user_id"], session.get("role")
+
+    # Token format lama (identity dict) ditolak PyJWT (subject bukan
+    # string) atau lolos tanpa subject angka; keduanya: minta login ulang
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        if not identity:
+            return None
+        return int(identity), get_jwt().get("role")
+    except (InvalidTokenError, TypeError, ValueError):
+        raise ApiError("Token tidak valid, silakan login ulang", 401)
+
+
+def require_user():
+    user = current_user()
+    if user is None:
+        raise ApiError("Login diperlukan", 401)
+    return user
+
+
+def scope_umkm(filters, user, column):
+    """
+    Batasi query ke UMKM milik user (admin: semua UMKM). ?umkm_id=
+    mempersempit ke satu UMKM; UMKM milik orang lain menghasilkan daftar
+    kosong, bukan data mereka.
+    """
+    user_id, role = user
+    if role != "admin":
+        filters.where(
+            "%s IN (SELECT id FROM umkm WHERE user_id = %%s)" % column, user_id
+        )
+    return filters.equals("umkm_id", column)
+
+
+def body():
+    """Body JSON (object) request; ApiError bila bukan object JSON."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise ApiError("Body harus object JSON")
+    return data
+
+
+def require(data, *names):
+    missing = [n for n in names if data.get(n) in (None, "")]
+    if missing:
+        raise ApiError("Field wajib diisi: %s" % ", ".join(missing))
+
+
+# ================= BLUEPRINT =================
+def init_blueprint(bp):
+    """Error handler JSON untuk satu blueprint API."""
+    bp.register_error_handler(ApiError, lambda e: error(e.message, e.status))
+    bp.register_error_handler(InvalidFields, lambda e: error(str(e), 400))
+    bp.register_error_handler(InvalidCursor, lambda e: error(str(e), 400))
+    return bp
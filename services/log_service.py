@@ -1,8 +1,196 @@
-from database.db import get_connection
-
-def log_activity(user_id, aktivitas):
-    db = get_connection()
-    c = db.cursor()
-    c.execute("""INSERT INTO log_aktivitas_user (user_id, aktivitas)
-                 VALUES (%s,%s)""",(user_id, aktivitas))
-    db.commit()
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+from database.pool import get_pool
+
+logger = logging.getLogger(__name__)
+
+INSERT_PREFIX = """INSERT INTO log_aktivitas_user
+    (user_id, aktivitas, endpoint, metode_http, ip_address, created_at)
+    VALUES """
+ROW_PLACEHOLDER = "(%s,%s,%s,%s,%s,%s)"
+
+
+# ================= ACTIVITY LOG WRITER =================
+class ActivityLogWriter:
+    """
+    Pencatat log aktivitas asinkron.
+
+    Request hanya memasukkan baris ke antrean terbatas; thread penulis
+    mengambilnya dan menyimpan per batch dengan satu INSERT multi-baris
+    saat batch penuh (batch_size) atau interval flush habis.
+
+    Kebijakan saat antrean penuh:
+    - "drop"  : baris dibuang dan dihitung di stats()["dropped"]
+    - "block" : request menunggu maksimal block_timeout detik,
+                lalu baris dibuang jika antrean masih penuh
+
+    Batch yang gagal ditulis (mis. koneksi putus sesaat) dicoba sekali
+    lagi setelah retry_backoff detik sebelum dihitung sebagai failed.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queue=10000,
+                 policy="drop", block_timeout=0.5, retry_backoff=0.5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.retry_backoff = retry_backoff
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # Counter diubah dari thread request dan thread penulis
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+        self._enqueued = 0
+        self._dropped = 0
+        self._written = 0
+        self._failed = 0
+        self._batches = 0
+
+    # ----- lifecycle -----
+    def start(self):
+        with self._lock:
+            # Setelah fork (gunicorn) thread milik proses induk tidak ikut
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="activity-log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Hentikan thread penulis setelah antrean dikosongkan."""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    # ----- producer -----
+    def enqueue(self, row):
+        self.start()
+        try:
+            if self.policy == "block":
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+            return False
+        with self._stats_lock:
+            self._enqueued += 1
+        return True
+
+    # ----- consumer -----
+    def _drain(self, batch, deadline):
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = []
+            self._drain(batch, time.monotonic() + self.flush_interval)
+            if batch:
+                self._write(batch)
+
+        # Flush terakhir saat shutdown
+        while True:
+            batch = []
+            try:
+                while len(batch) < self.batch_size:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            if not batch:
+                break
+            self._write(batch)
+
+    def _insert(self, sql, params):
+        db = get_pool().connection()
+        try:
+            cur = db.cursor()
+            cur.execute(sql, params)
+            db.commit()
+            cur.close()
+        finally:
+            db.close()
+
+    def _write(self, batch):
+        sql = INSERT_PREFIX + ",".join([ROW_PLACEHOLDER] * len(batch))
+        params = [value for row in batch for value in row]
+
+        try:
+            self._insert(sql, params)
+        except Exception:
+            logger.warning(
+                "Gagal menulis %d log aktivitas, dicoba lagi", len(batch),
+                exc_info=True
+            )
+            # Saat shutdown _stop sudah diset: coba ulang tanpa menunggu
+            self._stop.wait(self.retry_backoff)
+            try:
+                self._insert(sql, params)
+            except Exception:
+                with self._stats_lock:
+                    self._failed += len(batch)
+                logger.exception("Gagal menulis %d log aktivitas", len(batch))
+                return
+
+        with self._stats_lock:
+            self._written += len(batch)
+            self._batches += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "policy": self.policy,
+                "enqueued": self._enqueued,
+                "dropped": self._dropped,
+                "written": self._written,
+                "failed": self._failed,
+                "batches": self._batches,
+            }
+
+
+writer = ActivityLogWriter(
+    batch_size=Config.LOG_BATCH_SIZE,
+    flush_interval=Config.LOG_FLUSH_INTERVAL,
+    max_queue=Config.LOG_QUEUE_SIZE,
+    policy=Config.LOG_QUEUE_POLICY,
+    retry_backoff=Config.LOG_RETRY_BACKOFF,
+)
+atexit.register(writer.stop)
+
+
+def log_activity(user_id, aktivitas, endpoint=None, metode_http=None,
+                 ip_address=None, created_at=None):
+    return writer.enqueue((
+        user_id,
+        aktivitas,
+        endpoint,
+        metode_http,
+        ip_address,
+        created_at or datetime.now()
+    ))
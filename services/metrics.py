@@ -0,0 +1,220 @@
+"""
+Metrik Prometheus di /metrics.
+
+- Latensi per route (histogram) dan jumlah request per status.
+- Waktu DB per request (dari services/profiler.py bila aktif).
+- Koneksi pool DB, job prediksi dan training LSTM yang sedang berjalan,
+  hit/miss query cache, kedalaman antrean log aktivitas.
+
+Multi-proses (gunicorn): set PROMETHEUS_MULTIPROC_DIR ke direktori
+kosong sebelum worker dijalankan. Setiap worker menulis nilainya ke file
+mmap di sana dan /metrics menggabungkan semuanya. Tambahkan di
+gunicorn.conf.py:
+
+    from services.metrics import child_exit
+
+Statistik komponen (pool, cache, antrean) adalah angka di memori tiap
+proses. Nilainya disalin ke metrik saat scrape dan paling sering sekali
+per METRICS_REFRESH_SECONDS di akhir request. Gauge dijumlahkan antar
+worker yang hidup; angka kumulatif dikirim sebagai selisih ke Counter
+sehingga tetap monoton walau worker diganti. Jumlah job prediksi per
+status dibaca dari tabel prediksi_job sehingga sama di semua worker.
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram,
+    REGISTRY, generate_latest, multiprocess
+)
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ================= REQUEST =================
+REQUESTS = Counter(
+    "umkm_http_requests_total", "Jumlah request HTTP",
+    ["endpoint", "method", "status"]
+)
+LATENCY = Histogram(
+    "umkm_http_request_duration_seconds", "Latensi request HTTP",
+    ["endpoint", "method"], buckets=BUCKETS
+)
+DB_TIME = Histogram(
+    "umkm_http_request_db_seconds", "Waktu query DB per request",
+    ["endpoint"], buckets=BUCKETS
+)
+IN_PROGRESS = Gauge(
+    "umkm_http_requests_in_progress", "Request yang sedang diproses",
+    multiprocess_mode="livesum"
+)
+
+# ================= KOMPONEN =================
+POOL_CONNECTIONS = Gauge(
+    "umkm_db_pool_connections", "Koneksi pool DB per keadaan",
+    ["state"], multiprocess_mode="livesum"
+)
+POOL_EVENTS = Counter(
+    "umkm_db_pool_events_total", "Checkout / timeout / koneksi rusak pool DB",
+    ["event"]
+)
+# Dibaca dari tabel prediksi_job: semua proses melaporkan angka yang sama
+JOBS = Gauge(
+    "umkm_prediksi_jobs", "Job prediksi yang disimpan per status",
+    ["status"], multiprocess_mode="livemax"
+)
+TRAINING = Gauge(
+    "umkm_prediksi_training_inflight",
+    "Training LSTM yang antre atau berjalan di process pool",
+    multiprocess_mode="livesum"
+)
+CACHE = Counter(
+    "umkm_query_cache_requests_total", "Hit/miss query cache per query",
+    ["query", "result"]
+)
+CACHE_ENTRIES = Gauge(
+    "umkm_query_cache_entries", "Entri cache lokal", multiprocess_mode="livesum"
+)
+LOG_QUEUE = Gauge(
+    "umkm_activity_log_queue_depth", "Baris log aktivitas dalam antrean",
+    multiprocess_mode="livesum"
+)
+LOG_EVENTS = Counter(
+    "umkm_activity_log_rows_total", "Baris log aktivitas per hasil",
+    ["result"]
+)
+
+
+# ================= SALIN STATISTIK KOMPONEN =================
+class _Collector:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = {}
+        self._refreshed = 0.0
+
+    def _delta(self, counter, key, value, **labels):
+        """Tambahkan kenaikan angka kumulatif sejak refresh terakhir."""
+        previous = self._last.get(key, 0)
+        if value > previous:
+            counter.labels(**labels).inc(value - previous)
+        self._last[key] = value
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._refreshed < Config.METRICS_REFRESH_SECONDS:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._refreshed = now
+            self._collect()
+        finally:
+            self._lock.release()
+
+    def _collect(self):
+        # Di-import di sini agar modul metrik tidak memaksa urutan import
+        from database.pool import get_pool
+        from services import log_service
+        from services.prediksi_job import job_queue
+        from services.query_cache import query_cache
+
+        pool = get_pool().stats()
+        for state in ("in_use", "idle", "opened", "waiting", "size"):
+            POOL_CONNECTIONS.labels(state=state).set(pool[state])
+        for event in ("checkouts", "timeouts", "broken"):
+            self._delta(POOL_EVENTS, "pool:" + event, pool[event], event=event)
+
+        try:
+            jobs = job_queue.stats()
+        except Exception:
+            # Scrape/request tidak boleh gagal karena metrik job
+            logger.warning("Gagal membaca status job prediksi", exc_info=True)
+            jobs = {}
+        for status, count in jobs.items():
+            JOBS.labels(status=status).set(count)
+        TRAINING.set(job_queue.inflight())
+
+        cache = query_cache.stats()
+        CACHE_ENTRIES.set(cache.get("entries") or 0)
+        for name, counts in cache["queries"].items():
+            for result in ("hits", "misses"):
+                self._delta(CACHE, "cache:%s:%s" % (name, result),
+                            counts[result], query=name, result=result)
+
+        log = log_service.writer.stats()
+        LOG_QUEUE.set(log["queue_depth"])
+        for result in ("written", "dropped", "failed"):
+            self._delta(LOG_EVENTS, "log:" + result, log[result], result=result)
+
+
+collector = _Collector()
+
+
+# ================= HOOK FLASK =================
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    IN_PROGRESS.inc()
+
+
+def _finish_request(response):
+    started = g.pop("metrics_started", None)
+    if started is None:
+        return response
+
+    IN_PROGRESS.dec()
+    endpoint = request.endpoint or "<tanpa endpoint>"
+    LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+    REQUESTS.labels(endpoint, request.method, str(response.status_code)).inc()
+
+    # after_request berjalan terbalik dari urutan daftar: profiler didaftarkan
+    # lebih dulu sehingga profilnya masih ada di g di sini
+    profile = g.get("profile")
+    if profile is not None:
+        DB_TIME.labels(endpoint).observe(profile.db_time)
+
+    collector.refresh()
+    return response
+
+
+def _request_failed(exc=None):
+    # after_request tidak dipanggil bila route melempar exception
+    if g.pop("metrics_started", None) is not None:
+        IN_PROGRESS.dec()
+
+
+def metrics_view():
+    if Config.METRICS_TOKEN and (
+        request.headers.get("Authorization") != "Bearer " + Config.METRICS_TOKEN
+    ):
+        return Response("Unauthorized\n", status=401, mimetype="text/plain")
+
+    collector.refresh(force=True)
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def child_exit(server, worker):
+    """Hook gunicorn: buang gauge live milik worker yang berhenti."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def init_app(app):
+    if not Config.METRICS_ENABLED:
+        return
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_request_failed)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+
+from config import Config
+
+
+def series_hash(series):
+    """Hash stabil untuk deret penjualan (tanpa perlu NumPy)."""
+    h = hashlib.sha256()
+    h.update(",".join(repr(float(v)) for v in series).encode())
+    return h.hexdigest()
+
+
+# ================= MODEL REGISTRY =================
+class ModelRegistry:
+    """
+    Cache model LSTM terlatih di disk lokal.
+
+    Satu entri = satu direktori <root>/<key>/ berisi model.keras,
+    scaler.pkl dan meta.json. Key adalah hash dari deret input, n_steps,
+    epochs dan horizon, sehingga data yang tidak berubah langsung
+    mengembalikan hasil dari meta.json tanpa memuat TensorFlow.
+
+    Per UMKM disimpan penunjuk ke entri terakhir (<root>/umkm/<id>.json)
+    untuk warm-start: jika deret baru hanya menambah sedikit hari di
+    belakang deret lama, model lama dilanjutkan (fine-tune), bukan dilatih
+    ulang dari nol.
+
+    Ukuran total dibatasi max_bytes; entri yang paling lama tidak dipakai
+    (mtime direktori) dihapus lebih dulu.
+    """
+
+    def __init__(self, root, max_bytes, warm_start_max_new=30):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.warm_start_max_new = warm_start_max_new
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.warm_starts = 0
+        self.evictions = 0
+
+    # ----- path -----
+    def key(self, series, n_steps, epochs, horizon=1):
+        return hashlib.sha256(
+            ("%s:%d:%d:%d" % (series_hash(series), n_steps, epochs, horizon)).encode()
+        ).hexdigest()[:32]
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def _pointer_path(self, umkm_id):
+        return os.path.join(self.root, "umkm", "%s.json" % umkm_id)
+
+    def _read_json(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    # ----- lookup -----
+    def cached_result(self, series, n_steps, epochs, horizon=1):
+        """Hasil prediksi tersimpan untuk deret yang persis sama, atau None."""
+        key = self.key(series, n_steps, epochs, horizon)
+        meta = self._read_json(os.path.join(self._entry_dir(key), "meta.json"))
+        if meta is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(self._entry_dir(key))
+        return meta["result"]
+
+    def warm_start(self, umkm_id, series, n_steps, epochs, horizon=1):
+        """
+        Path model dan scaler untuk fine-tuning, atau None.
+
+        Syarat: deret lama adalah awalan dari deret baru dan jumlah hari
+        baru tidak lebih dari warm_start_max_new.
+        """
+        if umkm_id is None:
+            return None
+
+        pointer = self._read_json(self._pointer_path(umkm_id))
+        if not pointer or pointer["n_steps"] != n_steps:
+            return None
+        if pointer.get("horizon", 1) != horizon:
+            return None
+
+        old_len = pointer["series_len"]
+        new_points = len(series) - old_len
+        if not 0 < new_points <= self.warm_start_max_new:
+            return None
+        if series_hash(series[:old_len]) != pointer["series_hash"]:
+            return None
+
+        entry = self._entry_dir(pointer["key"])
+        model_path = os.path.join(entry, "model.keras")
+        if not os.path.exists(model_path):
+            return None
+
+        with open(os.path.join(entry, "scaler.pkl"), "rb") as f:
+            scaler = pickle.load(f)
+
+        self._touch(entry)
+        self.warm_starts += 1
+        return model_path, scaler
+
+    # ----- store -----
+    def put(self, umkm_id, series, n_steps, epochs, model, scaler, result,
+            horizon=1):
+        key = self.key(series, n_steps, epochs, horizon)
+        os.makedirs(self.root, exist_ok=True)
+
+        # Tulis ke direktori sementara lalu rename (atomik antar proses)
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            model.save(os.path.join(tmp, "model.keras"))
+            with open(os.path.join(tmp, "scaler.pkl"), "wb") as f:
+                pickle.dump(scaler, f)
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump({
+                    "umkm_id": umkm_id,
+                    "n_steps": n_steps,
+                    "epochs": epochs,
+                    "horizon": horizon,
+                    "series_len": len(series),
+                    "result": result,
+                    "created_at": time.time(),
+                }, f)
+
+            target = self._entry_dir(key)
+            if os.path.exists(target):
+                shutil.rmtree(tmp)
+            else:
+                os.rename(tmp, target)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        if umkm_id is not None:
+            self._write_pointer(umkm_id, {
+                "key": key,
+                "n_steps": n_steps,
+                "horizon": horizon,
+                "series_len": len(series),
+                "series_hash": series_hash(series),
+            })
+
+        self.evict()
+        return key
+
+    def _write_pointer(self, umkm_id, pointer):
+        path = self._pointer_path(umkm_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".%d.tmp" % os.getpid()
+        with open(tmp, "w") as f:
+            json.dump(pointer, f)
+        os.replace(tmp, path)
+
+    # ----- LRU -----
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return entries
+
+        for name in names:
+            path = os.path.join(self.root, name)
+            if name == "umkm" or name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = 0
+            for f in os.scandir(path):
+                size += f.stat().st_size
+            entries.append((os.stat(path).st_mtime, size, path))
+        return entries
+
+    def evict(self):
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "warm_starts": self.warm_starts,
+            "evictions": self.evictions,
+        }
+
+
+registry = ModelRegistry(
+    Config.MODEL_CACHE_DIR,
+    Config.MODEL_CACHE_MAX_MB * 1024 * 1024,
+    warm_start_max_new=Config.MODEL_WARM_START_MAX_NEW,
+)
@@ -0,0 +1,238 @@
+"""
+Keyset (cursor) pagination untuk halaman daftar.
+
+Halaman berikutnya diambil dengan WHERE (tanggal, id) < (nilai baris
+terakhir) ORDER BY tanggal DESC, id DESC LIMIT n, bukan OFFSET. Dengan
+index pada kolom kunci, halaman terakhir sama cepatnya dengan halaman
+pertama karena MySQL tidak perlu melewati baris-baris sebelumnya.
+
+Cursor adalah nilai kunci baris batas yang di-encode base64 dan dibawa
+lewat query string (?after=... atau ?before=...), bersama filter lain
+sehingga tautan halaman tetap memakai filter yang sama.
+"""
+import base64
+import json
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class InvalidCursor(ValueError):
+    """Cursor dari query string tidak bisa dibaca (dijawab 400)."""
+
+
+# ================= CURSOR =================
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return str(value)
+    if isinstance(value, (int, float, str)) or value is None:
+        return value
+    return str(value)
+
+
+def encode_cursor(values):
+    raw = json.dumps([_plain(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Nilai kunci dari cursor; InvalidCursor bila cursor rusak."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception:
+        raise InvalidCursor("cursor tidak valid")
+    if not isinstance(values, list):
+        raise InvalidCursor("cursor tidak valid")
+    return values
+
+
+# ================= FILTER =================
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Filters:
+    """
+    Kumpulan klausa WHERE dari query string.
+
+        f = Filters(request.args)
+        f.date_range("p.tanggal")
+        f.equals("umkm_id", "pr.umkm_id")
+        f.where("pr.umkm_id = %s", umkm_id)   # filter wajib (mis. tenant)
+
+    Nilai yang kosong atau tidak valid diabaikan.
+    """
+
+    def __init__(self, args):
+        self.args = args
+        self.clauses = []
+        self.params = []
+        self.active = {}
+
+    def where(self, clause, *params):
+        self.clauses.append(clause)
+        self.params.extend(params)
+        return self
+
+    def date_range(self, column, start="dari", end="sampai"):
+        dari = _parse_date(self.args.get(start))
+        sampai = _parse_date(self.args.get(end))
+        if dari:
+            self.where("%s >= %%s" % column, dari)
+            self.active[start] = dari.isoformat()
+        if sampai:
+            # Inklusif untuk kolom DATE maupun DATETIME
+            self.where("%s < %%s" % column, sampai + timedelta(days=1))
+            self.active[end] = sampai.isoformat()
+        return self
+
+    def sql(self):
+        """Klausa WHERE (dengan spasi di depan) atau string kosong."""
+        if not self.clauses:
+            return ""
+        return " WHERE " + " AND ".join(self.clauses)
+
+    def equals(self, name, column):
+        value = _parse_int(self.args.get(name))
+        if value is not None:
+            self.where("%s = %%s" % column, value)
+            self.active[name] = value
+        return self
+
+
+# ================= PAGE =================
+def _plain_row(row):
+    asdict = getattr(row, "_asdict", None)
+    return asdict() if asdict is not None else row
+
+
+class Page:
+    def __init__(self, items, limit, next_cursor, prev_cursor, filters):
+        self.items = items
+        self.limit = limit
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.filters = filters
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def _query(self, **cursor):
+        args = dict(self.filters)
+        if self.limit != DEFAULT_LIMIT:
+            args["limit"] = self.limit
+        args.update(cursor)
+        return urlencode(args)
+
+    @property
+    def next_query(self):
+        return self._query(after=self.next_cursor)
+
+    @property
+    def prev_query(self):
+        return self._query(before=self.prev_cursor)
+
+    @property
+    def first_query(self):
+        return self._query()
+
+    def to_dict(self):
+        return {
+            # Record dari database.db diubah ke dict agar bisa di-JSON-kan
+            "items": [_plain_row(row) for row in self.items],
+            "limit": self.limit,
+            "next": self.next_cursor,
+            "prev": self.prev_cursor,
+            "filters": self.filters,
+        }
+
+
+def page_limit(args, default=DEFAULT_LIMIT, maximum=MAX_LIMIT):
+    limit = _parse_int(args.get("limit")) or default
+    return max(1, min(limit, maximum))
+
+
+def keyset_page(cur, select, keys, filters, args=None, limit=None):
+    """
+    Satu halaman hasil, urut menurun menurut keys.
+
+    select  : "SELECT ... FROM ... JOIN ..." tanpa WHERE/ORDER BY
+    keys    : [(ekspresi SQL, nama kolom di hasil), ...], mis.
+              [("p.tanggal", "tanggal"), ("p.id", "id")]; kombinasi
+              harus unik (akhiri dengan primary key)
+    filters : Filters untuk WHERE dan tautan halaman
+    cur     : cursor dictionary=True, atau cursor record dari
+              database.db.Repository._page
+    """
+    args = filters.args if args is None else args
+    limit = limit or page_limit(args)
+
+    after, before = args.get("after"), args.get("before")
+    cursor = before or after
+    backward = bool(before)
+
+    clauses, params = list(filters.clauses), list(filters.params)
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise InvalidCursor("cursor tidak valid")
+        clauses.append("(%s) %s (%s)" % (
+            ", ".join(expr for expr, _ in keys),
+            ">" if backward else "<",
+            ", ".join(["%s"] * len(keys))
+        ))
+        params.extend(values)
+
+    order = "ASC" if backward else "DESC"
+    sql = "%s%s ORDER BY %s LIMIT %d" % (
+        select,
+        " WHERE " + " AND ".join(clauses) if clauses else "",
+        ", ".join("%s %s" % (expr, order) for expr, _ in keys),
+        limit + 1
+    )
+    cur.execute(sql, tuple(params))
+    rows = cur.fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+
+    def key_of(row):
+        return encode_cursor([row[name] for _, name in keys])
+
+    if backward:
+        # Datang dari halaman yang lebih lama, jadi halaman berikutnya ada
+        next_cursor = key_of(rows[-1]) if rows else None
+        prev_cursor = key_of(rows[0]) if rows and more else None
+    else:
+        next_cursor = key_of(rows[-1]) if rows and more else None
+        prev_cursor = key_of(rows[0]) if rows and after else None
+
+    return Page(rows, limit, next_cursor, prev_cursor, filters.active)
+
+
+def wants_json(request):
+    """Halaman daftar juga melayani JSON: ?format=json atau Accept JSON."""
+    if request.args.get("format") == "json":
+        return True
+    accept = request.accept_mimetypes
+    return accept["application/json"] > accept["text/html"]
@@ -0,0 +1,366 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, CancelledError, Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from mysql.connector import IntegrityError
+
+from config import Config
+from database.db import transaction
+from database.pool import get_pool
+from models.prediksi_job import prediksi_jobs
+from services.query_cache import query_cache
+from services.model_cache import registry
+from services.prediksi_service import (
+    DEFAULT_N_STEPS, DEFAULT_EPOCHS, last_complete_day, prediksi_rows, simpan_rows
+)
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+STATUSES = (QUEUED, RUNNING, DONE, FAILED, CANCELLED)
+
+TOTAL = "total"
+PRODUK = "produk"
+
+
+@contextmanager
+def _connection():
+    """Koneksi pool sendiri: dipakai dari request, callback dan proses worker."""
+    db = get_pool().connection()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ================= WORKER (PROSES TERPISAH) =================
+def run_job(job_id, fn, *args):
+    """
+    Dijalankan di proses worker: tandai job running lalu jalankan fn.
+    Job yang dibatalkan (dari worker web mana pun) sebelum sempat mulai
+    tidak dilatih sama sekali.
+    """
+    with _connection() as db, transaction(db):
+        started = prediksi_jobs.start(db, job_id)
+    if not started:
+        raise CancelledError()
+    return fn(*args)
+
+
+def train_prediksi(umkm_id, sales_series, engine="auto", horizon=1):
+    """Dijalankan di proses worker: latih model dan kembalikan hasilnya."""
+    from services.forecaster import forecast
+
+    return forecast(sales_series, engine=engine, umkm_id=umkm_id, horizon=horizon)
+
+
+def train_prediksi_produk(produk_ids, matrix, horizon=1, plan=None):
+    """Dijalankan di proses worker: prediksi semua produk sekaligus."""
+    from services.forecaster import forecast_matrix
+
+    return produk_result(produk_ids, forecast_matrix(matrix, horizon, plan))
+
+
+def produk_result(produk_ids, results):
+    produk = [
+        dict(r, produk_id=produk_id)
+        for produk_id, r in zip(produk_ids, results) if r is not None
+    ]
+    if not produk:
+        return None
+    return {"level": "produk", "produk": produk}
+
+
+def simpan_prediksi(umkm_id, result, end=None):
+    """end: hari terakhir deret yang dilatih (awal tanggal_prediksi)."""
+    now = datetime.now()
+    if result.get("level") == "produk":
+        rows = [
+            row for r in result["produk"]
+            for row in prediksi_rows(umkm_id, r["produk_id"], r, now, end)
+        ]
+    else:
+        rows = prediksi_rows(umkm_id, None, result, now, end)
+
+    with _connection() as db, transaction(db) as cur:
+        simpan_rows(cur, rows)
+    query_cache.invalidate("prediksi_penjualan")
+
+
+# ================= JOB =================
+def _json_default(obj):
+    # Skalar/array NumPy dari forecaster
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError("Tidak bisa diserialisasi: %r" % type(obj))
+
+
+class PrediksiJob:
+    """Status satu job, dibaca dari tabel prediksi_job."""
+
+    def __init__(self, row):
+        self.id = row.id
+        self.umkm_id = row.umkm_id
+        self.user_id = row.user_id
+        self.level = row.level
+        self.horizon = row.horizon
+        self.status = row.status
+        self.result = json.loads(row.result) if row.result else None
+        self.error = row.error
+        self.cancel_requested = bool(row.cancel_requested)
+        self.created_at = row.created_at
+        self.finished_at = row.finished_at
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "umkm_id": self.umkm_id,
+            "level": self.level,
+            "horizon": self.horizon,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+# ================= JOB QUEUE =================
+class PrediksiJobQueue:
+    """
+    Antrean job prediksi tanpa broker.
+
+    Engine dipilih otomatis (services/forecaster.py). Baseline NumPy dan
+    hasil LSTM yang sudah ada di cache langsung selesai saat submit.
+    Training LSTM berjalan di ProcessPoolExecutor (start method "spawn" karena
+    TensorFlow tidak aman di-fork), sehingga worker web langsung kembali.
+
+    Status job disimpan di tabel prediksi_job (migrasi 0005), bukan di
+    memori, sehingga semua worker gunicorn melihat job yang sama. Satu
+    UMKM hanya boleh punya satu job aktif per level (total / produk),
+    dijaga index UNIQUE di MySQL; submit kedua mengembalikan job yang
+    sama. Job yang masih antre dibatalkan sebelum dilatih, job yang sudah
+    berjalan ditandai batal dan hasilnya tidak disimpan. Job aktif yang
+    melewati PREDIKSI_JOB_TIMEOUT (mis. worker pemiliknya mati) dianggap
+    gagal agar UMKM bisa membuat job baru.
+    """
+
+    def __init__(self, max_workers=2, retention=3600, timeout=3600):
+        self.max_workers = max_workers
+        self.retention = retention
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        # Future job milik proses ini (untuk cancel dan metrik in-flight)
+        self._futures = {}
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._pid = os.getpid()
+        return self._executor
+
+    def _pool_submit(self, fn, *args):
+        with self._lock:
+            try:
+                return self._get_executor().submit(fn, *args)
+            except BrokenProcessPool:
+                self._executor = None
+                return self._get_executor().submit(fn, *args)
+
+    def _active(self, db, umkm_id, level):
+        """Job aktif (umkm_id, level) setelah melepas job yang kedaluwarsa."""
+        now = datetime.now()
+        prediksi_jobs.expire(
+            db, umkm_id, level, now - timedelta(seconds=self.timeout),
+            "Job melewati batas waktu", now
+        )
+        row = prediksi_jobs.active(db, umkm_id, level)
+        return PrediksiJob(row) if row else None
+
+    # ----- public -----
+    def _submit(self, umkm_id, user_id, horizon, level, plan):
+        """
+        plan() mengembalikan salah satu: ("done", hasil) untuk hasil yang
+        langsung tersedia, atau ("pool", fn, args) untuk training di
+        process pool. plan() dijalankan tanpa lock/transaksi (backtest
+        baseline deret panjang tidak boleh menahan submit lain); bila
+        sementara itu UMKM yang sama sudah mendapat job, hasil plan dibuang.
+        """
+        with _connection() as db:
+            with transaction(db):
+                now = datetime.now()
+                prediksi_jobs.prune(db, now - timedelta(seconds=self.retention))
+                active = self._active(db, umkm_id, level)
+            if active is not None:
+                return active
+
+            step = plan()
+
+            job_id = uuid.uuid4().hex
+            try:
+                with transaction(db):
+                    prediksi_jobs.create(
+                        db, job_id, umkm_id, user_id, level, horizon,
+                        datetime.now()
+                    )
+            except IntegrityError:
+                # Worker lain lebih dulu membuat job untuk UMKM/level ini
+                with transaction(db):
+                    active = self._active(db, umkm_id, level)
+                if active is not None:
+                    return active
+                raise
+
+        if step[0] == "done":
+            future = Future()
+            future.set_result(step[1])
+        else:
+            future = self._pool_submit(run_job, job_id, step[1], *step[2])
+
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f, job_id=job_id: self._finish(job_id, f))
+        return self.get(job_id)
+
+    def submit(self, umkm_id, user_id, sales_series, horizon=1):
+        """Prediksi total penjualan UMKM."""
+        def plan():
+            # Baseline NumPy cukup cepat untuk langsung dihitung di sini;
+            # hanya LSTM yang dikirim ke process pool
+            from services.forecaster import (
+                choose_result, select_engine, result as forecast_result
+            )
+
+            engine = select_engine(sales_series)
+            if engine is None:
+                return ("done", None)
+            if engine.name != "lstm":
+                return ("done", engine.run(sales_series, horizon=horizon))
+
+            # Data tidak berubah sejak training terakhir: pakai hasil cache
+            cached = registry.cached_result(
+                sales_series, DEFAULT_N_STEPS, DEFAULT_EPOCHS, horizon
+            )
+            if cached is not None:
+                return ("done", choose_result(forecast_result(
+                    cached["prediksi"], cached["mae"], cached["rmse"], "lstm"
+                ), sales_series, horizon))
+            # "auto": worker melatih LSTM lalu membandingkannya dengan baseline
+            return ("pool", train_prediksi, (umkm_id, sales_series, "auto", horizon))
+
+        return self._submit(umkm_id, user_id, horizon, TOTAL, plan)
+
+    def submit_produk(self, umkm_id, user_id, produk_ids, matrix, horizon=1):
+        """Prediksi per produk dari matriks produk x hari."""
+        def plan():
+            from services.forecaster import plan_matrix, forecast_matrix
+
+            engines = plan_matrix(matrix)
+            if "lstm" not in engines:
+                return ("done", produk_result(
+                    produk_ids, forecast_matrix(matrix, horizon, engines)
+                ))
+            return ("pool", train_prediksi_produk,
+                    (produk_ids, matrix, horizon, engines))
+
+        return self._submit(umkm_id, user_id, horizon, PRODUK, plan)
+
+    def get(self, job_id):
+        with _connection() as db:
+            row = prediksi_jobs.get(db, job_id)
+        return PrediksiJob(row) if row else None
+
+    def active_for(self, umkm_id, level=None):
+        """Job aktif UMKM untuk level ini (None = level mana pun)."""
+        with _connection() as db:
+            row = prediksi_jobs.active(db, umkm_id, level)
+        return PrediksiJob(row) if row else None
+
+    def cancel(self, job_id):
+        with _connection() as db, transaction(db):
+            prediksi_jobs.cancel(db, job_id, datetime.now())
+
+        # Masih antre di proses ini: batalkan langsung. Job di worker lain
+        # berhenti sendiri saat mulai (run_job), yang sudah berjalan
+        # dibiarkan selesai dan hasilnya dibuang.
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()
+        return self.get(job_id)
+
+    def stats(self):
+        """Jumlah job tersimpan per status (semua worker)."""
+        with _connection() as db:
+            counts = prediksi_jobs.counts(db)
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def inflight(self):
+        """Job yang antre/berjalan di process pool milik proses ini."""
+        with self._lock:
+            return len(self._futures)
+
+    # ----- callback -----
+    def _finish(self, job_id, future):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+        status, result, error = DONE, None, None
+        try:
+            result = future.result()
+            if result is None:
+                status, error = FAILED, "Data penjualan belum cukup untuk prediksi"
+        except CancelledError:
+            status = CANCELLED
+        except Exception as e:
+            logger.exception("Job prediksi %s gagal", job_id)
+            status, error = FAILED, str(e)
+
+        try:
+            if status == DONE:
+                job = self.get(job_id)
+                if job is None or job.cancel_requested:
+                    return
+                try:
+                    # Deret dimuat tepat sebelum job dibuat: tanggal
+                    # prediksi mengikuti hari terakhir deret itu, bukan
+                    # saat training selesai (bisa sudah lewat tengah malam)
+                    simpan_prediksi(
+                        job.umkm_id, result,
+                        last_complete_day(job.created_at.date())
+                    )
+                except Exception as e:
+                    logger.exception("Gagal menyimpan hasil job %s", job_id)
+                    status, error = FAILED, str(e)
+
+            payload = json.dumps(result, default=_json_default) if status == DONE else None
+            with _connection() as db, transaction(db):
+                prediksi_jobs.finish(db, job_id, status, payload, error, datetime.now())
+        except Exception:
+            logger.exception("Gagal memperbarui status job %s", job_id)
+
+
+job_queue = PrediksiJobQueue(
+    max_workers=Config.PREDIKSI_WORKERS,
+    retention=Config.PREDIKSI_JOB_RETENTION,
+    timeout=Config.PREDIKSI_JOB_TIMEOUT
+)
@@ -1,2 +1,255 @@
-def prediksi(jumlah_hari):
-    return jumlah_hari * 12
+from datetime import date, datetime, timedelta
+from math import sqrt
+
+from services.model_cache import registry
+
+DEFAULT_N_STEPS = 7
+DEFAULT_EPOCHS = 50
+
+
+def last_complete_day(today=None):
+    """
+    Hari terakhir deret training: kemarin. Penjualan hari ini belum
+    lengkap dan akan menarik prediksi ke bawah; tanggal_prediksi pertama
+    adalah hari setelahnya (lihat prediksi_rows).
+    """
+    return (today or date.today()) - timedelta(days=1)
+
+
+def load_sales_daily(db, umkm_id):
+    """
+    Total penjualan harian UMKM sebagai timeseries.Series rapat (tanggal
+    awal + nilai), sampai last_complete_day(); hari tanpa penjualan 0.
+    Dipakai training dan grafik histori agar keduanya melihat deret sama.
+    """
+    from services.timeseries import umkm_series
+
+    return umkm_series(db, umkm_id, end=last_complete_day())
+
+
+def load_sales_series(db, umkm_id):
+    """Total penjualan harian UMKM, urut tanggal: np.ndarray rapat."""
+    return load_sales_daily(db, umkm_id).values
+
+
+def load_produk_matrix(db, umkm_id):
+    """
+    Penjualan harian semua produk UMKM dari agregat penjualan_harian.
+
+    Mengembalikan (produk_ids, tanggal_awal, matriks produk x hari)
+    sampai last_complete_day(); hari tanpa penjualan bernilai 0.
+    """
+    from services.timeseries import produk_matrix
+
+    produk_ids, series = produk_matrix(db, umkm_id, end=last_complete_day())
+    return produk_ids, series.start, series.values
+
+
+def prediksi(jumlah_hari, sales_series, engine="auto"):
+    """
+    Prediksi penjualan jumlah_hari ke depan.
+
+    Mengembalikan dict hasil forecaster (vektor "prediksi" per hari)
+    ditambah "total", atau None jika histori belum cukup.
+    """
+    from services.forecaster import forecast
+
+    hasil = forecast(sales_series, engine=engine, horizon=jumlah_hari)
+    if hasil is None:
+        return None
+    hasil["total"] = sum(hasil["prediksi"])
+    return hasil
+
+
+# ================= PENYIMPANAN =================
+INSERT_PREDIKSI = """
+    INSERT INTO prediksi_penjualan
+    (umkm_id, produk_id, tanggal_prediksi, hasil_prediksi, mae, rmse, created_at)
+    VALUES (%s,%s,%s,%s,%s,%s,%s)
+"""
+
+# Pointer prediksi terbaru per (UMKM, produk); produk_id 0 = total UMKM.
+# Halaman prediksi dan /admin/prediksi membaca pointer ini lalu mengambil
+# baris prediksinya lewat index (umkm_id, produk_id, created_at).
+UPSERT_TERAKHIR = """
+    INSERT INTO prediksi_terakhir (umkm_id, produk_id, created_at)
+    VALUES (%s,%s,%s)
+    ON DUPLICATE KEY UPDATE created_at = GREATEST(created_at, VALUES(created_at))
+"""
+
+
+def prediksi_rows(umkm_id, produk_id, hasil, created_at=None, end=None):
+    """
+    Satu baris prediksi_penjualan per tanggal_prediksi, mulai hari
+    setelah end (hari terakhir deret training; default
+    last_complete_day() dari created_at).
+    """
+    created_at = created_at or datetime.now()
+    end = end or last_complete_day(created_at.date())
+    return [
+        (umkm_id, produk_id, end + timedelta(days=i + 1), value,
+         hasil["mae"], hasil["rmse"], created_at)
+        for i, value in enumerate(hasil["prediksi"])
+    ]
+
+
+def simpan_rows(cur, rows):
+    """Simpan baris prediksi_rows() dan majukan pointer prediksi terakhir."""
+    cur.executemany(INSERT_PREDIKSI, rows)
+    cur.executemany(UPSERT_TERAKHIR, sorted({
+        (umkm_id, produk_id or 0, created_at)
+        for umkm_id, produk_id, _, _, _, _, created_at in rows
+    }))
+
+
+# ================= LSTM PREDICTION MODEL =================
+def lstm_predict_sales(sales_series, n_steps=DEFAULT_N_STEPS,
+                       epochs=DEFAULT_EPOCHS, umkm_id=None, horizon=1):
+    """
+    sales_series: list total penjualan harian
+    umkm_id: jika diisi, model disimpan di registry untuk warm-start
+    horizon: jumlah hari ke depan; model memakai output langsung
+             Dense(horizon) sehingga seluruh vektor prediksi didapat
+             dari satu kali model.predict
+
+    Mengembalikan (list prediksi per hari, mae, rmse).
+    """
+
+    if len(sales_series) < n_steps + horizon:
+        return None, None, None
+
+    # ===== CACHE: DATA TIDAK BERUBAH =====
+    cached = registry.cached_result(sales_series, n_steps, epochs, horizon)
+    if cached is not None:
+        return cached["prediksi"], cached["mae"], cached["rmse"]
+
+    # ======= LSTM IMPORTS (LAZY) =======
+    # Di-import saat prediksi pertama agar modul ini murah di-import
+    import numpy as np
+    from services.windowing import sliding_windows, last_window
+    from sklearn.preprocessing import MinMaxScaler
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+    from tensorflow.keras.models import Sequential, load_model
+    from tensorflow.keras.layers import LSTM, Dense
+
+    series = np.array(sales_series, dtype=float).reshape(-1, 1)
+    warm = registry.warm_start(umkm_id, sales_series, n_steps, epochs, horizon)
+
+    # ===== NORMALIZATION =====
+    if warm:
+        # Lanjutkan scaler lama; rentang diperluas bila ada nilai baru
+        model_path, scaler = warm
+        scaler.partial_fit(series)
+    else:
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        scaler.fit(series)
+    data = scaler.transform(series)
+
+    def inverse(values):
+        return scaler.inverse_transform(values.reshape(-1, 1)).reshape(values.shape)
+
+    # ===== CREATE SEQUENCE =====
+    # y: (N, horizon) = nilai horizon hari setelah tiap window
+    X, y = sliding_windows(data, n_steps, horizon=horizon)
+
+    # ===== TRAIN TEST SPLIT =====
+    split = max(1, int(len(X) * 0.8))
+    X_train, X_test = X[:split], X[split:]
+    y_train, y_test = y[:split], y[split:]
+
+    # ===== MODEL =====
+    if warm:
+        # Warm-start: fine-tune bobot lama dengan epoch lebih sedikit
+        model = load_model(model_path)
+        model.fit(X_train, y_train, epochs=max(1, epochs // 5), verbose=0)
+    else:
+        model = Sequential()
+        model.add(LSTM(50, activation='relu', input_shape=(n_steps, 1)))
+        model.add(Dense(horizon))
+        model.compile(optimizer='adam', loss='mse')
+
+        model.fit(X_train, y_train, epochs=epochs, verbose=0)
+
+    # ===== EVALUATION =====
+    if len(X_test):
+        y_pred = model.predict(X_test, verbose=0)
+        y_test_inv = inverse(np.asarray(y_test))
+        y_pred_inv = inverse(y_pred)
+
+        mae = float(mean_absolute_error(y_test_inv, y_pred_inv))
+        rmse = float(sqrt(mean_squared_error(y_test_inv, y_pred_inv)))
+    else:
+        mae = rmse = None
+
+    # ===== HORIZON PREDICTION (SATU KALI PREDICT) =====
+    next_pred = model.predict(last_window(data, n_steps), verbose=0)
+    hasil = [float(v) for v in inverse(next_pred)[0]]
+
+    # ===== SIMPAN KE REGISTRY =====
+    registry.put(umkm_id, sales_series, n_steps, epochs, model, scaler, {
+        "prediksi": hasil,
+        "mae": mae,
+        "rmse": rmse,
+    }, horizon)
+
+    return hasil, mae, rmse
+
+
+# ================= LSTM BERSAMA UNTUK BANYAK PRODUK =================
+def lstm_predict_matrix(matrix, n_steps=DEFAULT_N_STEPS,
+                        epochs=DEFAULT_EPOCHS, horizon=1):
+    """
+    Satu model LSTM bersama untuk semua baris matriks (produk x hari).
+
+    Tiap baris dinormalisasi min-max sendiri, window semua produk
+    digabung menjadi satu tensor training, dan prediksi semua produk
+    didapat dari satu model.predict. Mengembalikan (prediksi (P, horizon),
+    mae (P,), rmse (P,)); mae/rmse None jika data uji kosong.
+    """
+    import numpy as np
+    from services.windowing import batch_windows
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense
+
+    matrix = np.asarray(matrix, dtype=float)
+    P, T = matrix.shape
+    if T < n_steps + horizon + 1:
+        return None, None, None
+
+    # ===== NORMALIZATION PER PRODUK =====
+    lo = matrix.min(axis=1, keepdims=True)
+    span = matrix.max(axis=1, keepdims=True) - lo
+    span[span == 0] = 1.0
+    data = (matrix - lo) / span
+
+    # ===== WINDOW SEMUA PRODUK =====
+    X, y, group = batch_windows(data, n_steps, horizon=horizon)
+    W = T - n_steps - horizon + 1
+    position = np.tile(np.arange(W), P)
+    train = position < max(1, int(W * 0.8))
+
+    # ===== MODEL =====
+    model = Sequential()
+    model.add(LSTM(50, activation='relu', input_shape=(n_steps, 1)))
+    model.add(Dense(horizon))
+    model.compile(optimizer='adam', loss='mse')
+
+    model.fit(X[train], y[train], epochs=epochs, verbose=0)
+
+    # ===== EVALUATION PER PRODUK =====
+    mae = rmse = None
+    test = ~train
+    if test.any():
+        g = group[test]
+        y_pred = model.predict(X[test], verbose=0)
+        diff = (y_pred - y[test]) * span[g]
+        count = np.bincount(g, minlength=P) * horizon
+        count[count == 0] = 1
+        mae = np.bincount(g, np.abs(diff).sum(axis=1), minlength=P) / count
+        rmse = np.sqrt(np.bincount(g, (diff ** 2).sum(axis=1), minlength=P) / count)
+
+    # ===== PREDIKSI SEMUA PRODUK (SATU KALI PREDICT) =====
+    last = data[:, -n_steps:, None]
+    preds = model.predict(last, verbose=0) * span + lo
+
+    return preds, mae, rmse
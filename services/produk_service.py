@@ -1,40 +1,80 @@
-from models.produk import Produk
-from database.db import db
+from datetime import datetime
+
+from database.db import get_connection, transaction
+from models.penjualan import penjualan as penjualan_repo
+from models.produk import produk as produk_repo
+from services import rollup_service as rollup
+from services.query_cache import query_cache
+
+
+def get_all_produk(umkm_id=None):
+    db = get_connection()
+    if umkm_id is not None:
+        return produk_repo.by_umkm(db, umkm_id)
+    return produk_repo.all(db)
 
-def get_all_produk():
-    return Produk.query.all()
 
 def get_produk_by_id(produk_id):
-    return Produk.query.get(produk_id)
+    return produk_repo.get(get_connection(), produk_id)
+
 
 def create_produk(data, umkm_id):
-    produk = Produk(
-        umkm_id=umkm_id,
-        nama_produk=data['nama_produk'],
-        harga=data['harga'],
-        kategori=data.get('kategori')
-    )
-    db.session.add(produk)
-    db.session.commit()
-    return produk
+    db = get_connection()
+    with transaction(db) as cur:
+        produk_id = produk_repo.create(
+            db, umkm_id,
+            data['nama_produk'],
+            data.get('kategori'),
+            data['harga'],
+            data.get('stok', 0),
+            data.get('deskripsi'),
+            datetime.now()
+        )
+        rollup.produk_changed(cur, umkm_id, 1)
+    query_cache.invalidate("produk")
+    return produk_repo.get(db, produk_id)
+
 
 def update_produk(produk_id, data):
-    produk = Produk.query.get(produk_id)
+    db = get_connection()
+    produk = produk_repo.get(db, produk_id)
     if not produk:
         return None
 
-    produk.nama_produk = data.get('nama_produk', produk.nama_produk)
-    produk.harga = data.get('harga', produk.harga)
-    produk.kategori = data.get('kategori', produk.kategori)
+    with transaction(db):
+        produk_repo.update(
+            db, produk_id,
+            data.get('nama_produk', produk.nama_produk),
+            data.get('kategori', produk.kategori),
+            data.get('harga', produk.harga),
+            data.get('stok', produk.stok),
+            data.get('deskripsi', produk.deskripsi)
+        )
+    query_cache.invalidate("produk")
+    return produk_repo.get(db, produk_id)
 
-    db.session.commit()
-    return produk
 
 def delete_produk(produk_id):
-    produk = Produk.query.get(produk_id)
-    if not produk:
-        return False
+    """
+    Hapus produk beserta penjualannya dan kontribusinya di tabel rollup.
+
+    Produk dan penjualannya dikunci di dalam transaksi sehingga hapus
+    ganda (atau penjualan baru yang masuk bersamaan) tidak membuat counter
+    berkurang dua kali. Baris penjualan ikut dihapus agar counter sama
+    dengan hasil rollup_service.rebuild(). False bila produk tidak ada.
+    """
+    db = get_connection()
+    with transaction(db) as cur:
+        produk = produk_repo.lock(db, produk_id)
+        if not produk:
+            return False
 
-    db.session.delete(produk)
-    db.session.commit()
+        per_tanggal = penjualan_repo.per_tanggal_produk(db, produk_id)
+        penjualan_repo.delete_by_produk(db, produk_id)
+        produk_repo.delete(db, produk_id)
+        rollup.produk_changed(cur, produk.umkm_id, -1, produk_id=produk_id)
+        rollup.penjualan_removed(
+            cur, produk.umkm_id, [r.values() for r in per_tanggal]
+        )
+    query_cache.invalidate("produk", "penjualan")
     return True
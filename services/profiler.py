@@ -0,0 +1,300 @@
+"""
+Profiling per request.
+
+Setiap request mendapat RequestProfile di g. Cursor dari koneksi pool
+dibungkus ProfiledCursor (lewat PooledConnection.cursor_hook) yang
+mencatat jumlah query, waktu DB (execute + fetch) dan jumlah baris.
+Waktu render template diambil dari signal Flask.
+
+Di akhir request:
+- header Server-Timing (db, tpl, app) agar rinciannya terlihat di
+  DevTools browser;
+- ringkasan per endpoint diakumulasi di memori (/admin/profiling);
+- request/query yang melewati ambang ditulis ke log lambat sebagai satu
+  baris JSON. Teks SQL disimpan tanpa literal dan parameter hanya
+  dicatat tipenya, sehingga data pengguna tidak masuk log.
+
+Overhead per query hanya dua perf_counter() dan satu append, sehingga
+aman dibiarkan aktif di produksi (matikan dengan PROFILING_ENABLED=0).
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+
+from config import Config
+from database.pool import PooledConnection
+
+logger = logging.getLogger("umkm.profiler")
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|\b\d+(?:\.\d+)?\b")
+
+
+def redact_sql(sql):
+    """SQL satu baris dengan literal string/angka diganti '?'."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    return _LITERAL.sub("?", _WHITESPACE.sub(" ", sql).strip())
+
+
+def redact_params(params):
+    """Hanya tipe parameter yang dicatat, bukan nilainya."""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {k: type(v).__name__ for k, v in params.items()}
+    return [type(v).__name__ for v in params]
+
+
+# ================= PROFIL REQUEST =================
+class RequestProfile:
+    __slots__ = ("started", "queries", "db_time", "rows",
+                 "template_time", "template_started", "statements")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.template_time = 0.0
+        self.template_started = None
+        # [sql, params, detik, baris] per statement
+        self.statements = []
+
+    def begin(self, sql, params):
+        self.queries += 1
+        stmt = [sql, params, 0.0, 0]
+        self.statements.append(stmt)
+        return stmt
+
+    def add(self, stmt, elapsed, rows=0):
+        self.db_time += elapsed
+        self.rows += rows
+        stmt[2] += elapsed
+        stmt[3] += rows
+
+
+class ProfiledCursor:
+    """Pembungkus cursor MySQL; atribut lain diteruskan ke cursor asli."""
+
+    def __init__(self, cursor, profile):
+        self._cursor = cursor
+        self._profile = profile
+        self._stmt = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        # Iterasi langsung (for row in cur) dihitung per baris
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._stmt = self._profile.begin(operation, params)
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, *args, **kwargs)
+        finally:
+            self._profile.add(self._stmt, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        seq_params = list(seq_params)
+        self._stmt = self._profile.begin(
+            operation, seq_params[0] if seq_params else None
+        )
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, *args, **kwargs)
+        finally:
+            self._profile.add(self._stmt, time.perf_counter() - started)
+
+    def _fetch(self, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        if result is None:
+            rows = 0
+        elif isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 1
+        if self._stmt is not None:
+            self._profile.add(self._stmt, time.perf_counter() - started, rows)
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._fetch(self._cursor.fetchmany)
+        return self._fetch(self._cursor.fetchmany, size)
+
+
+def _wrap_cursor(cursor):
+    if has_request_context():
+        profile = g.get("profile")
+        if profile is not None:
+            return ProfiledCursor(cursor, profile)
+    return cursor
+
+
+# ================= RINGKASAN PER ENDPOINT =================
+class ProfileStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, wall, profile, slow):
+        with self._lock:
+            s = self._endpoints.get(endpoint)
+            if s is None:
+                s = self._endpoints[endpoint] = {
+                    "requests": 0, "slow": 0, "queries": 0, "rows": 0,
+                    "wall": 0.0, "wall_max": 0.0, "db": 0.0, "template": 0.0,
+                }
+            s["requests"] += 1
+            s["slow"] += slow
+            s["queries"] += profile.queries
+            s["rows"] += profile.rows
+            s["wall"] += wall
+            s["wall_max"] = max(s["wall_max"], wall)
+            s["db"] += profile.db_time
+            s["template"] += profile.template_time
+
+    def snapshot(self):
+        """Salinan mentah (detik) untuk eksportir metrik."""
+        with self._lock:
+            return {k: dict(v) for k, v in self._endpoints.items()}
+
+    def stats(self):
+        out = {}
+        for endpoint, s in self.snapshot().items():
+            n = s["requests"]
+            out[endpoint] = {
+                "requests": n,
+                "slow": s["slow"],
+                "avg_ms": round(s["wall"] / n * 1000, 2),
+                "max_ms": round(s["wall_max"] * 1000, 2),
+                "avg_db_ms": round(s["db"] / n * 1000, 2),
+                "avg_template_ms": round(s["template"] / n * 1000, 2),
+                "avg_queries": round(s["queries"] / n, 2),
+                "avg_rows": round(s["rows"] / n, 2),
+            }
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]["avg_ms"]))
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+
+stats = ProfileStats()
+
+
+# ================= HOOK FLASK =================
+def _start_request():
+    g.profile = RequestProfile()
+
+
+def _template_start(sender, template, context, **extra):
+    profile = g.get("profile")
+    if profile is not None:
+        profile.template_started = time.perf_counter()
+
+
+def _template_done(sender, template, context, **extra):
+    profile = g.get("profile")
+    if profile is not None and profile.template_started is not None:
+        profile.template_time += time.perf_counter() - profile.template_started
+        profile.template_started = None
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+def _finish_request(response):
+    profile = g.pop("profile", None)
+    if profile is None:
+        return response
+
+    wall = time.perf_counter() - profile.started
+    endpoint = request.endpoint or "<tanpa endpoint>"
+
+    slow_query_s = Config.PROFILING_SLOW_QUERY_MS / 1000.0
+    slow_queries = [s for s in profile.statements if s[2] >= slow_query_s]
+    slow = wall * 1000 >= Config.PROFILING_SLOW_REQUEST_MS
+
+    stats.record(endpoint, wall, profile, slow)
+
+    if Config.PROFILING_SERVER_TIMING:
+        response.headers.add("Server-Timing", ", ".join([
+            'db;dur=%.2f;desc="%d query, %d baris"' % (
+                profile.db_time * 1000, profile.queries, profile.rows),
+            "tpl;dur=%.2f" % (profile.template_time * 1000),
+            "app;dur=%.2f" % (wall * 1000),
+        ]))
+
+    if slow or slow_queries:
+        logger.warning(json.dumps({
+            "event": "slow_request" if slow else "slow_query",
+            "endpoint": endpoint,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "wall_ms": _ms(wall),
+            "db_ms": _ms(profile.db_time),
+            "template_ms": _ms(profile.template_time),
+            "queries": profile.queries,
+            "rows": profile.rows,
+            "slow_queries": [
+                {"sql": redact_sql(sql), "params": redact_params(params),
+                 "ms": _ms(elapsed), "rows": rows}
+                for sql, params, elapsed, rows in slow_queries
+            ],
+        }))
+
+    return response
+
+
+def _configure_logger():
+    if logger.handlers:
+        return
+    path = Config.PROFILING_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handler = RotatingFileHandler(path, maxBytes=10 * 1024 * 1024, backupCount=5)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def init_app(app):
+    if not Config.PROFILING_ENABLED:
+        return
+
+    _configure_logger()
+    PooledConnection.cursor_hook = _wrap_cursor
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_template_start, app)
+    template_rendered.connect(_template_done, app)
@@ -0,0 +1,252 @@
+"""
+Cache hasil query untuk halaman monitoring admin.
+
+Setiap entri punya TTL sendiri dan ditandai dengan tabel sumbernya.
+Invalidasi memakai nomor generasi per tabel: route yang menulis ke
+tabel memanggil invalidate("penjualan"), generasi tabel itu naik, dan
+semua key yang dibentuk dengan generasi lama otomatis tidak terpakai
+lagi (dibuang oleh LRU/TTL). Tidak perlu melacak key mana milik tabel
+mana.
+
+Backend:
+- "local" (default): LRU di memori proses, per worker. Generasi tabel
+  disimpan sebagai mtime file di QUERY_CACHE_GEN_DIR sehingga invalidasi
+  dari satu worker gunicorn terlihat di worker lain pada host yang sama
+  (tanpa direktori itu, generasi hanya di memori: satu proses saja).
+- "redis": dibagi antar worker/proses; generasi disimpan di Redis
+  sehingga invalidasi dari satu worker terlihat di semua worker.
+  Butuh paket redis (opsional).
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+MISSING = object()
+
+
+# ================= BACKEND: LOCAL LRU =================
+class LocalLRUBackend:
+    """
+    gen_dir: direktori generasi bersama; satu file per tabel, generasinya
+    st_mtime_ns file itu (satu stat() per tabel saat membentuk key).
+    None = counter di memori proses ini saja.
+    """
+
+    def __init__(self, max_entries=1024, gen_dir=None):
+        self.max_entries = max_entries
+        self.gen_dir = gen_dir
+        self._data = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        if gen_dir:
+            os.makedirs(gen_dir, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return MISSING
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _gen_path(self, name):
+        return os.path.join(self.gen_dir, name)
+
+    def _generation(self, name):
+        try:
+            return os.stat(self._gen_path(name)).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def counters(self, names):
+        if self.gen_dir:
+            return [self._generation(n) for n in names]
+        with self._lock:
+            return [self._counters.get(n, 0) for n in names]
+
+    def incr(self, name):
+        if not self.gen_dir:
+            with self._lock:
+                self._counters[name] = self._counters.get(name, 0) + 1
+            return
+
+        # mtime selalu maju walau dua invalidasi jatuh di tick jam yang sama
+        path = self._gen_path(name)
+        new = max(time.time_ns(), self._generation(name) + 1)
+        with open(path, "a"):
+            pass
+        os.utime(path, ns=(new, new))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {
+            "backend": "local",
+            "entries": len(self._data),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+# ================= BACKEND: REDIS =================
+class RedisBackend:
+    def __init__(self, url, prefix="umkm:qc:"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self._redis.get(self.prefix + key)
+        if raw is None:
+            return MISSING
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._redis.setex(
+            self.prefix + key, max(1, int(ttl)),
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        )
+
+    def counters(self, names):
+        if not names:
+            return []
+        values = self._redis.mget([self.prefix + "gen:" + n for n in names])
+        return [int(v or 0) for v in values]
+
+    def incr(self, name):
+        self._redis.incr(self.prefix + "gen:" + name)
+
+    def clear(self):
+        for key in self._redis.scan_iter(self.prefix + "*"):
+            self._redis.delete(key)
+
+    def stats(self):
+        return {"backend": "redis", "entries": None}
+
+
+# ================= QUERY CACHE =================
+class QueryCache:
+    """
+    Pemakaian:
+
+        rows = query_cache.get_or_load(
+            "admin_umkm", ("umkm", "produk", "penjualan"), 60,
+            lambda: fetch_rows(), params
+        )
+    """
+
+    def __init__(self, backend, default_ttl=60, enabled=True):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+        self.invalidations = 0
+        self.errors = 0
+        self._per_name = {}
+
+    def _key(self, name, tables, params):
+        generations = self.backend.counters(list(tables))
+        return "%s|%s|%r" % (
+            name,
+            ",".join("%s=%d" % (t, g) for t, g in zip(tables, generations)),
+            params
+        )
+
+    def _count(self, name, field):
+        with self._lock:
+            counts = self._per_name.setdefault(name, {"hits": 0, "misses": 0})
+            counts[field] += 1
+
+    def get_or_load(self, name, tables, ttl, loader, params=()):
+        """Nilai dari cache, atau hasil loader() yang lalu disimpan."""
+        if not self.enabled:
+            return loader()
+
+        try:
+            key = self._key(name, tables, params)
+            value = self.backend.get(key)
+        except Exception:
+            # Backend (mis. Redis) bermasalah: jangan gagalkan halaman
+            self.errors += 1
+            return loader()
+
+        if value is not MISSING:
+            self._count(name, "hits")
+            return value
+
+        self._count(name, "misses")
+        value = loader()
+        try:
+            self.backend.set(key, value, ttl or self.default_ttl)
+        except Exception:
+            self.errors += 1
+        return value
+
+    def invalidate(self, *tables):
+        """Panggil setelah commit yang mengubah tabel-tabel ini."""
+        for table in tables:
+            try:
+                self.backend.incr(table)
+            except Exception:
+                self.errors += 1
+        self.invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            per_name = {n: dict(c) for n, c in self._per_name.items()}
+
+        hits = sum(c["hits"] for c in per_name.values())
+        misses = sum(c["misses"] for c in per_name.values())
+        for counts in per_name.values():
+            total = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = round(counts["hits"] / total, 4) if total else 0.0
+
+        return dict(
+            self.backend.stats(),
+            enabled=self.enabled,
+            hits=hits,
+            misses=misses,
+            hit_rate=round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            invalidations=self.invalidations,
+            errors=self.errors,
+            queries=per_name,
+        )
+
+
+def _make_backend():
+    if Config.QUERY_CACHE_BACKEND == "redis":
+        return RedisBackend(Config.QUERY_CACHE_REDIS_URL)
+    return LocalLRUBackend(
+        Config.QUERY_CACHE_MAX_ENTRIES, Config.QUERY_CACHE_GEN_DIR or None
+    )
+
+
+query_cache = QueryCache(
+    _make_backend(),
+    default_ttl=Config.QUERY_CACHE_TTL,
+    enabled=Config.QUERY_CACHE_ENABLED,
+)
@@ -1,2 +1,135 @@
-def rekomendasi():
-    return ["Produk Terlaris", "Produk Diskon", "Produk Baru"]
+"""
+Rekomendasi produk berbasis aturan.
+
+Aturan ditulis deklaratif (RULES) dan dievaluasi untuk semua produk
+UMKM sekaligus dengan np.select: setiap kondisi adalah satu operasi
+vektor, aturan pertama yang cocok menang, dan DEFAULT dipakai bila tidak
+ada yang cocok. Ambang batas diambil dari Config sehingga bisa diubah
+tanpa menyentuh kode.
+
+Satu UMKM dengan ribuan produk cukup dua round trip: satu SELECT
+agregat fitur produk dan satu bulk INSERT hasilnya.
+"""
+import operator
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from config import Config
+from database.db import transaction
+from models.rekomendasi import rekomendasi as rekomendasi_repo
+
+# when: tuple kondisi (fitur, operator, ambang); ambang berupa nama kunci
+# THRESHOLDS atau angka. Semua kondisi dalam satu aturan di-AND.
+# alasan boleh memuat {window_days} (window fitur total_jual, hari).
+Rule = namedtuple("Rule", ["rekomendasi", "alasan", "when"])
+
+OPERATORS = {
+    ">=": operator.ge,
+    ">": operator.gt,
+    "<=": operator.le,
+    "<": operator.lt,
+    "==": operator.eq,
+}
+
+RULES = [
+    Rule("Tambah Stok", "Produk sangat laku dan stok mulai menipis",
+         (("total_jual", ">=", "laris"), ("stok", "<", "stok_tipis"))),
+    Rule("Pertahankan Stok", "Produk laris dan stabil",
+         (("total_jual", ">=", "laris"),)),
+    Rule("Promosikan Produk", "Penjualan rendah dalam {window_days} hari terakhir",
+         (("total_jual", "<", "sepi"),)),
+]
+DEFAULT = Rule("Evaluasi Produk", "Performa penjualan sedang", ())
+
+
+def thresholds():
+    return {
+        "laris": Config.REKOMENDASI_LARIS,
+        "stok_tipis": Config.REKOMENDASI_STOK_TIPIS,
+        "sepi": Config.REKOMENDASI_SEPI,
+    }
+
+
+# ================= FITUR =================
+def load_features(db, umkm_id, window_days=None):
+    """
+    Fitur semua produk UMKM dalam satu query.
+
+    Mengembalikan (produk_ids, nama_produk, {fitur: array}).
+    """
+    window_days = window_days or Config.REKOMENDASI_WINDOW_HARI
+    rows = rekomendasi_repo.fitur(db, umkm_id, window_days)
+
+    ids = np.array([r[0] for r in rows], dtype=np.int64)
+    names = [r[1] for r in rows]
+    features = {
+        "stok": np.array([r[2] or 0 for r in rows], dtype=float),
+        "total_jual": np.array([r[3] for r in rows], dtype=float),
+    }
+    return ids, names, features
+
+
+# ================= EVALUASI =================
+def _condition(rule, features, limits):
+    mask = np.ones(len(next(iter(features.values()))), dtype=bool)
+    for feature, op, threshold in rule.when:
+        value = limits[threshold] if isinstance(threshold, str) else threshold
+        mask &= OPERATORS[op](features[feature], value)
+    return mask
+
+
+def evaluate(features, rules=None, limits=None, default=DEFAULT):
+    """Indeks aturan terpilih per produk (len(rules) = default)."""
+    rules = RULES if rules is None else rules
+    limits = thresholds() if limits is None else limits
+
+    return np.select(
+        [_condition(rule, features, limits) for rule in rules],
+        np.arange(len(rules)),
+        default=len(rules)
+    )
+
+
+def rekomendasi(umkm_id, db=None, rules=None, limits=None, window_days=None):
+    """Rekomendasi untuk semua produk UMKM (tanpa menyimpan): list dict."""
+    if db is None:
+        from database.pool import get_db
+        db = get_db()
+
+    rules = RULES if rules is None else rules
+    window_days = window_days or Config.REKOMENDASI_WINDOW_HARI
+    ids, names, features = load_features(db, umkm_id, window_days)
+
+    if not len(ids):
+        return []
+
+    choice = evaluate(features, rules, limits)
+    table = list(rules) + [DEFAULT]
+    alasan = [rule.alasan.format(window_days=window_days) for rule in table]
+    return [
+        {
+            "produk_id": int(ids[i]),
+            "nama_produk": names[i],
+            "stok": int(features["stok"][i]),
+            "total_jual": int(features["total_jual"][i]),
+            "rekomendasi": table[c].rekomendasi,
+            "alasan": alasan[c],
+        }
+        for i, c in enumerate(choice)
+    ]
+
+
+def generate(db, umkm_id):
+    """Hitung dan simpan rekomendasi dengan satu bulk insert; jumlah baris."""
+    hasil = rekomendasi(umkm_id, db=db)
+    if not hasil:
+        return 0
+
+    now = datetime.now()
+    with transaction(db):
+        rekomendasi_repo.create_many(db, [
+            (r["produk_id"], r["rekomendasi"], r["alasan"], now) for r in hasil
+        ])
+    return len(hasil)
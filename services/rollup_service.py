@@ -0,0 +1,285 @@
+"""
+Tabel ringkasan (rollup) untuk dashboard.
+
+Counter global, per UMKM dan per hari diperbarui oleh route tulis di
+dalam transaksi yang sama dengan perubahan datanya, sehingga dashboard
+cukup membaca satu baris alih-alih COUNT(*)/SUM() ke seluruh tabel.
+penjualan_harian (per produk per hari) menjadi sumber deret waktu
+prediksi (services/timeseries.py).
+
+Tabel dibuat dan diisi pertama kali oleh migrasi 0001
+(python -m database.migrate upgrade). Bangun ulang dari nol:
+
+    python -m services.rollup_service rebuild
+"""
+import argparse
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS statistik_global (
+        id TINYINT PRIMARY KEY,
+        total_user INT NOT NULL DEFAULT 0,
+        total_umkm INT NOT NULL DEFAULT 0,
+        total_produk INT NOT NULL DEFAULT 0,
+        total_transaksi INT NOT NULL DEFAULT 0,
+        total_omzet DECIMAL(18,2) NOT NULL DEFAULT 0,
+        updated_at DATETIME NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS statistik_umkm (
+        umkm_id INT PRIMARY KEY,
+        total_produk INT NOT NULL DEFAULT 0,
+        total_transaksi INT NOT NULL DEFAULT 0,
+        total_jumlah BIGINT NOT NULL DEFAULT 0,
+        total_omzet DECIMAL(18,2) NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS statistik_harian (
+        umkm_id INT NOT NULL,
+        tanggal DATE NOT NULL,
+        total_transaksi INT NOT NULL DEFAULT 0,
+        total_jumlah BIGINT NOT NULL DEFAULT 0,
+        total_omzet DECIMAL(18,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (umkm_id, tanggal),
+        KEY idx_statistik_harian_tanggal (tanggal)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS penjualan_harian (
+        umkm_id INT NOT NULL,
+        produk_id INT NOT NULL,
+        tanggal DATE NOT NULL,
+        qty BIGINT NOT NULL DEFAULT 0,
+        omzet DECIMAL(18,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (umkm_id, produk_id, tanggal),
+        KEY idx_penjualan_harian_umkm_tanggal (umkm_id, tanggal),
+        KEY idx_penjualan_harian_produk (produk_id)
+    )
+    """,
+]
+
+FILL_PENJUALAN_HARIAN = """
+    INSERT INTO penjualan_harian (umkm_id, produk_id, tanggal, qty, omzet)
+    SELECT pr.umkm_id, p.produk_id, p.tanggal, SUM(p.jumlah), SUM(p.total_harga)
+    FROM penjualan p
+    JOIN produk pr ON p.produk_id = pr.id
+    GROUP BY pr.umkm_id, p.produk_id, p.tanggal
+"""
+
+
+def ensure_schema(cur):
+    for ddl in SCHEMA:
+        cur.execute(ddl)
+
+
+# ================= UPDATE INKREMENTAL =================
+# Semua fungsi di bawah hanya menjalankan statement di cursor yang
+# diberikan; commit dilakukan oleh route bersama perubahan datanya.
+
+def _global(cur, column, delta):
+    cur.execute("""
+        INSERT INTO statistik_global (id, {col}, updated_at)
+        VALUES (1, %s, NOW())
+        ON DUPLICATE KEY UPDATE {col} = {col} + VALUES({col}),
+                                updated_at = NOW()
+    """.format(col=column), (delta,))
+
+
+def user_changed(cur, delta=1):
+    _global(cur, "total_user", delta)
+
+
+def umkm_changed(cur, umkm_id, delta=1):
+    _global(cur, "total_umkm", delta)
+    if delta > 0:
+        cur.execute(
+            "INSERT IGNORE INTO statistik_umkm (umkm_id) VALUES (%s)",
+            (umkm_id,)
+        )
+    else:
+        cur.execute("DELETE FROM statistik_umkm WHERE umkm_id=%s", (umkm_id,))
+        cur.execute("DELETE FROM statistik_harian WHERE umkm_id=%s", (umkm_id,))
+        cur.execute("DELETE FROM penjualan_harian WHERE umkm_id=%s", (umkm_id,))
+
+
+def produk_changed(cur, umkm_id, delta=1, produk_id=None):
+    """
+    Tambah/kurangi jumlah produk. Saat produk dihapus (produk_id diisi)
+    baris penjualan_harian-nya ikut dibuang; counter penjualannya
+    dikurangi terpisah lewat penjualan_removed().
+    """
+    _global(cur, "total_produk", delta)
+    cur.execute("""
+        INSERT INTO statistik_umkm (umkm_id, total_produk)
+        VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE total_produk = total_produk + VALUES(total_produk)
+    """, (umkm_id, delta))
+    if delta < 0 and produk_id is not None:
+        cur.execute("DELETE FROM penjualan_harian WHERE produk_id=%s", (produk_id,))
+
+
+def produk_harian_changed(cur, rows):
+    """
+    Tambahkan selisih ke penjualan_harian dalam satu executemany.
+
+    rows: iterable (umkm_id, produk_id, tanggal, qty, omzet).
+    """
+    cur.executemany("""
+        INSERT INTO penjualan_harian (umkm_id, produk_id, tanggal, qty, omzet)
+        VALUES (%s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            qty = qty + VALUES(qty),
+            omzet = omzet + VALUES(omzet)
+    """, list(rows))
+
+
+PENJUALAN_GLOBAL = """
+    INSERT INTO statistik_global (id, total_transaksi, total_omzet, updated_at)
+    VALUES (1, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE
+        total_transaksi = total_transaksi + VALUES(total_transaksi),
+        total_omzet = total_omzet + VALUES(total_omzet),
+        updated_at = NOW()
+"""
+PENJUALAN_UMKM = """
+    INSERT INTO statistik_umkm (umkm_id, total_transaksi, total_jumlah, total_omzet)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_transaksi = total_transaksi + VALUES(total_transaksi),
+        total_jumlah = total_jumlah + VALUES(total_jumlah),
+        total_omzet = total_omzet + VALUES(total_omzet)
+"""
+PENJUALAN_HARIAN = """
+    INSERT INTO statistik_harian
+    (umkm_id, tanggal, total_transaksi, total_jumlah, total_omzet)
+    VALUES (%s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_transaksi = total_transaksi + VALUES(total_transaksi),
+        total_jumlah = total_jumlah + VALUES(total_jumlah),
+        total_omzet = total_omzet + VALUES(total_omzet)
+"""
+
+
+def penjualan_changed(cur, umkm_id, tanggal, transaksi, jumlah, omzet,
+                      produk_id=None):
+    """
+    Tambahkan selisih (boleh negatif) ke counter global, UMKM dan harian.
+
+    Jika produk_id diisi, penjualan_harian ikut diperbarui; import massal
+    memperbaruinya sendiri per (produk, tanggal) lewat produk_harian_changed.
+    """
+    cur.execute(PENJUALAN_GLOBAL, (transaksi, omzet))
+    cur.execute(PENJUALAN_UMKM, (umkm_id, transaksi, jumlah, omzet))
+    cur.execute(PENJUALAN_HARIAN, (umkm_id, tanggal, transaksi, jumlah, omzet))
+
+    if produk_id is not None:
+        produk_harian_changed(cur, [(umkm_id, produk_id, tanggal, jumlah, omzet)])
+
+
+def penjualan_removed(cur, umkm_id, per_tanggal):
+    """
+    Kurangi counter global, UMKM dan harian sebesar penjualan yang ikut
+    dihapus bersama produknya (services/produk_service.delete_produk).
+    rebuild() juga hanya menghitung penjualan yang produknya masih ada,
+    jadi hasil keduanya tetap sama.
+
+    per_tanggal: iterable (tanggal, transaksi, jumlah, omzet).
+    """
+    rows = [tuple(r) for r in per_tanggal]
+    if not rows:
+        return
+
+    transaksi = sum(r[1] for r in rows)
+    jumlah = sum(r[2] for r in rows)
+    omzet = sum(r[3] for r in rows)
+
+    cur.execute(PENJUALAN_GLOBAL, (-transaksi, -omzet))
+    cur.execute(PENJUALAN_UMKM, (umkm_id, -transaksi, -jumlah, -omzet))
+    cur.executemany(PENJUALAN_HARIAN, [
+        (umkm_id, tanggal, -t, -j, -o) for tanggal, t, j, o in rows
+    ])
+
+
+# ================= REBUILD =================
+def rebuild(db):
+    """Hitung ulang semua tabel rollup dari data mentah dalam satu transaksi."""
+    cur = db.cursor()
+    ensure_schema(cur)
+    db.start_transaction()
+
+    cur.execute("DELETE FROM penjualan_harian")
+    cur.execute("DELETE FROM statistik_harian")
+    cur.execute("DELETE FROM statistik_umkm")
+    cur.execute("DELETE FROM statistik_global")
+
+    cur.execute("""
+        INSERT INTO statistik_global
+        (id, total_user, total_umkm, total_produk, total_transaksi, total_omzet, updated_at)
+        SELECT 1,
+               (SELECT COUNT(*) FROM users),
+               (SELECT COUNT(*) FROM umkm),
+               (SELECT COUNT(*) FROM produk),
+               (SELECT COUNT(*) FROM penjualan p
+                JOIN produk pr ON p.produk_id = pr.id),
+               (SELECT COALESCE(SUM(p.total_harga), 0) FROM penjualan p
+                JOIN produk pr ON p.produk_id = pr.id),
+               NOW()
+    """)
+
+    cur.execute("""
+        INSERT INTO statistik_umkm (umkm_id, total_produk)
+        SELECT u.id, COUNT(pr.id)
+        FROM umkm u
+        LEFT JOIN produk pr ON pr.umkm_id = u.id
+        GROUP BY u.id
+    """)
+
+    cur.execute("""
+        INSERT INTO statistik_harian
+        (umkm_id, tanggal, total_transaksi, total_jumlah, total_omzet)
+        SELECT pr.umkm_id, p.tanggal, COUNT(*), SUM(p.jumlah), SUM(p.total_harga)
+        FROM penjualan p
+        JOIN produk pr ON p.produk_id = pr.id
+        GROUP BY pr.umkm_id, p.tanggal
+    """)
+
+    cur.execute(FILL_PENJUALAN_HARIAN)
+
+    cur.execute("""
+        UPDATE statistik_umkm s
+        JOIN (
+            SELECT umkm_id,
+                   SUM(total_transaksi) AS transaksi,
+                   SUM(total_jumlah) AS jumlah,
+                   SUM(total_omzet) AS omzet
+            FROM statistik_harian
+            GROUP BY umkm_id
+        ) h ON h.umkm_id = s.umkm_id
+        SET s.total_transaksi = h.transaksi,
+            s.total_jumlah = h.jumlah,
+            s.total_omzet = h.omzet
+    """)
+
+    db.commit()
+    cur.close()
+
+
+def main(argv=None):
+    from database.pool import get_pool
+
+    parser = argparse.ArgumentParser(description="Tabel ringkasan dashboard")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args(argv)
+
+    db = get_pool().connection()
+    try:
+        rebuild(db)
+    finally:
+        db.close()
+    print("Rollup selesai dibangun ulang")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Deret waktu penjualan harian dari tabel agregat.
+
+Sumber data sudah teragregasi per hari saat penulisan (services/
+rollup_service.py), sehingga tidak ada GROUP BY ke tabel penjualan:
+
+- statistik_harian  (umkm_id, tanggal)            : total per UMKM
+- penjualan_harian  (umkm_id, produk_id, tanggal) : total per produk
+
+Semua fungsi mengembalikan deret rapat (dense): satu nilai per hari
+kalender dari hari pertama sampai hari terakhir, hari tanpa penjualan
+bernilai 0. Model tidak lagi menganggap dua hari yang berjauhan sebagai
+hari berurutan. Pemanggil prediksi dan grafik memberi end=date.today()
+agar hari-hari sepi sejak penjualan terakhir ikut terhitung 0; tanpa
+itu deret berhenti di penjualan terakhir dan prediksi "besok" sebenarnya
+melanjutkan hari yang sudah lewat.
+"""
+from collections import namedtuple
+from datetime import timedelta
+
+import numpy as np
+
+from models.statistik import statistik as statistik_repo
+
+# start: date hari pertama; values: np.ndarray (T,) atau (P, T)
+Series = namedtuple("Series", ["start", "values"])
+
+# Fitur yang tersedia (query per fitur di models/statistik.py)
+FIELDS = tuple(statistik_repo.HARIAN)
+
+
+def _days(values):
+    return np.array([np.datetime64(v, "D") for v in values], dtype="datetime64[D]")
+
+
+def _bounds(days, start=None, end=None):
+    """(hari pertama, jumlah hari) rentang rapat yang mencakup data."""
+    first = np.datetime64(start, "D") if start else days.min()
+    last = np.datetime64(end, "D") if end else days.max()
+    return first, max(int((last - first).astype(int)) + 1, 0)
+
+
+def densify(days, values, start=None, end=None):
+    """
+    Deret rapat dari pasangan (hari, nilai) yang jarang.
+
+    days   : array datetime64[D]; hari ganda dijumlahkan
+    start / end : batas rentang (inklusif); default hari pertama /
+                  terakhir data. Data di luar rentang dibuang.
+    """
+    days = np.asarray(days, dtype="datetime64[D]")
+    if not len(days) and not (start and end):
+        return Series(None, np.zeros(0))
+
+    first, length = _bounds(days, start, end)
+    offset = (days - first).astype(np.int64)
+    inside = (offset >= 0) & (offset < length)
+
+    dense = np.bincount(
+        offset[inside], weights=np.asarray(values, dtype=float)[inside],
+        minlength=length
+    )
+    return Series(first.item(), dense)
+
+
+def dates(series):
+    """Daftar date untuk setiap titik deret (label grafik)."""
+    if series.start is None:
+        return []
+    length = series.values.shape[-1]
+    return [series.start + timedelta(days=i) for i in range(length)]
+
+
+# ================= PER UMKM =================
+def umkm_series(db, umkm_id, field="qty", start=None, end=None):
+    """Total penjualan harian satu UMKM sebagai Series rapat."""
+    rows = statistik_repo.harian_umkm(db, umkm_id, field)
+    return densify(_days([r[0] for r in rows]), [float(r[1]) for r in rows], start, end)
+
+
+def all_umkm_series(db, field="qty", start=None, end=None):
+    """
+    {umkm_id: Series} untuk semua UMKM dalam satu query (prediksi batch).
+
+    start / end berlaku untuk setiap UMKM seperti di densify().
+    """
+    rows = statistik_repo.harian_semua(db, field)
+    if not rows:
+        return {}
+
+    umkm = np.array([r[0] for r in rows], dtype=np.int64)
+    days = _days([r[1] for r in rows])
+    values = np.array([float(r[2]) for r in rows])
+
+    # Baris sudah urut per UMKM: potong di setiap pergantian umkm_id
+    cuts = np.flatnonzero(np.diff(umkm)) + 1
+    return {
+        int(u[0]): densify(d, v, start, end)
+        for u, d, v in zip(np.split(umkm, cuts), np.split(days, cuts),
+                           np.split(values, cuts))
+    }
+
+
+# ================= PER PRODUK =================
+def produk_matrix(db, umkm_id, field="qty", start=None, end=None):
+    """
+    Penjualan harian semua produk UMKM: (produk_ids, Series matriks P x T).
+
+    Semua produk berbagi sumbu hari yang sama; hari tanpa penjualan = 0.
+    """
+    rows = statistik_repo.harian_produk(db, umkm_id, field)
+
+    if not rows and not (start and end):
+        return [], Series(None, np.zeros((0, 0)))
+
+    produk = np.array([r[0] for r in rows], dtype=np.int64)
+    days = _days([r[1] for r in rows])
+    values = np.array([float(r[2]) for r in rows])
+
+    produk_ids, row = np.unique(produk, return_inverse=True)
+    first, length = _bounds(days, start, end)
+    col = (days - first).astype(np.int64)
+    inside = (col >= 0) & (col < length)
+
+    matrix = np.zeros((len(produk_ids), length))
+    np.add.at(matrix, (row.ravel()[inside], col[inside]), values[inside])
+    return [int(p) for p in produk_ids], Series(first.item(), matrix)
+
@@ -0,0 +1,113 @@
+"""
+Pembentukan sliding window untuk model deret waktu.
+
+Window dibentuk dengan sliding_window_view (view strided di atas array
+input), bukan list slice yang disalin satu per satu. Untuk satu deret
+tidak ada salinan sama sekali sampai Keras mengubahnya menjadi tensor.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def sliding_windows(data, n_steps, target=0, horizon=1):
+    """
+    Window input dan target.
+
+    data    : array (T,) atau (T, F)
+    target  : indeks fitur yang diprediksi
+    horizon : jumlah langkah target setelah tiap window
+
+    Mengembalikan X dengan shape (N, n_steps, F) dan y dengan shape
+    (N, horizon), N = T - n_steps - horizon + 1. X dan y adalah view
+    dari data.
+    """
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 1:
+        data = data[:, None]
+
+    n = len(data) - n_steps - horizon + 1
+    if n <= 0:
+        return np.empty((0, n_steps, data.shape[1])), np.empty((0, horizon))
+
+    # (T - n_steps + 1, F, n_steps) -> (.., n_steps, F); window di ujung
+    # yang tidak punya target lengkap dibuang
+    X = sliding_window_view(data, n_steps, axis=0).swapaxes(1, 2)[:n]
+    y = sliding_window_view(data[n_steps:, target], horizon)[:n]
+    return X, y
+
+
+def last_window(data, n_steps):
+    """Window terakhir (1, n_steps, F) untuk prediksi hari berikutnya."""
+    data = np.asarray(data, dtype=float)
+    if data.ndim == 1:
+        data = data[:, None]
+    return data[-n_steps:][None, :, :]
+
+
+# ================= FITUR TAMBAHAN =================
+def day_of_week_features(start, length):
+    """
+    Encoding sin/cos hari dalam minggu, shape (length, 2).
+
+    start : date hari pertama deret
+    """
+    dow = (np.arange(length) + start.weekday()) % 7
+    angle = 2 * np.pi * dow / 7
+    return np.column_stack([np.sin(angle), np.cos(angle)])
+
+
+def with_features(series, *features):
+    """Gabungkan deret target (kolom 0) dengan fitur lain menjadi (T, F)."""
+    columns = [np.asarray(series, dtype=float)]
+    columns.extend(np.asarray(f, dtype=float) for f in features)
+    return np.column_stack(columns)
+
+
+# ================= BATCH BANYAK DERET =================
+def stack_series(series_list, fill=0.0):
+    """
+    Susun beberapa deret dengan panjang berbeda menjadi matriks (S, T).
+
+    Deret diratakan ke kanan (hari terakhir sejajar) dan bagian depan
+    diisi `fill`. Mengembalikan (matriks, panjang asli per deret).
+    """
+    lengths = np.array([len(s) for s in series_list])
+    matrix = np.full((len(series_list), lengths.max(initial=0)), fill, dtype=float)
+    for i, s in enumerate(series_list):
+        if len(s):
+            matrix[i, -len(s):] = s
+    return matrix, lengths
+
+
+def batch_windows(matrix, n_steps, lengths=None, horizon=1):
+    """
+    Window untuk banyak deret sekaligus dalam satu tensor.
+
+    matrix : (S, T), mis. UMKM x hari atau produk x hari
+    Mengembalikan X (N, n_steps, 1), y (N, horizon) dan group (N,) berisi
+    indeks deret asal tiap window. Window diurutkan per deret lalu per
+    waktu. Jika lengths diberikan, window yang menyentuh padding di depan
+    deret dibuang. Menggabungkan window dari banyak deret butuh satu
+    salinan (N, n_steps), tanpa list per window.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    S, T = matrix.shape
+    W = T - n_steps - horizon + 1
+    if W <= 0:
+        return (np.empty((0, n_steps, 1)), np.empty((0, horizon)),
+                np.empty(0, dtype=int))
+
+    # (S, W, n_steps) view; target = horizon nilai setelah tiap window
+    windows = sliding_window_view(matrix, n_steps, axis=1)[:, :W]
+    targets = sliding_window_view(matrix[:, n_steps:], horizon, axis=1)[:, :W]
+
+    if lengths is None:
+        valid = np.ones((S, W), dtype=bool)
+    else:
+        start = T - np.asarray(lengths)
+        valid = np.arange(W)[None, :] >= start[:, None]
+
+    group = np.broadcast_to(np.arange(S)[:, None], (S, W))[valid]
+    X = windows[valid][:, :, None]
+    y = targets[valid]
+    return X, y, group